@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,15 +46,28 @@ INSTALLED_APPS = [
 SITE_ID = 1
 
 MIDDLEWARE = [
+    'jobs.middleware.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'jobs.middleware.LeanAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'jobs.middleware.ReadReplicaMiddleware',
 ]
 
+# Per-request SQL/template instrumentation (see jobs/middleware.py).
+# Fraction of requests to instrument: 0 disables it, 1.0 instruments every request.
+QUERY_INSTRUMENTATION_SAMPLE_RATE = 0
+# Same query shape from the same call site this many times is reported as a likely N+1
+QUERY_INSTRUMENTATION_DUPLICATE_THRESHOLD = 3
+QUERY_INSTRUMENTATION_LOG_SIZE = 200
+# Queries slower than this (ms) are appended to SLOW_QUERY_LOG_FILE for
+# `manage.py explain_slow_queries`. None disables the slow query log.
+SLOW_QUERY_THRESHOLD_MS = None
+SLOW_QUERY_LOG_FILE = BASE_DIR / 'slow_queries.jsonl'
+
 ROOT_URLCONF = 'job_portal_core.urls'
 
 TEMPLATES = [
@@ -78,13 +92,116 @@ WSGI_APPLICATION = 'job_portal_core.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# Background tasks (jobs/taskqueue.py, `manage.py run_tasks`). A claimed task
+# is leased for TASK_VISIBILITY_TIMEOUT seconds; if its worker dies it becomes
+# visible again after that. Failed attempts retry after TASK_RETRY_DELAY
+# seconds, doubling each time, up to TASK_MAX_ATTEMPTS.
+TASK_VISIBILITY_TIMEOUT = 300
+TASK_MAX_ATTEMPTS = 3
+TASK_RETRY_DELAY = 10
+TASK_WORKER_PROCESSES = 2
+
+# Uploaded images get resized derivatives at these widths (never upscaled),
+# built by a background task and served through {% picture %} / |srcset.
+# Formats the installed Pillow can't encode are skipped.
+IMAGE_DERIVATIVE_WIDTHS = {
+    'jobs.Company.logo': [64, 128, 256],
+    'jobs.User.profile_picture': [32, 64, 128, 256],
+    'jobs.Course.image': [320, 640, 960],
+    'jobs.Article.image': [320, 640, 960],
+    'jobs.CourseCategory.image': [160, 320, 640],
+}
+IMAGE_DERIVATIVE_FORMATS = ['avif', 'webp']
+IMAGE_DERIVATIVE_QUALITY = {'avif': 50, 'webp': 75}
+IMAGE_DERIVATIVE_DIR = 'derivatives'
+
+# Connections stay open for DB_CONN_MAX_AGE seconds and are reused by later
+# requests on the same worker thread (0 closes them after every request, None
+# never does). CONN_HEALTH_CHECKS pings a reused connection before its first
+# query in a request. The jobs.backends engines are Django's own, plus
+# open/reuse/connect-time metrics (jobs/db.py); use jobs.backends.postgresql
+# for Postgres.
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'jobs.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Read replicas: list/sitemap views marked read_replica read from one of
+# DATABASE_REPLICAS (jobs/routers.py); clients stay on the primary for
+# REPLICA_STICKY_SECONDS after a POST. To try it locally, REPLICA_SQLITE=1 adds
+# a second SQLite file that `manage.py sync_replicas` copies the primary into.
+if os.environ.get('REPLICA_SQLITE'):
+    DATABASES['replica'] = {
+        'ENGINE': 'jobs.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.replica.sqlite3',
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['jobs.routers.ReadReplicaRouter']
+REPLICA_STICKY_SECONDS = 10
+
+# Applied to every new SQLite connection (jobs/db.py). WAL lets readers run
+# alongside the single writer; synchronous=NORMAL is durable with WAL except
+# for power loss; busy_timeout (ms) makes writers queue for the lock instead
+# of failing. Set to {} to keep SQLite's defaults.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    'cache_size': -64000,  # negative means KiB: 64 MB page cache per connection
+    'mmap_size': 268435456,
+    'temp_store': 'memory',
+}
+# Write transactions wrapped in jobs.db.write_transaction are retried this many
+# times, backing off from WRITE_RETRY_BASE_DELAY seconds, when SQLite is locked.
+WRITE_RETRY_ATTEMPTS = 5
+WRITE_RETRY_BASE_DELAY = 0.05
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Page/fragment caches are invalidated by version keys (jobs/cache.py), so with
+# several worker processes this must be a shared backend (Redis, Memcached);
+# local memory is only correct for a single process.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+HOME_PAGE_CACHE_TIMEOUT = 600
+HOME_FRAGMENT_CACHE_TIMEOUT = 3600
+# Sessions are read from the cache and written through to the database
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+# request.user answers role/verification checks from a cached projection of
+# the user row (jobs/auth.py); saving a User drops it.
+USER_SUMMARY_CACHE_TIMEOUT = 3600
+
+# Job/course detail fragments are keyed on the object's updated_at
+DETAIL_FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Each user's saved/hidden job ids and each job search's matching ids are
+# cached as id arrays (jobs/jobmarks.py); the toggles and job edits drop them.
+JOB_MARKS_TIMEOUT = 60 * 60 * 24
+# Searches matching more jobs than this aren't cached as id lists (8 bytes
+# an id, keep it under memcached's 1 MB item limit); hidden jobs are left out
+# in the query for them instead.
+JOB_LISTING_MAX_IDS = 20000
+
+# sitemap.xml is an index of segments covering this many ids each. Rendered
+# segments are kept in SITEMAP_CACHE_DIR, keyed on the segment's max(updated_at).
+SITEMAP_SEGMENT_SIZE = 5000
+SITEMAP_CACHE_DIR = BASE_DIR / 'sitemap_cache'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -127,6 +244,30 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Lesson videos and notes go through jobs.views.lesson_media, which checks
+# enrollment; the web server must not expose lesson_videos/ and lesson_notes/
+# under MEDIA_URL. With MEDIA_OFFLOAD = 'x-accel-redirect' the view only
+# authorizes and nginx sends the file from an `internal` location mapped to
+# MEDIA_OFFLOAD_PREFIX; 'x-sendfile' does the same for Apache/lighttpd.
+MEDIA_OFFLOAD = os.environ.get('MEDIA_OFFLOAD') or None
+MEDIA_OFFLOAD_PREFIX = '/protected-media/'
+
+# Resumable uploads (jobs/uploads.py) collect chunks in UPLOAD_PARTIAL_DIR,
+# outside MEDIA_ROOT, until they're committed. Sessions idle for longer than
+# UPLOAD_SESSION_TTL seconds are removed by `manage.py clear_stale_uploads`.
+UPLOAD_PARTIAL_DIR = BASE_DIR / 'upload_chunks'
+UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024
+UPLOAD_SESSION_TTL = 86400
+
+# Resumes and CVs are stored once per distinct content under
+# MEDIA_ROOT/BLOB_STORAGE_PREFIX (jobs/storage.py). `manage.py gc_blobs`
+# deletes unreferenced blobs older than BLOB_GC_GRACE seconds.
+BLOB_STORAGE_PREFIX = 'blobs'
+BLOB_GC_GRACE = 3600
+
+# Streaming CSV/JSONL exports (jobs/exports.py) fetch this many rows per query round trip
+EXPORT_CHUNK_SIZE = 2000
+
 AUTH_USER_MODEL = 'jobs.User'
 
 LOGIN_URL = 'login'
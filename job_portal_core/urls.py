@@ -6,13 +6,8 @@ from django.contrib.auth import views as auth_views
 from django.contrib.sitemaps.views import sitemap
 from django.http import HttpResponse
 from jobs import views as job_views
-from jobs.sitemaps import JobSitemap, CourseSitemap, StaticViewSitemap
+from jobs.sitemaps import StaticViewSitemap, SEGMENTED_SITEMAPS, sitemap_index, sitemap_segment
 
-sitemaps = {
-    'static': StaticViewSitemap,
-    'jobs': JobSitemap,
-    'courses': CourseSitemap,
-}
 
 def robots_txt(request):
     lines = [
@@ -30,7 +25,9 @@ urlpatterns = [
     path('logout/', auth_views.LogoutView.as_view(), name='logout'),
     path('signup/', job_views.ApplicantSignUpView.as_view(), name='signup'),
     path('signup/employer/', job_views.EmployerSignUpView.as_view(), name='employer_signup'),
-    path('sitemap.xml', sitemap, {'sitemaps': sitemaps}, name='django.contrib.sitemaps.views.sitemap'),
+    path('sitemap.xml', sitemap_index, {'sitemaps': SEGMENTED_SITEMAPS}, name='sitemap_index'),
+    path('sitemap-static.xml', sitemap, {'sitemaps': {'static': StaticViewSitemap}}, name='sitemap_static'),
+    path('sitemap-<slug:section>-<int:segment>.xml', sitemap_segment, name='sitemap_segment'),
     path('robots.txt', robots_txt, name='robots_txt'),
     path('', include('jobs.urls', namespace='jobs')),
 ]
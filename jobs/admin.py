@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import User, Company, Job, Application, Category
+from .models import User, Company, Job, Application, Category, Task
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
@@ -23,3 +23,8 @@ class ApplicationAdmin(admin.ModelAdmin):
     list_filter = ('status',)
 
 admin.site.register(Category)
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'priority', 'attempts', 'run_after', 'created_at')
+    list_filter = ('status', 'name')
@@ -0,0 +1,262 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.db.models.fields.files import FieldFile
+from django.http import Http404, HttpResponse, JsonResponse
+from django.views.decorators.gzip import gzip_page
+
+from .cache import make_etag, conditional_response, set_validators
+from .models import Job, Company, Course, Article
+from .routers import replica_reads
+
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+class ApiError(Exception):
+    pass
+
+
+class Resource:
+    """
+    A read-only list endpoint. `fields` maps each public field name to the
+    lookup it's read from (related lookups are select_related), and
+    `ordering` is the keyset the cursor walks, ending in a unique column.
+    """
+    model = None
+    fields = {}
+    default_fields = ()
+    ordering = ('-id',)
+
+    def get_queryset(self, params):
+        return self.model.objects.all()
+
+
+class JobResource(Resource):
+    model = Job
+    fields = {
+        'id': 'id',
+        'slug': 'slug',
+        'title': 'title',
+        'company': 'company__name',
+        'company_id': 'company_id',
+        'category': 'category__name',
+        'location': 'location',
+        'job_type': 'job_type',
+        'salary_range': 'salary_range',
+        'description': 'description',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    }
+    default_fields = ('id', 'slug', 'title', 'company', 'category', 'location', 'job_type', 'salary_range', 'created_at')
+    ordering = ('-created_at', '-id')
+
+    def get_queryset(self, params):
+        # Same filters as the job list page
+        queryset = Job.objects.filter(status='active', is_active=True)
+        if params.get('q'):
+            queryset = queryset.filter(Q(title__icontains=params['q']) | Q(description__icontains=params['q']))
+        if params.get('l'):
+            queryset = queryset.filter(location__icontains=params['l'])
+        if params.get('category'):
+            try:
+                category = int(params['category'])
+            except ValueError:
+                raise ApiError("category must be a number")
+            queryset = queryset.filter(category__id=category)
+        return queryset
+
+
+class CompanyResource(Resource):
+    model = Company
+    fields = {
+        'id': 'id',
+        'name': 'name',
+        'description': 'description',
+        'website': 'website',
+        'location': 'location',
+        'logo': 'logo',
+    }
+    default_fields = ('id', 'name', 'website', 'location', 'logo')
+    ordering = ('name', 'id')
+
+
+class CourseResource(Resource):
+    model = Course
+    fields = {
+        'id': 'id',
+        'slug': 'slug',
+        'title': 'title',
+        'category': 'category__name',
+        'description': 'description',
+        'duration': 'duration',
+        'fees': 'fees',
+        'level': 'level',
+        'image': 'image',
+        'students_enrolled': 'students_enrolled',
+        'rating': 'rating',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    }
+    default_fields = ('id', 'slug', 'title', 'category', 'duration', 'fees', 'level', 'image', 'rating')
+    ordering = ('-rating', '-id')
+
+    def get_queryset(self, params):
+        queryset = Course.objects.filter(status='active')
+        if params.get('category'):
+            queryset = queryset.filter(Q(category__slug=params['category']) | Q(category__parent__slug=params['category']))
+        return queryset
+
+
+class ArticleResource(Resource):
+    model = Article
+    fields = {
+        'id': 'id',
+        'slug': 'slug',
+        'title': 'title',
+        'author': 'author__username',
+        'category': 'category__name',
+        'content': 'content',
+        'image': 'image',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    }
+    default_fields = ('id', 'slug', 'title', 'author', 'category', 'image', 'created_at')
+    ordering = ('-created_at', '-id')
+
+    def get_queryset(self, params):
+        queryset = Article.objects.all()
+        if params.get('category'):
+            queryset = queryset.filter(Q(category__slug=params['category']) | Q(category__parent__slug=params['category']))
+        return queryset
+
+
+RESOURCES = {
+    'jobs': JobResource(),
+    'companies': CompanyResource(),
+    'courses': CourseResource(),
+    'articles': ArticleResource(),
+}
+
+
+def encode_cursor(values):
+    # str() keeps full microseconds, which DjangoJSONEncoder would round off
+    data = json.dumps(values, default=str, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def decode_cursor(cursor, length):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, binascii.Error):
+        raise ApiError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != length:
+        raise ApiError("Invalid cursor")
+    return values
+
+
+def after_cursor(ordering, values):
+    """Rows that come after `values` in `ordering`: (a, b) > (x, y) spelled out as a > x OR (a = x AND b > y)."""
+    condition = Q()
+    for i, field in enumerate(ordering):
+        name = field.lstrip('-')
+        step = Q(**{f"{name}__{'lt' if field.startswith('-') else 'gt'}": values[i]})
+        for previous, value in zip(ordering[:i], values):
+            step &= Q(**{previous.lstrip('-'): value})
+        condition |= step
+    return condition
+
+
+def resolve(obj, lookup):
+    for attr in lookup.split('__'):
+        if obj is None:
+            return None
+        obj = getattr(obj, attr)
+    if isinstance(obj, FieldFile):
+        return obj.url if obj else None
+    return obj
+
+
+def parse_fields(resource, param):
+    if not param:
+        return list(resource.default_fields)
+    names = [name.strip() for name in param.split(',') if name.strip()]
+    unknown = [name for name in names if name not in resource.fields]
+    if unknown:
+        raise ApiError(f"Unknown field(s): {', '.join(unknown)}")
+    return list(dict.fromkeys(names))
+
+
+def parse_limit(param):
+    if not param:
+        return DEFAULT_LIMIT
+    try:
+        limit = int(param)
+    except ValueError:
+        raise ApiError("limit must be a number")
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def list_page(resource, params):
+    """One page of `resource` as (rows, next cursor), reading only the columns asked for."""
+    fields = parse_fields(resource, params.get('fields'))
+    limit = parse_limit(params.get('limit'))
+    ordering = resource.ordering
+
+    lookups = [resource.fields[name] for name in fields]
+    related = {lookup.rsplit('__', 1)[0] for lookup in lookups if '__' in lookup}
+    queryset = resource.get_queryset(params).select_related(*related).only(
+        *lookups, *(field.lstrip('-') for field in ordering)
+    ).order_by(*ordering)
+    if params.get('cursor'):
+        try:
+            queryset = queryset.filter(after_cursor(ordering, decode_cursor(params['cursor'], len(ordering))))
+        except (ValidationError, ValueError, TypeError):
+            raise ApiError("Invalid cursor")
+
+    objects = list(queryset[:limit + 1])
+    cursor = None
+    if len(objects) > limit:
+        objects = objects[:limit]
+        cursor = encode_cursor([getattr(objects[-1], field.lstrip('-')) for field in ordering])
+    rows = [{name: resolve(obj, resource.fields[name]) for name in fields} for obj in objects]
+    return rows, cursor
+
+
+@replica_reads
+@gzip_page
+def api_list(request, resource):
+    """
+    GET api/<resource>/: compact JSON for the mobile app and partners,
+    without template rendering. ?fields=a,b picks columns (the query only
+    reads those), ?limit= sizes the page (max 100), and ?cursor= continues
+    from the "next" link, which stays stable while rows are added.
+    """
+    if resource not in RESOURCES:
+        raise Http404("No such resource")
+    if request.method not in ('GET', 'HEAD'):
+        return JsonResponse({'error': 'Invalid request'}, status=400)
+    try:
+        rows, cursor = list_page(RESOURCES[resource], request.GET)
+    except ApiError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+
+    next_url = None
+    if cursor:
+        params = request.GET.copy()
+        params['cursor'] = cursor
+        next_url = request.build_absolute_uri('?' + params.urlencode())
+    body = json.dumps({'results': rows, 'next': next_url}, cls=DjangoJSONEncoder, separators=(',', ':'))
+
+    # The page is one indexed query; the ETag spares clients re-downloading it unchanged
+    etag = make_etag(body)
+    response = conditional_response(request, etag)
+    if response is None:
+        response = set_validators(HttpResponse(body, content_type='application/json'), etag)
+    response['Cache-Control'] = 'public, max-age=60'
+    return response
@@ -0,0 +1,115 @@
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY, BACKEND_SESSION_KEY, HASH_SESSION_KEY
+from django.contrib.auth.middleware import get_user
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject, empty
+
+from .models import User, UserRoleMixin
+
+
+# The columns permission checks need, cached per user
+SUMMARY_FIELDS = ('id', 'user_type', 'verification_status', 'is_superuser', 'public_id', 'is_active')
+
+# Attributes LazyUser answers from the summary without loading the User row
+SUMMARY_ATTRIBUTES = {
+    'id', 'pk', 'user_type', 'verification_status', 'is_superuser', 'public_id',
+    'is_authenticated', 'is_anonymous', 'is_admin_user', 'is_college_user',
+    'is_employer_user', 'is_applicant_user', 'can_access_tools',
+}
+
+# Only sessions from this backend are resolved from the summary; others get
+# the regular get_user() path.
+MODEL_BACKEND = 'django.contrib.auth.backends.ModelBackend'
+
+
+class UserSummary(UserRoleMixin):
+    IS_APPLICANT = User.IS_APPLICANT
+    IS_EMPLOYER = User.IS_EMPLOYER
+    IS_COLLEGE = User.IS_COLLEGE
+    IS_ADMIN = User.IS_ADMIN
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, id, user_type, verification_status, is_superuser, public_id, is_active, session_hash):
+        self.id = id
+        self.user_type = user_type
+        self.verification_status = verification_status
+        self.is_superuser = is_superuser
+        self.public_id = public_id
+        self.is_active = is_active
+        self.session_hash = session_hash
+
+    @property
+    def pk(self):
+        return self.id
+
+
+def summary_cache_key(user_id):
+    return f"user-summary:{user_id}"
+
+
+def load_user_summary(user_id):
+    key = summary_cache_key(user_id)
+    data = cache.get(key)
+    if data is None:
+        data = User.objects.filter(pk=user_id).values(*SUMMARY_FIELDS, 'password').first()
+        if data is None:
+            return None
+        # Keep the session hash rather than the password hash itself
+        data['session_hash'] = User(password=data.pop('password')).get_session_auth_hash()
+        cache.set(key, data, getattr(settings, 'USER_SUMMARY_CACHE_TIMEOUT', 3600))
+    return UserSummary(**data)
+
+
+def invalidate_user_summary(user_id):
+    cache.delete(summary_cache_key(user_id))
+
+
+def get_user_summary(request):
+    """
+    The logged in user's summary, from the session and the cache, or None when
+    the session has no (valid) user. Applies the same checks as
+    django.contrib.auth.get_user(): active user, matching session hash.
+    """
+    session = request.session
+    try:
+        user_id = User._meta.pk.to_python(session[SESSION_KEY])
+        backend = session[BACKEND_SESSION_KEY]
+    except KeyError:
+        return None
+    if backend != MODEL_BACKEND or backend not in settings.AUTHENTICATION_BACKENDS:
+        return None
+    summary = load_user_summary(user_id)
+    if summary is None or not summary.is_active:
+        return None
+    if not constant_time_compare(session.get(HASH_SESSION_KEY, ''), summary.session_hash):
+        # Let get_user() deal with it (SECRET_KEY_FALLBACKS, flushing the session)
+        return None
+    return summary
+
+
+class LazyUser(SimpleLazyObject):
+    """
+    request.user that answers login/role/verification checks from the cached
+    UserSummary, and only loads the full User row (bio, address, every
+    profile column) when something else is used.
+    """
+
+    def __init__(self, request):
+        super().__init__(lambda: get_user(request))
+        self.__dict__['_request'] = request
+        self.__dict__['_summary'] = empty
+
+    def _get_summary(self):
+        if self._summary is empty:
+            self.__dict__['_summary'] = get_user_summary(self._request)
+        return self._summary
+
+    def __getattr__(self, name):
+        if name in SUMMARY_ATTRIBUTES and self._wrapped is empty:
+            summary = self._get_summary()
+            if summary is not None:
+                return getattr(summary, name)
+        return super().__getattr__(name)
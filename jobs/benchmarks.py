@@ -0,0 +1,273 @@
+import json
+import math
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+
+from .db import apply_sqlite_pragmas, is_locked_error, retry_on_locked, sqlite_pragmas
+from .models import User, Job, Enrollment, Lesson
+
+
+BUDGETS_FILE = Path(__file__).resolve().parent / 'benchmark_budgets.json'
+
+# Scale of the generated dataset the recorded budgets were measured against
+BENCHMARK_SCALE = 0.05
+
+# Latency is noisy across machines: it is only checked when asked for
+# (benchmark_views, or BENCHMARK_LATENCY=1 in the test suite), on the machine
+# the budgets were recorded on. Query counts are deterministic and always checked.
+LATENCY_TOLERANCE = 1.5
+ALLOCATION_TOLERANCE = 1.5
+
+
+class BenchmarkFixtures:
+    """Picks the users and objects each hot view is driven with."""
+
+    def __init__(self):
+        self.applicant = (
+            User.objects.filter(user_type=User.IS_APPLICANT)
+            .annotate(sent=Count('sent_messages')).order_by('-sent', 'pk').first()
+        )
+        self.admin = User.objects.filter(user_type=User.IS_ADMIN).order_by('pk').first() or User.objects.filter(is_superuser=True).order_by('pk').first()
+        self.job = Job.objects.filter(status='active', is_active=True, slug__isnull=False).order_by('-created_at').first()
+        self.kanban_job = (
+            Job.objects.filter(slug__isnull=False).annotate(n=Count('applications'))
+            .order_by('-n', 'pk').select_related('employer').first()
+        )
+        enrollment = Enrollment.objects.filter(student=self.applicant).order_by('pk').first() if self.applicant else None
+        lessons = Lesson.objects.order_by('pk')
+        self.lesson = (lessons.filter(module__course=enrollment.course).first() if enrollment else None) or lessons.first()
+
+    def cases(self):
+        """(name, url, user) for every benchmarked view; views we have no data for are left out."""
+        cases = [
+            ('home', reverse('jobs:home'), None),
+            ('home_authenticated', reverse('jobs:home'), self.applicant),
+            ('job_list', reverse('jobs:job_list'), None),
+            ('job_list_authenticated', reverse('jobs:job_list'), self.applicant),
+            ('learn', reverse('jobs:learn'), None),
+        ]
+        if self.applicant:
+            cases += [
+                ('messaging', reverse('jobs:messaging'), self.applicant),
+                ('network', reverse('jobs:network'), self.applicant),
+            ]
+            if self.job:
+                cases.append(('job_detail', self.job.get_absolute_url(), self.applicant))
+            if self.lesson:
+                cases.append(('lesson_detail', reverse('jobs:lesson_detail', kwargs={'slug': self.lesson.slug}), self.applicant))
+        if self.kanban_job:
+            cases.append(('employer_kanban', reverse('jobs:job_kanban', kwargs={'slug': self.kanban_job.slug}), self.kanban_job.employer))
+        if self.admin:
+            cases.append(('admin_dashboard', reverse('jobs:admin_dashboard'), self.admin))
+        return cases
+
+
+def percentile(samples, pct):
+    # Nearest-rank percentile
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+class QueryCounter:
+    # Installed with connection.execute_wrapper(); unlike CaptureQueriesContext
+    # it doesn't depend on the (bounded) connection.queries_log.
+    def __init__(self):
+        self.count = 0
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        self.queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+def capture_queries(client, url):
+    """(sql, params) of every query a GET of `url` runs."""
+    queries = QueryCounter()
+    with connection.execute_wrapper(queries):
+        client.get(url)
+    return queries.queries
+
+
+def measure_view(client, url, iterations=20):
+    # Warm-up request fills template and URL caches so they don't skew timings
+    response = client.get(url)
+    if response.status_code != 200:
+        raise AssertionError(f"GET {url} returned {response.status_code}")
+
+    queries = QueryCounter()
+    with connection.execute_wrapper(queries):
+        client.get(url)
+
+    tracemalloc.start()
+    try:
+        client.get(url)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        client.get(url)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    return {
+        'queries': queries.count,
+        'p50_ms': round(statistics.median(timings), 2),
+        'p95_ms': round(percentile(timings, 95), 2),
+        'alloc_kb': round(peak / 1024, 1),
+    }
+
+
+def run_benchmarks(iterations=20, only=None):
+    """Drive every hot view through the test client. Returns {name: result}."""
+    results = {}
+    for name, url, user in BenchmarkFixtures().cases():
+        if only and name not in only:
+            continue
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        result = measure_view(client, url, iterations)
+        result['url'] = url
+        results[name] = result
+    return results
+
+
+def load_budgets(path=BUDGETS_FILE):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def record_budgets(results, path=BUDGETS_FILE, scale=BENCHMARK_SCALE):
+    budgets = {
+        'scale': scale,
+        'views': {
+            name: {key: result[key] for key in ('queries', 'p95_ms', 'alloc_kb')}
+            for name, result in sorted(results.items())
+        },
+    }
+    with open(path, 'w') as f:
+        json.dump(budgets, f, indent=2)
+        f.write('\n')
+    return budgets
+
+
+def check_budgets(results, budgets, latency=True):
+    """Return a list of human readable budget violations (empty when all views are within budget)."""
+    failures = []
+    for name, result in results.items():
+        budget = budgets.get('views', {}).get(name)
+        if budget is None:
+            continue
+        if result['queries'] > budget['queries']:
+            failures.append(f"{name}: {result['queries']} queries (budget {budget['queries']})")
+        if latency and result['p95_ms'] > budget['p95_ms'] * LATENCY_TOLERANCE:
+            failures.append(f"{name}: p95 {result['p95_ms']}ms (budget {budget['p95_ms']}ms x{LATENCY_TOLERANCE})")
+        if result['alloc_kb'] > budget['alloc_kb'] * ALLOCATION_TOLERANCE:
+            failures.append(f"{name}: {result['alloc_kb']}KB allocated (budget {budget['alloc_kb']}KB x{ALLOCATION_TOLERANCE})")
+    return failures
+
+
+def format_results(results):
+    lines = [f"{'view':<24}{'queries':>8}{'p50 ms':>10}{'p95 ms':>10}{'alloc KB':>11}"]
+    for name, result in results.items():
+        lines.append(f"{name:<24}{result['queries']:>8}{result['p50_ms']:>10}{result['p95_ms']:>10}{result['alloc_kb']:>11}")
+    return "\n".join(lines)
+
+
+# SQLite as Django configures it out of the box (rollback journal, 5s busy
+# timeout from sqlite3.connect) versus SQLITE_PRAGMAS plus write retries.
+SQLITE_DEFAULT_PRAGMAS = {'journal_mode': 'delete', 'synchronous': 'full'}
+
+
+def _toggle_saved(conn, user_id, job_id):
+    # Same shape as toggle_save_job: read, then insert or delete, in one transaction
+    conn.execute('BEGIN')
+    try:
+        row = conn.execute('SELECT id FROM saved WHERE user_id = ? AND job_id = ?', (user_id, job_id)).fetchone()
+        if row:
+            conn.execute('DELETE FROM saved WHERE id = ?', row)
+        else:
+            conn.execute('INSERT INTO saved (user_id, job_id, saved_at) VALUES (?, ?, ?)', (user_id, job_id, time.time()))
+        conn.execute('COMMIT')
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute('ROLLBACK')
+        raise
+
+
+def _write_worker(path, pragmas, retry, writes, worker, results):
+    conn = sqlite3.connect(path, isolation_level=None)
+    apply_sqlite_pragmas(conn, pragmas)
+    rng = random.Random(worker)
+    done = failed = 0
+    for _ in range(writes):
+        job_id = rng.randrange(500)
+        try:
+            if retry:
+                retry_on_locked(lambda: _toggle_saved(conn, worker, job_id))
+            else:
+                _toggle_saved(conn, worker, job_id)
+            done += 1
+        except sqlite3.OperationalError as exc:
+            if not is_locked_error(exc):
+                raise
+            failed += 1
+    conn.close()
+    results.append((done, failed))
+
+
+def benchmark_sqlite_writes(pragmas, retry, threads=8, writes=200):
+    """
+    Concurrent toggle-style write transactions against a scratch SQLite file.
+    Returns {'writes', 'failed', 'seconds', 'writes_per_sec'}.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'writes.sqlite3')
+        conn = sqlite3.connect(path)
+        conn.execute('CREATE TABLE saved (id INTEGER PRIMARY KEY, user_id INTEGER, job_id INTEGER, saved_at REAL, UNIQUE (user_id, job_id))')
+        conn.close()
+
+        results = []
+        workers = [
+            threading.Thread(target=_write_worker, args=(path, pragmas, retry, writes, worker, results))
+            for worker in range(threads)
+        ]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        seconds = time.perf_counter() - started
+
+    done = sum(r[0] for r in results)
+    return {
+        'writes': done,
+        'failed': sum(r[1] for r in results),
+        'seconds': round(seconds, 2),
+        'writes_per_sec': round(done / seconds, 1) if seconds else 0.0,
+    }
+
+
+def compare_sqlite_write_profiles(threads=8, writes=200):
+    return {
+        'default': benchmark_sqlite_writes(SQLITE_DEFAULT_PRAGMAS, retry=False, threads=threads, writes=writes),
+        'production': benchmark_sqlite_writes(sqlite_pragmas(), retry=True, threads=threads, writes=writes),
+    }
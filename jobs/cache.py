@@ -0,0 +1,79 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+# Version namespaces. Cache keys embed the current version, so bumping a
+# version invalidates every entry built from that data without deleting keys.
+JOBS = 'jobs'
+CATEGORIES = 'categories'
+
+
+def _version_key(name):
+    return f"version:{name}"
+
+
+def _initial_version():
+    # Start from the clock rather than 1, so a version key evicted from the
+    # cache can't come back as a number that old entries were built with.
+    return int(time.time() * 1000)
+
+
+def get_versions(*names):
+    """Current version of each namespace, in one cache round trip."""
+    keys = [_version_key(name) for name in names]
+    found = cache.get_many(keys)
+    versions = {}
+    for name, key in zip(names, keys):
+        if key not in found:
+            cache.add(key, _initial_version(), None)
+            found[key] = cache.get(key)
+        versions[name] = found[key]
+    return versions
+
+
+def bump_version(*names):
+    for name in names:
+        try:
+            cache.incr(_version_key(name))
+        except ValueError:
+            cache.set(_version_key(name), _initial_version(), None)
+
+
+def page_cache_key(prefix, request, versions):
+    """Key for a whole rendered page; templates use scheme/host/full URL, so they are part of it."""
+    url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    parts = '.'.join(str(versions[name]) for name in sorted(versions))
+    return f"page:{prefix}:{parts}:{url}"
+
+
+def request_variant(request):
+    """What a page renders differently per visitor: base.html's nav shows the user's name, email and picture."""
+    user = request.user
+    if not user.is_authenticated:
+        return ('anonymous',)
+    return (user.pk, user.user_type, user.first_name, user.last_name, user.email, str(user.profile_picture))
+
+
+def make_etag(*parts):
+    return quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+
+
+def conditional_response(request, etag, last_modified=None):
+    """A 304 (or 412) response if the client's validators still match, otherwise None."""
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    if response.status_code in (200, 304):
+        response.headers.setdefault('ETag', etag)
+        if last_modified:
+            response.headers.setdefault('Last-Modified', http_date(last_modified.timestamp()))
+    return response
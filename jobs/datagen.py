@@ -0,0 +1,393 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .cache import JOBS, CATEGORIES, bump_version
+from .importers import SlugAllocator, chunked
+from .models import (
+    User, Company, Category, Job, Application, SavedJob, HiddenJob, Connection, Message,
+    CourseCategory, Course, CourseModule, Lesson, Enrollment, UserProgress,
+)
+
+
+# Row counts at --scale 1. Everything is multiplied by the scale factor, so
+# scale 50 gives ~1M messages and ~500k applications.
+BASE_VOLUMES = {
+    'applicants': 1000,
+    'employers': 50,
+    'colleges': 10,
+    'jobs': 2000,
+    'applications': 10000,
+    'saved_jobs': 5000,
+    'hidden_jobs': 2000,
+    'connections': 5000,
+    'messages': 20000,
+    'courses': 100,
+    'modules_per_course': 4,
+    'lessons_per_module': 5,
+    'enrollments': 5000,
+    'progress': 20000,
+}
+
+JOB_CATEGORIES = [
+    ('Software Development', 'fa-code'),
+    ('Data Science', 'fa-database'),
+    ('Design', 'fa-paint-brush'),
+    ('Marketing', 'fa-bullhorn'),
+    ('Sales', 'fa-chart-line'),
+    ('Customer Support', 'fa-headset'),
+    ('Finance', 'fa-money-bill-wave'),
+    ('Human Resources', 'fa-users'),
+    ('Product Management', 'fa-tasks'),
+    ('Cyber Security', 'fa-shield-alt'),
+]
+
+COURSE_CATEGORIES = {
+    'Development': ['Python Full Stack', 'MERN Stack', 'Java Spring Boot', 'Data Science'],
+    'Marketing': ['Digital Marketing', 'SEO Mastery', 'Content Strategy'],
+    'Designing': ['UI/UX Design', 'Graphic Design', 'Web Design'],
+}
+
+FIRST_NAMES = ["Aarav", "Priya", "Liam", "Emma", "Noah", "Olivia", "Arjun", "Sara", "Lucas", "Mia", "Rohan", "Zara"]
+LAST_NAMES = ["Sharma", "Smith", "Nair", "Brown", "Garcia", "Khan", "Müller", "Rossi", "Chen", "Iyer", "Walker", "Das"]
+JOB_TITLES = ["Senior Developer", "Junior Analyst", "Manager", "Intern", "Director", "Specialist", "Consultant", "Engineer", "Architect", "Lead"]
+LOCATIONS = ["New York", "Remote", "London", "Berlin", "San Francisco", "Austin", "Toronto", "Sydney", "Bangalore", "Dubai"]
+COURSE_VARIATIONS = ["Masterclass", "Complete Bootcamp", "The Ultimate Guide", "Essentials Training", "Crash Course", "Zero to Hero"]
+MESSAGE_SNIPPETS = [
+    "Thanks for applying, are you free for a call this week?",
+    "Could you share your portfolio?",
+    "I have a question about the course schedule.",
+    "Happy to connect!",
+    "When does the next batch start?",
+    "We'd like to move you to the next round.",
+]
+JOB_STATUSES = ['active'] * 8 + ['pending', 'closed']
+APPLICATION_STATUSES = ['pending'] * 4 + ['reviewing', 'shortlisted', 'rejected', 'hired']
+CONNECTION_STATUSES = ['accepted'] * 3 + ['pending', 'rejected']
+
+
+@contextmanager
+def manual_timestamps(*fields):
+    """
+    Let bulk inserts keep the timestamps we generate instead of now().
+
+    auto_now/auto_now_add fields overwrite whatever is set on the instance,
+    which would give every generated row the same created_at.
+    """
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    try:
+        for field, _, _ in saved:
+            field.auto_now = field.auto_now_add = False
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def timestamp_field(model, name):
+    return model._meta.get_field(name)
+
+
+class DatasetGenerator:
+    def __init__(self, scale=1.0, seed=42, prefix='synth', batch_size=2000, days=365, stdout=None):
+        self.scale = scale
+        self.rng = random.Random(seed)
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.days = days
+        self.stdout = stdout
+        self.now = timezone.now()
+        self.counts = {}
+
+    def volume(self, name):
+        return max(1, int(BASE_VOLUMES[name] * self.scale))
+
+    def log(self, message):
+        if self.stdout:
+            self.stdout.write(message)
+
+    def random_time(self, after=None):
+        start = after or self.now - timedelta(days=self.days)
+        span = max(1, int((self.now - start).total_seconds()))
+        return start + timedelta(seconds=self.rng.randrange(span))
+
+    def insert(self, model, objects, ignore_conflicts=False):
+        """Bulk insert an iterable of unsaved instances in batches, returning the inserted list."""
+        started = time.monotonic()
+        inserted = []
+        for batch in chunked(objects, self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(batch, batch_size=self.batch_size, ignore_conflicts=ignore_conflicts)
+            inserted.extend(batch)
+        elapsed = time.monotonic() - started
+        self.counts[model._meta.model_name] = self.counts.get(model._meta.model_name, 0) + len(inserted)
+        self.log(f"  {model.__name__}: {len(inserted)} rows in {elapsed:.1f}s")
+        return inserted
+
+    def unique_pairs(self, count, left, right, allow_same=True):
+        # Capped at the number of possible pairs so we never loop forever
+        count = min(count, len(left) * len(right) - (0 if allow_same else min(len(left), len(right))))
+        pairs = set()
+        while len(pairs) < count:
+            pair = (self.rng.choice(left), self.rng.choice(right))
+            if allow_same or pair[0] != pair[1]:
+                pairs.add(pair)
+        return sorted(pairs, key=lambda pair: (pair[0].pk, pair[1].pk))
+
+    # --- Users & companies ---
+
+    def make_users(self, user_type, count, code):
+        password = make_password('password123')
+        for i in range(count):
+            first, last = self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+            yield User(
+                username=f"{self.prefix}_{user_type}_{i}",
+                email=f"{self.prefix}_{user_type}_{i}@example.com",
+                first_name=first,
+                last_name=last,
+                password=password,
+                user_type=user_type,
+                verification_status='pending' if self.rng.random() < 0.1 and user_type != User.IS_APPLICANT else 'approved',
+                is_verified=True,
+                job_role=self.rng.choice(JOB_TITLES) if user_type == User.IS_APPLICANT else None,
+                address=self.rng.choice(LOCATIONS),
+                bio=f"{first} {last} is a {self.rng.choice(JOB_TITLES).lower()} based in {self.rng.choice(LOCATIONS)}.",
+                public_id=f"{code}{self.prefix.upper()[:4]}{i:08d}",
+                date_joined=self.random_time(),
+            )
+
+    def generate_users(self):
+        self.applicants = self.insert(User, self.make_users(User.IS_APPLICANT, self.volume('applicants'), 'EMPY'))
+        self.employers = self.insert(User, self.make_users(User.IS_EMPLOYER, self.volume('employers'), 'EMPR'))
+        self.colleges = self.insert(User, self.make_users(User.IS_COLLEGE, self.volume('colleges'), 'COLL'))
+        self.admins = self.insert(User, self.make_users(User.IS_ADMIN, 1, 'ADMN'))
+
+        self.companies = self.insert(Company, (
+            Company(
+                user=employer,
+                name=f"{employer.last_name} {self.rng.choice(['Labs', 'Systems', 'Group', 'Technologies'])} {i}",
+                description="A synthetic company generated for load testing.",
+                website=f"https://{self.prefix}-company-{i}.example.com",
+                location=self.rng.choice(LOCATIONS),
+            )
+            for i, employer in enumerate(self.employers)
+        ))
+
+    # --- Jobs ---
+
+    def generate_categories(self):
+        self.categories = [Category.objects.get_or_create(name=name, defaults={'icon': icon})[0] for name, icon in JOB_CATEGORIES]
+        self.course_categories = []
+        for parent_name, children in COURSE_CATEGORIES.items():
+            parent, _ = CourseCategory.objects.get_or_create(slug=slugify(parent_name), defaults={'name': parent_name, 'icon': 'fa-layer-group'})
+            for name in children:
+                child, _ = CourseCategory.objects.get_or_create(slug=slugify(name), defaults={'name': name, 'parent': parent})
+                self.course_categories.append(child)
+
+    def generate_jobs(self):
+        slugs = SlugAllocator(Job, 'job')
+
+        def make_jobs():
+            for _ in range(self.volume('jobs')):
+                company = self.rng.choice(self.companies)
+                category = self.rng.choice(self.categories)
+                title = f"{self.rng.choice(JOB_TITLES)} - {category.name}"
+                status = self.rng.choice(JOB_STATUSES)
+                created_at = self.random_time()
+                yield Job(
+                    employer=company.user,
+                    company=company,
+                    title=title,
+                    slug=slugs.allocate(title),
+                    category=category,
+                    description=f"This is a great opportunity for a {title}. Join us to make a difference.",
+                    location=self.rng.choice(LOCATIONS),
+                    job_type=self.rng.choice(['full_time', 'part_time', 'contract', 'internship', 'remote']),
+                    salary_range=f"${self.rng.randint(50, 150)}k - ${self.rng.randint(160, 250)}k",
+                    status=status,
+                    is_active=status == 'active',
+                    created_at=created_at,
+                    updated_at=self.random_time(created_at),
+                )
+
+        with manual_timestamps(timestamp_field(Job, 'created_at'), timestamp_field(Job, 'updated_at')):
+            self.jobs = self.insert(Job, make_jobs())
+
+    def generate_applications(self):
+        pairs = self.unique_pairs(self.volume('applications'), self.jobs, self.applicants)
+        with manual_timestamps(timestamp_field(Application, 'applied_at')):
+            self.insert(Application, (
+                Application(
+                    job=job,
+                    applicant=applicant,
+                    resume=f"resumes/{applicant.username}.pdf",
+                    cover_letter=f"Applied with profile for {job.title}",
+                    status=self.rng.choice(APPLICATION_STATUSES),
+                    applied_at=self.random_time(job.created_at),
+                )
+                for job, applicant in pairs
+            ))
+
+        self.insert(SavedJob, (
+            SavedJob(user=user, job=job)
+            for user, job in self.unique_pairs(self.volume('saved_jobs'), self.applicants, self.jobs)
+        ))
+        self.insert(HiddenJob, (
+            HiddenJob(user=user, job=job)
+            for user, job in self.unique_pairs(self.volume('hidden_jobs'), self.applicants, self.jobs)
+        ))
+
+    # --- Network ---
+
+    def generate_connections(self):
+        pairs, seen = [], set()
+        for sender, recipient in self.unique_pairs(self.volume('connections'), self.applicants, self.applicants, allow_same=False):
+            # A pair may only be connected once, whichever side sent the request
+            if (recipient.pk, sender.pk) not in seen:
+                seen.add((sender.pk, recipient.pk))
+                pairs.append((sender, recipient))
+
+        with manual_timestamps(timestamp_field(Connection, 'created_at')):
+            self.insert(Connection, (
+                Connection(sender=sender, recipient=recipient, status=self.rng.choice(CONNECTION_STATUSES), created_at=self.random_time())
+                for sender, recipient in pairs
+            ))
+
+    def generate_messages(self):
+        everyone = self.applicants + self.employers + self.colleges
+
+        def make_messages():
+            for _ in range(self.volume('messages')):
+                sender = self.rng.choice(everyone)
+                recipient = self.rng.choice(everyone)
+                while recipient.pk == sender.pk:
+                    recipient = self.rng.choice(everyone)
+                roll = self.rng.random()
+                yield Message(
+                    sender=sender,
+                    recipient=recipient,
+                    content=self.rng.choice(MESSAGE_SNIPPETS),
+                    timestamp=self.random_time(),
+                    is_read=self.rng.random() < 0.7,
+                    job=self.rng.choice(self.jobs) if roll < 0.3 else None,
+                    course=self.rng.choice(self.courses) if 0.3 <= roll < 0.45 else None,
+                )
+
+        with manual_timestamps(timestamp_field(Message, 'timestamp')):
+            self.insert(Message, make_messages())
+
+    # --- Education ---
+
+    def generate_courses(self):
+        slugs = SlugAllocator(Course, 'course')
+
+        def make_courses():
+            for _ in range(self.volume('courses')):
+                category = self.rng.choice(self.course_categories)
+                title = f"{category.name} {self.rng.choice(COURSE_VARIATIONS)}"
+                created_at = self.random_time()
+                yield Course(
+                    title=title,
+                    slug=slugs.allocate(title),
+                    college=self.rng.choice(self.colleges),
+                    category=category,
+                    description=f"Become an expert in {category.name}.",
+                    duration=f"{self.rng.randint(2, 16)} Weeks",
+                    fees=self.rng.choice([0, 9.99, 29.99, 49.99, 149]),
+                    level=self.rng.choice(['beginner', 'intermediate', 'advanced']),
+                    status=self.rng.choice(['active'] * 8 + ['pending', 'rejected']),
+                    rating=round(self.rng.uniform(3.5, 5.0), 1),
+                    created_at=created_at,
+                    updated_at=self.random_time(created_at),
+                )
+
+        with manual_timestamps(timestamp_field(Course, 'created_at'), timestamp_field(Course, 'updated_at')):
+            self.courses = self.insert(Course, make_courses())
+
+        self.modules = self.insert(CourseModule, (
+            CourseModule(course=course, title=f"Module {order}: {course.title}", order=order)
+            for course in self.courses
+            for order in range(1, BASE_VOLUMES['modules_per_course'] + 1)
+        ))
+
+        lesson_slugs = SlugAllocator(Lesson, 'lesson')
+
+        def make_lessons():
+            for module in self.modules:
+                for order in range(1, BASE_VOLUMES['lessons_per_module'] + 1):
+                    title = f"Lesson {order}: {module.course.title}"
+                    yield Lesson(
+                        module=module,
+                        title=title,
+                        slug=lesson_slugs.allocate(title),
+                        description=f"This lesson covers the core concepts of {module.course.title}.",
+                        video_url='https://www.youtube.com/embed/dQw4w9WgXcQ',
+                        duration=f"{self.rng.randint(5, 45)} mins",
+                        order=order,
+                    )
+
+        self.lessons = self.insert(Lesson, make_lessons())
+
+    def generate_enrollments(self):
+        pairs = self.unique_pairs(self.volume('enrollments'), self.applicants, self.courses)
+        with manual_timestamps(timestamp_field(Enrollment, 'enrolled_at')):
+            self.insert(Enrollment, (
+                Enrollment(student=student, course=course, enrolled_at=self.random_time(course.created_at),
+                           status=self.rng.choice(['active'] * 6 + ['completed', 'completed', 'dropped', 'pending']))
+                for student, course in pairs
+            ))
+
+        # Keep the denormalised counter in line with what we just inserted
+        enrolled = {}
+        for _, course in pairs:
+            enrolled[course.pk] = enrolled.get(course.pk, 0) + 1
+        for course in self.courses:
+            course.students_enrolled = enrolled.get(course.pk, 0)
+        Course.objects.bulk_update(self.courses, ['students_enrolled'], batch_size=self.batch_size)
+
+        # Progress only for lessons of courses the student is enrolled in
+        lessons_by_course = {}
+        for lesson in self.lessons:
+            lessons_by_course.setdefault(lesson.module.course.pk, []).append(lesson)
+        progress = set()
+        target = min(self.volume('progress'), len(pairs) * BASE_VOLUMES['modules_per_course'] * BASE_VOLUMES['lessons_per_module'])
+        while len(progress) < target:
+            student, course = self.rng.choice(pairs)
+            progress.add((student, self.rng.choice(lessons_by_course[course.pk])))
+
+        with manual_timestamps(timestamp_field(UserProgress, 'last_accessed')):
+            self.insert(UserProgress, (
+                UserProgress(user=user, lesson=lesson, is_completed=self.rng.random() < 0.6, last_accessed=self.random_time())
+                for user, lesson in sorted(progress, key=lambda pair: (pair[0].pk, pair[1].pk))
+            ))
+
+    def run(self):
+        started = time.monotonic()
+        self.generate_categories()
+        self.generate_users()
+        self.generate_jobs()
+        self.generate_applications()
+        self.generate_connections()
+        self.generate_courses()
+        self.generate_messages()
+        self.generate_enrollments()
+        # Bulk inserts bypass the post_save invalidation
+        bump_version(JOBS, CATEGORIES)
+        self.elapsed = time.monotonic() - started
+        return self.counts
+
+
+def generate_dataset(scale=1.0, seed=42, prefix='synth', batch_size=2000, stdout=None):
+    """Generate a reproducible synthetic dataset. Returns row counts per model."""
+    return DatasetGenerator(scale=scale, seed=seed, prefix=prefix, batch_size=batch_size, stdout=stdout).run()
+
+
+def flush_dataset(prefix='synth'):
+    """Delete a previously generated dataset (everything hangs off the generated users)."""
+    return User.objects.filter(username__startswith=f"{prefix}_").delete()
@@ -0,0 +1,167 @@
+import random
+import sqlite3
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+
+
+def sqlite_pragmas():
+    return getattr(settings, 'SQLITE_PRAGMAS', {})
+
+
+def apply_sqlite_pragmas(cursor, pragmas):
+    for name, value in pragmas.items():
+        cursor.execute(f"PRAGMA {name} = {value}")
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """connection_created receiver: SQLITE_PRAGMAS on every new SQLite connection."""
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            apply_sqlite_pragmas(cursor, sqlite_pragmas())
+
+
+def is_locked_error(exc):
+    message = str(exc).lower()
+    return 'database is locked' in message or 'database table is locked' in message or 'busy' in message
+
+
+def retry_on_locked(func, attempts=None, base_delay=None, errors=(OperationalError, sqlite3.OperationalError)):
+    """
+    Call func(), retrying when SQLite reports the database locked. busy_timeout
+    already waits for the write lock; this covers what it can't, like a
+    transaction that read first and then lost the race to upgrade to a write.
+    """
+    attempts = attempts or getattr(settings, 'WRITE_RETRY_ATTEMPTS', 5)
+    base_delay = base_delay if base_delay is not None else getattr(settings, 'WRITE_RETRY_BASE_DELAY', 0.05)
+    for attempt in range(1, attempts + 1):
+        try:
+            return func()
+        except errors as exc:
+            if attempt == attempts or not is_locked_error(exc):
+                raise
+            # Exponential backoff with full jitter, so the writers that collided don't collide again
+            time.sleep(random.uniform(0, base_delay * 2 ** (attempt - 1)))
+
+
+def write_transaction(func=None, using=None):
+    """
+    Run the decorated function (usually a view doing a few writes) in
+    transaction.atomic, retried with backoff when the database is locked.
+    The whole transaction is retried, so keep side effects out of it.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if connections[using or DEFAULT_DB_ALIAS].in_atomic_block:
+                # The outer transaction holds the locks; retrying inside it can't help
+                return func(*args, **kwargs)
+
+            def attempt():
+                with transaction.atomic(using=using):
+                    return func(*args, **kwargs)
+            return retry_on_locked(attempt)
+        return wrapper
+    return decorator(func) if func else decorator
+
+
+class ConnectionMetrics:
+    """Process-wide connection lifecycle counters for one database alias."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.opens = 0
+        self.reuses = 0
+        self.health_check_failures = 0
+        self.connect_time = 0.0
+
+    def record_open(self, duration):
+        with self.lock:
+            self.opens += 1
+            self.connect_time += duration
+
+    def record_reuse(self):
+        with self.lock:
+            self.reuses += 1
+
+    def record_health_check_failure(self):
+        with self.lock:
+            self.health_check_failures += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'opens': self.opens,
+                'reuses': self.reuses,
+                'health_check_failures': self.health_check_failures,
+                'connect_ms': round(self.connect_time * 1000, 2),
+                'avg_connect_ms': round(self.connect_time * 1000 / self.opens, 2) if self.opens else 0.0,
+            }
+
+
+_connection_metrics = {}
+_connection_metrics_lock = threading.Lock()
+
+
+def connection_metrics(alias):
+    with _connection_metrics_lock:
+        return _connection_metrics.setdefault(alias, ConnectionMetrics())
+
+
+def get_connection_stats():
+    with _connection_metrics_lock:
+        metrics = dict(_connection_metrics)
+    return {alias: m.snapshot() for alias, m in sorted(metrics.items())}
+
+
+class InstrumentedConnectionMixin:
+    """
+    Mixed into the DatabaseWrappers in jobs.backends. Counts connections
+    opened (and the time spent opening them), requests that reused a
+    persistent connection (CONN_MAX_AGE), and connections dropped by
+    CONN_HEALTH_CHECKS, process wide and for the current request.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = connection_metrics(self.alias)
+        self.request_pending = False
+        self.request_stats = {'opened': 0, 'reused': 0, 'connect_ms': 0.0}
+
+    def start_request(self):
+        self.request_pending = True
+        self.request_stats = {'opened': 0, 'reused': 0, 'connect_ms': 0.0}
+
+    def connect(self):
+        started = time.perf_counter()
+        super().connect()
+        duration = time.perf_counter() - started
+        self.metrics.record_open(duration)
+        self.request_stats['opened'] += 1
+        self.request_stats['connect_ms'] += duration * 1000
+
+    def ensure_connection(self):
+        # First use of the connection in this request: it's either still open
+        # from an earlier request, or connect() is about to open a new one
+        if self.request_pending:
+            self.request_pending = False
+            if self.connection is not None:
+                self.metrics.record_reuse()
+                self.request_stats['reused'] += 1
+        super().ensure_connection()
+
+    def close_if_health_check_failed(self):
+        was_open = self.connection is not None
+        super().close_if_health_check_failed()
+        if was_open and self.connection is None:
+            self.metrics.record_health_check_failure()
+
+
+def start_request_metrics(sender, **kwargs):
+    """request_started receiver."""
+    for conn in connections.all(initialized_only=True):
+        if isinstance(conn, InstrumentedConnectionMixin):
+            conn.start_request()
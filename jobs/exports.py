@@ -0,0 +1,147 @@
+import csv
+import io
+import json
+import os
+import zipfile
+from datetime import date, datetime
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.text import slugify
+
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson',
+}
+
+# Yield to the server in pieces of about this size rather than once per row
+BUFFER_SIZE = 64 * 1024
+
+
+class Echo:
+    """File-like object for csv.writer that hands each line back instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def csv_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (list, tuple)):
+        value = ', '.join(str(v) for v in value)
+    if isinstance(value, str) and value[:1] in ('=', '+', '-', '@'):
+        # Don't let spreadsheet apps evaluate user-entered text as a formula
+        return "'" + value
+    return value
+
+
+def csv_lines(rows, columns):
+    writer = csv.writer(Echo())
+    yield writer.writerow([header for header, _ in columns])
+    for row in rows:
+        yield writer.writerow([csv_value(row[key]) for _, key in columns])
+
+
+def jsonl_lines(rows, columns):
+    for row in rows:
+        yield json.dumps({header: row[key] for header, key in columns}, cls=DjangoJSONEncoder) + '\n'
+
+
+def buffered(lines, size=BUFFER_SIZE):
+    chunk, length = [], 0
+    for line in lines:
+        chunk.append(line)
+        length += len(line)
+        if length >= size:
+            yield ''.join(chunk)
+            chunk, length = [], 0
+    if chunk:
+        yield ''.join(chunk)
+
+
+def export_response(queryset, columns, fmt, name):
+    """
+    Stream `queryset` as CSV or JSON Lines. `columns` are (header, lookup)
+    pairs; rows come from .values() in .iterator() chunks, so memory stays
+    flat however many rows there are and no model instances are built.
+    """
+    rows = queryset.values(*[key for _, key in columns]).iterator(chunk_size=getattr(settings, 'EXPORT_CHUNK_SIZE', 2000))
+    lines = csv_lines(rows, columns) if fmt == 'csv' else jsonl_lines(rows, columns)
+    response = StreamingHttpResponse(buffered(lines), content_type=EXPORT_FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{name}-{timezone.localdate():%Y%m%d}.{fmt}"'
+    return response
+
+
+class StreamSink:
+    """
+    Write-only, unseekable file for zipfile. Written bytes wait here until
+    the streaming generator drains them, so only the current piece is held.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def stream_zip(entries, block_size=BUFFER_SIZE):
+    """
+    Yield a ZIP archive piece by piece. `entries` yields (name, content)
+    where content is bytes or an open binary file, read in blocks and closed
+    here. Sizes and CRCs go in data descriptors after each entry, which is
+    what lets zipfile write without seeking.
+    """
+    sink = StreamSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in entries:
+            if isinstance(content, bytes):
+                archive.writestr(name, content)
+            else:
+                with content, archive.open(name, 'w') as target:
+                    for block in iter(lambda: content.read(block_size), b''):
+                        target.write(block)
+                        if sink.chunks:
+                            yield sink.drain()
+            yield sink.drain()
+    yield sink.drain()
+
+
+def resume_archive_entries(applications, storage):
+    """
+    Entries for stream_zip: each application's resume, then manifest.csv
+    listing applicants, their status and which file is theirs. Resumes that
+    can't be opened are left out and marked missing in the manifest.
+    """
+    manifest = io.StringIO()
+    writer = csv.writer(manifest)
+    writer.writerow(['file', 'applicant', 'username', 'email', 'status', 'applied_at'])
+    for number, app in enumerate(applications, start=1):
+        name = f"{app['applicant__first_name']} {app['applicant__last_name']}".strip() or app['applicant__username']
+        filename = f"{number:03d}_{slugify(name) or 'applicant'}{os.path.splitext(app['resume'])[1].lower()}"
+        try:
+            content = storage.open(app['resume'], 'rb')
+        except (OSError, ValueError):
+            filename = 'missing'
+        else:
+            yield f"resumes/{filename}", content
+        writer.writerow([csv_value(v) for v in (filename, name, app['applicant__username'], app['applicant__email'], app['status'], app['applied_at'])])
+    yield 'manifest.csv', manifest.getvalue().encode('utf-8')
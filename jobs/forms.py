@@ -1,5 +1,5 @@
 from django import forms
-from .models import User, Application, Job, Company, Company
+from .models import User, Application, Job, Company, Company, UploadSession
 
 # ... (imports)
 
@@ -149,6 +149,8 @@ class ApplicationForm(forms.ModelForm):
         widget=forms.RadioSelect,
         initial='upload'
     )
+    # Id of a committed resumable upload (jobs/uploads.py), instead of a file in this POST
+    upload = forms.UUIDField(required=False, widget=forms.HiddenInput)
     
     class Meta:
         model = Application
@@ -159,6 +161,7 @@ class ApplicationForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         self.user = kwargs.pop('user', None)
+        self.upload_session = None
         super().__init__(*args, **kwargs)
         self.fields['resume'].required = False
 
@@ -167,6 +170,15 @@ class ApplicationForm(forms.ModelForm):
         app_type = cleaned_data.get('application_type')
         resume = cleaned_data.get('resume')
 
+        if app_type == 'upload' and not resume and cleaned_data.get('upload') and self.user:
+            session = UploadSession.objects.filter(
+                pk=cleaned_data['upload'], user=self.user, purpose='resume', status='committed'
+            ).first()
+            if session is not None:
+                resume = cleaned_data['resume'] = session.file
+                # The view deletes it once the Application holds the file
+                self.upload_session = session
+
         if app_type == 'upload' and not resume:
             self.add_error('resume', 'Please upload your resume.')
         
@@ -0,0 +1,128 @@
+import hashlib
+import io
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, features
+
+from .models import ImageDerivative
+
+
+CACHE_PREFIX = 'imgderiv:'
+# Looked up on every render, so found records are cached for a day. Misses
+# are cached briefly: the worker that builds them may not share our cache.
+FOUND_TIMEOUT = 86400
+MISSING_TIMEOUT = 300
+MISSING = 'missing'
+
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp'}
+
+
+def derivative_widths(label):
+    return getattr(settings, 'IMAGE_DERIVATIVE_WIDTHS', {}).get(label, [])
+
+
+def image_fields(model):
+    """(field name, settings label) of the fields of `model` that get derivatives."""
+    prefix = model._meta.label + '.'
+    return [(label[len(prefix):], label) for label in getattr(settings, 'IMAGE_DERIVATIVE_WIDTHS', {}) if label.startswith(prefix)]
+
+
+def supported_formats():
+    # AVIF needs a Pillow built with libavif
+    return [fmt for fmt in getattr(settings, 'IMAGE_DERIVATIVE_FORMATS', ['webp']) if features.check(fmt)]
+
+
+def derivative_name(digest, width, fmt):
+    # Content addressed: the same picture uploaded twice maps to the same files
+    return f"{getattr(settings, 'IMAGE_DERIVATIVE_DIR', 'derivatives')}/{digest[:2]}/{digest}-{width}.{fmt}"
+
+
+def _cache_key(name):
+    return CACHE_PREFIX + hashlib.md5(name.encode()).hexdigest()
+
+
+def _prepare(img):
+    img = ImageOps.exif_transpose(img)
+    has_alpha = img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info)
+    mode = 'RGBA' if has_alpha else 'RGB'
+    return img if img.mode == mode else img.convert(mode)
+
+
+def build_derivatives(name, widths, storage=default_storage):
+    """
+    Write resized copies of the stored image `name` at each of `widths` (only
+    those not wider than the original; the original width if none are) in
+    every supported format. Files that already exist are not re-encoded.
+    Returns the ImageDerivative.
+    """
+    with storage.open(name, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    quality = getattr(settings, 'IMAGE_DERIVATIVE_QUALITY', {})
+
+    with Image.open(io.BytesIO(data)) as original:
+        img = _prepare(original)
+        width, height = img.size
+        targets = sorted({w for w in widths if w <= width}) or [width]
+        variants = {}
+        for fmt in supported_formats():
+            for target in targets:
+                path = derivative_name(digest, target, fmt)
+                if not storage.exists(path):
+                    resized = img if target == width else img.resize((target, max(1, round(height * target / width))), Image.LANCZOS)
+                    buffer = io.BytesIO()
+                    resized.save(buffer, fmt.upper(), quality=quality.get(fmt, 75))
+                    storage.save(path, ContentFile(buffer.getvalue()))
+            variants[fmt] = targets
+
+    record, _ = ImageDerivative.objects.update_or_create(
+        source=name,
+        defaults={'digest': digest, 'width': width, 'height': height, 'variants': variants},
+    )
+    cache.delete(_cache_key(name))
+    return record
+
+
+def _as_record(row):
+    return {'digest': row['digest'], 'width': row['width'], 'height': row['height'], 'variants': row['variants']}
+
+
+def prefetch_derivatives(names):
+    """
+    Load the derivative records for several images with one cache round trip
+    and at most one query, so a list page doesn't look them up one by one.
+    """
+    names = {name for name in names if name}
+    if not names:
+        return
+    keys = {_cache_key(name): name for name in names}
+    cached = cache.get_many(list(keys))
+    missing = {name for key, name in keys.items() if key not in cached}
+    if not missing:
+        return
+    rows = ImageDerivative.objects.filter(source__in=missing).values('source', 'digest', 'width', 'height', 'variants')
+    found = {row['source']: _as_record(row) for row in rows}
+    cache.set_many({_cache_key(name): found[name] for name in found}, FOUND_TIMEOUT)
+    cache.set_many({_cache_key(name): MISSING for name in missing - set(found)}, MISSING_TIMEOUT)
+
+
+def get_derivatives(name):
+    """The cached derivative record for a stored image, or None while it hasn't been built."""
+    if not name:
+        return None
+    key = _cache_key(name)
+    record = cache.get(key)
+    if record is None:
+        prefetch_derivatives([name])
+        record = cache.get(key)
+    return None if record in (None, MISSING) else record
+
+
+def srcset(name, fmt, storage=default_storage):
+    record = get_derivatives(name)
+    if record is None or fmt not in record['variants']:
+        return ''
+    return ', '.join(f"{storage.url(derivative_name(record['digest'], width, fmt))} {width}w" for width in record['variants'][fmt])
@@ -0,0 +1,217 @@
+import csv
+import json
+import os
+import time
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .cache import JOBS, bump_version
+from .models import Job, Company, Category
+
+
+# Columns a feed row may carry. Anything else is ignored.
+JOB_FEED_FIELDS = ('slug', 'title', 'company', 'category', 'description', 'location', 'job_type', 'salary_range', 'status')
+
+# Fields refreshed on jobs that already exist (matched by slug).
+JOB_UPDATE_FIELDS = ['title', 'category', 'description', 'location', 'job_type', 'salary_range', 'status', 'is_active', 'updated_at']
+
+VALID_JOB_TYPES = {key for key, _ in Job.JOB_TYPES}
+VALID_STATUSES = {key for key, _ in Job.STATUS_CHOICES}
+
+
+class ImportStats:
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.skipped = 0
+        self.errors = []
+        self.started = time.monotonic()
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self):
+        if not self.elapsed:
+            return 0.0
+        return self.rows / self.elapsed
+
+    def __str__(self):
+        return (f"{self.rows} rows ({self.created} created, {self.updated} updated, {self.skipped} skipped) "
+                f"in {self.elapsed:.2f}s - {self.rows_per_second:.0f} rows/sec")
+
+
+class SlugAllocator:
+    """
+    Hands out unique slugs without a query per row.
+
+    Mirrors Job.save(): "title", then "title-1", "title-2"... but the taken
+    slugs are loaded once and counters are remembered per base slug.
+    """
+
+    def __init__(self, model, fallback):
+        self.fallback = fallback
+        self.taken = set(model.objects.exclude(slug__isnull=True).values_list('slug', flat=True).iterator(chunk_size=5000))
+        self.counters = {}
+
+    def allocate(self, title):
+        base_slug = slugify(title)[:240] or self.fallback
+        slug = base_slug
+        counter = self.counters.get(base_slug, 1)
+        if slug in self.taken:
+            slug = f"{base_slug}-{counter}"
+            while slug in self.taken:
+                counter += 1
+                slug = f"{base_slug}-{counter}"
+            self.counters[base_slug] = counter + 1
+        self.taken.add(slug)
+        return slug
+
+
+def read_feed(stream, fmt):
+    """Yield feed rows as dicts, one at a time, from a CSV or JSON Lines stream."""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+    elif fmt in ('jsonl', 'ndjson'):
+        for line in stream:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+    elif fmt == 'json':
+        # A plain JSON array has to be parsed whole; prefer jsonl for big feeds.
+        yield from json.load(stream)
+    else:
+        raise ValueError(f"Unsupported feed format: {fmt}")
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class JobImporter:
+    def __init__(self, batch_size=1000, default_status='pending', create_categories=True):
+        self.batch_size = batch_size
+        self.default_status = default_status
+        self.create_categories = create_categories
+        self.stats = ImportStats()
+
+        # In-memory lookup maps, so rows never resolve relations one query at a time
+        self.companies = {c.name.strip().lower(): c for c in Company.objects.select_related('user')}
+        self.categories = {c.name.strip().lower(): c for c in Category.objects.all()}
+        self.slugs = SlugAllocator(Job, 'job')
+
+    def get_category(self, name):
+        name = (name or '').strip()
+        if not name:
+            return None
+        key = name.lower()
+        if key not in self.categories and self.create_categories:
+            self.categories[key] = Category.objects.create(name=name)
+        return self.categories.get(key)
+
+    def build_job(self, row, line):
+        row = {field: str(row.get(field) or '').strip() for field in JOB_FEED_FIELDS}
+        if not row['title']:
+            self.stats.errors.append(f"Row {line}: missing title")
+            return None
+        company = self.companies.get(row['company'].lower())
+        if company is None:
+            self.stats.errors.append(f"Row {line}: unknown company '{row['company']}'")
+            return None
+
+        job_type = row['job_type'] or 'full_time'
+        if job_type not in VALID_JOB_TYPES:
+            self.stats.errors.append(f"Row {line}: invalid job_type '{job_type}'")
+            return None
+        status = row['status'] or self.default_status
+        if status not in VALID_STATUSES:
+            self.stats.errors.append(f"Row {line}: invalid status '{status}'")
+            return None
+
+        return Job(
+            slug=slugify(row['slug'])[:255] or None,
+            employer=company.user,
+            company=company,
+            title=row['title'],
+            category=self.get_category(row['category']),
+            description=row['description'],
+            location=row['location'],
+            job_type=job_type,
+            salary_range=row['salary_range'] or None,
+            status=status,
+            is_active=status == 'active',
+        )
+
+    def import_chunk(self, rows, first_line):
+        jobs = []
+        for offset, row in enumerate(rows):
+            job = self.build_job(row, first_line + offset)
+            if job is None:
+                self.stats.skipped += 1
+            else:
+                jobs.append(job)
+
+        # Rows carrying the slug of an existing job update it in place
+        given = [job.slug for job in jobs if job.slug]
+        existing = dict(Job.objects.filter(slug__in=given).values_list('slug', 'id')) if given else {}
+
+        to_create, to_update = [], []
+        now = timezone.now()
+        for job in jobs:
+            if job.slug in existing:
+                job.pk = existing[job.slug]
+                job.updated_at = now
+                to_update.append(job)
+            else:
+                if job.slug and job.slug not in self.slugs.taken:
+                    self.slugs.taken.add(job.slug)
+                else:
+                    job.slug = self.slugs.allocate(job.title)
+                to_create.append(job)
+
+        with transaction.atomic():
+            if to_create:
+                Job.objects.bulk_create(to_create, batch_size=self.batch_size)
+            if to_update:
+                Job.objects.bulk_update(to_update, JOB_UPDATE_FIELDS, batch_size=self.batch_size)
+
+        self.stats.created += len(to_create)
+        self.stats.updated += len(to_update)
+
+    def run(self, rows, progress=None):
+        line = 1
+        for chunk in chunked(rows, self.batch_size):
+            self.import_chunk(chunk, line)
+            line += len(chunk)
+            self.stats.rows += len(chunk)
+            self.stats.elapsed = time.monotonic() - self.stats.started
+            if progress:
+                progress(self.stats)
+        # bulk_create/bulk_update don't send post_save, so invalidate cached pages here
+        bump_version(JOBS)
+        self.stats.elapsed = time.monotonic() - self.stats.started
+        return self.stats
+
+
+def import_jobs(source, fmt=None, batch_size=1000, default_status='pending', create_categories=True, progress=None):
+    """
+    Import a CSV/JSON job feed with bulk inserts.
+
+    `source` is a path or an open text stream. Job.save() is bypassed, so
+    slugs are pre-allocated here. Returns an ImportStats.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        fmt = fmt or os.path.splitext(str(source))[1].lstrip('.').lower()
+        with open(source, newline='', encoding='utf-8') as stream:
+            return import_jobs(stream, fmt, batch_size, default_status, create_categories, progress)
+
+    importer = JobImporter(batch_size=batch_size, default_status=default_status, create_categories=create_categories)
+    return importer.run(read_feed(source, fmt or 'csv'), progress=progress)
@@ -0,0 +1,121 @@
+import bisect
+import hashlib
+import zlib
+from array import array
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .cache import JOBS, get_versions
+from .models import SavedJob, HiddenJob
+
+
+# A user's saved and hidden jobs, cached as sorted arrays of job ids (8 bytes
+# per job, however many thousands there are). The job list checks them in
+# Python instead of joining against these tables on every page.
+MARK_MODELS = {'saved': SavedJob, 'hidden': HiddenJob}
+
+
+def marks_key(kind, user_id):
+    return f"jobmarks:{kind}:{user_id}"
+
+
+def get_job_marks(user_id, kinds=('saved', 'hidden')):
+    """{kind: sorted array of job ids} in one cache round trip; misses are loaded and cached."""
+    keys = {kind: marks_key(kind, user_id) for kind in kinds}
+    found = cache.get_many(keys.values())
+    marks, missing = {}, {}
+    for kind, key in keys.items():
+        ids = array('q')
+        if key in found:
+            ids.frombytes(found[key])
+        else:
+            ids.extend(MARK_MODELS[kind].objects.filter(user_id=user_id).order_by('job_id').values_list('job_id', flat=True))
+            missing[key] = ids.tobytes()
+        marks[kind] = ids
+    if missing:
+        cache.set_many(missing, getattr(settings, 'JOB_MARKS_TIMEOUT', 86400))
+    return marks
+
+
+def forget_job_marks(user_id, *kinds):
+    # Again after commit, in case a concurrent page load cached the old rows meanwhile
+    keys = [marks_key(kind, user_id) for kind in kinds]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def contains(ids, job_id):
+    i = bisect.bisect_left(ids, job_id)
+    return i < len(ids) and ids[i] == job_id
+
+
+def listing_key(queryset):
+    sql = hashlib.md5(str(queryset.query).encode()).hexdigest()
+    return f"{get_versions(JOBS)[JOBS]}:{sql}"
+
+
+def listing_ids(queryset):
+    """
+    Ids of every job in `queryset`, in order, cached until a job changes and
+    shared by everyone running the same search. None for listings longer
+    than JOB_LISTING_MAX_IDS, which would make too big a cache entry.
+    """
+    limit = getattr(settings, 'JOB_LISTING_MAX_IDS', 20000)
+    key = f"jobids:{listing_key(queryset)}"
+    data = cache.get(key)
+    if data is None:
+        ids = array('q', queryset.values_list('id', flat=True)[:limit + 1])
+        # Remember "too long" too, so it isn't found out again on every request
+        data = ids.tobytes() if len(ids) <= limit else False
+        cache.set(key, data, getattr(settings, 'JOB_MARKS_TIMEOUT', 86400))
+    if data is False:
+        return None
+    ids = array('q')
+    ids.frombytes(data)
+    return ids
+
+
+def visible_job_ids(user_id, queryset, hidden):
+    """
+    listing_ids() minus the user's `hidden` jobs, cached for the user so
+    paging through a search filters the list once. Keyed on the hidden ids
+    themselves, so hiding another job starts a new entry.
+    """
+    key = f"jobvisible:{user_id}:{zlib.crc32(hidden)}:{listing_key(queryset)}"
+    data = cache.get(key)
+    if data is None:
+        ids = listing_ids(queryset)
+        if ids is None:
+            return None
+        hidden = set(hidden)
+        data = array('q', [pk for pk in ids if pk not in hidden]).tobytes()
+        cache.set(key, data, getattr(settings, 'JOB_MARKS_TIMEOUT', 86400))
+    ids = array('q')
+    ids.frombytes(data)
+    return ids
+
+
+class VisibleJobs:
+    """
+    A list of job ids for the paginator: len() is the count, and only the
+    page's jobs are fetched from `queryset`.
+    """
+
+    def __init__(self, queryset, ids):
+        self.queryset = queryset
+        self.ids = ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    def count(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        ids = self.ids[index]
+        if not isinstance(index, slice):
+            return self.queryset.get(pk=ids)
+        jobs = self.queryset.in_bulk(list(ids))
+        return [jobs[pk] for pk in ids if pk in jobs]
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from jobs.benchmarks import run_benchmarks, load_budgets, record_budgets, check_budgets, format_results
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the hot views (latency, query count, allocations) against the current database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20, help='Timed requests per view')
+        parser.add_argument('--view', action='append', dest='views', help='Only run this benchmark (repeatable)')
+        parser.add_argument('--record', action='store_true', help='Write the results as the new budgets')
+
+    def handle(self, *args, **options):
+        results = run_benchmarks(iterations=options['iterations'], only=options['views'])
+        if not results:
+            raise CommandError('Nothing to benchmark. Run generate_dataset first.')
+        self.stdout.write(format_results(results))
+
+        if options['record']:
+            record_budgets(results)
+            self.stdout.write(self.style.SUCCESS(f'Recorded budgets for {len(results)} views'))
+            return
+
+        failures = check_budgets(results, load_budgets())
+        if failures:
+            raise CommandError('Views over budget:\n' + '\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('All views within budget'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from jobs.benchmarks import compare_sqlite_write_profiles
+
+
+class Command(BaseCommand):
+    help = 'Compares concurrent SQLite write throughput with default settings and with SQLITE_PRAGMAS plus retries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent writers')
+        parser.add_argument('--writes', type=int, default=200, help='Write transactions per writer')
+
+    def handle(self, *args, **options):
+        results = compare_sqlite_write_profiles(threads=options['threads'], writes=options['writes'])
+        self.stdout.write(f"{'profile':<12}{'writes':>8}{'failed':>8}{'seconds':>9}{'writes/s':>10}")
+        for name, result in results.items():
+            self.stdout.write(f"{name:<12}{result['writes']:>8}{result['failed']:>8}{result['seconds']:>9}{result['writes_per_sec']:>10}")
@@ -0,0 +1,40 @@
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from jobs.images import build_derivatives, derivative_widths
+from jobs.models import ImageDerivative
+from jobs.tasks import build_image_derivatives
+
+
+class Command(BaseCommand):
+    help = 'Queues (or with --now, builds) resized derivatives for images uploaded before the pipeline existed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--now', action='store_true', help='Build in this process instead of queueing tasks')
+        parser.add_argument('--rebuild', action='store_true', help='Include images that already have derivatives')
+
+    def handle(self, *args, **options):
+        done = set() if options['rebuild'] else set(ImageDerivative.objects.values_list('source', flat=True).iterator())
+        total = 0
+        for label in settings.IMAGE_DERIVATIVE_WIDTHS:
+            app_label, model_name, field_name = label.split('.')
+            model = apps.get_model(app_label, model_name)
+            names = (
+                model.objects.exclude(**{f"{field_name}__isnull": True}).exclude(**{field_name: ''})
+                .values_list(field_name, flat=True).distinct().iterator()
+            )
+            for name in names:
+                if name in done:
+                    continue
+                done.add(name)
+                total += 1
+                if options['now']:
+                    try:
+                        build_derivatives(name, derivative_widths(label))
+                    except (OSError, ValueError) as exc:
+                        self.stderr.write(f"{name}: {exc}")
+                else:
+                    build_image_derivatives.delay(name, label)
+        verb = 'Built' if options['now'] else 'Queued'
+        self.stdout.write(self.style.SUCCESS(f"{verb} derivatives for {total} images"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from jobs.uploads import clear_stale_uploads
+
+
+class Command(BaseCommand):
+    help = 'Deletes abandoned resumable uploads: uncommitted ones with their partial files, and committed resumes never applied with'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-age', type=int, help='Seconds since the last chunk (default UPLOAD_SESSION_TTL)')
+
+    def handle(self, *args, **options):
+        count = clear_stale_uploads(options['max_age'])
+        self.stdout.write(self.style.SUCCESS(f"Removed {count} stale uploads"))
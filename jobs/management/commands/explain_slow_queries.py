@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+from jobs.models import Job, Application, Message, Connection, Enrollment
+from jobs.slowlog import read_slow_queries, group_slow_queries, explain, full_scans, suggest_index
+
+
+# Tables big enough that a full scan on them matters
+WATCHED_MODELS = [Job, Application, Message, Connection, Enrollment]
+
+
+class Command(BaseCommand):
+    help = 'Replays the slow query log with EXPLAIN and reports full scans on the large tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', help='Slow query log to read (defaults to SLOW_QUERY_LOG_FILE)')
+        parser.add_argument('--limit', type=int, default=20, help='Number of query shapes to explain')
+        parser.add_argument('--show-plans', action='store_true', help='Print the full plan of every query')
+
+    def handle(self, *args, **options):
+        groups = group_slow_queries(read_slow_queries(options['log']))
+        if not groups:
+            raise CommandError('The slow query log is empty. Set SLOW_QUERY_THRESHOLD_MS and exercise the site first.')
+
+        watched = {model._meta.db_table: model for model in WATCHED_MODELS}
+        suggestions = {}
+
+        for group in groups[:options['limit']]:
+            sample = group['sample']
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{sample['duration_ms']}ms x{group['count']} - {', '.join(sorted(v for v in group['views'] if v))}"
+            ))
+            self.stdout.write(f"  {sample['sql'][:300]}")
+            for site in sorted(group['call_sites']):
+                self.stdout.write(f"  from {site}")
+
+            try:
+                plan = explain(sample['sql'], sample['params'], sample['alias'])
+            except (DatabaseError, NotImplementedError) as e:
+                self.stderr.write(f"  could not explain: {e}")
+                continue
+
+            if options['show_plans']:
+                for line in plan:
+                    self.stdout.write(f"    {line}")
+
+            for table in full_scans(plan, sample['vendor'], watched):
+                model = watched[table]
+                self.stdout.write(self.style.WARNING(f"  full scan on {table}"))
+                index = suggest_index(sample['sql'], model)
+                if index:
+                    suggestions.setdefault(model.__name__, set()).add(index)
+
+        if suggestions:
+            self.stdout.write(self.style.MIGRATE_HEADING('\nSuggested indexes:'))
+            for model_name, indexes in sorted(suggestions.items()):
+                for index in sorted(indexes):
+                    self.stdout.write(f"  {model_name}: {index}")
+        else:
+            self.stdout.write(self.style.SUCCESS('\nNo full scans on watched tables'))
@@ -0,0 +1,79 @@
+import os
+import time
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from jobs.models import Blob
+from jobs.storage import blob_fields, blob_prefix, blob_storage, is_blob_name, recount_references
+
+
+class Command(BaseCommand):
+    help = 'Deletes content-addressed blobs that no resume or CV references any more'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recount', action='store_true', help='Recompute reference counts from the database first')
+        parser.add_argument('--adopt', action='store_true', help='Move files saved before blob storage into it, sharing duplicates')
+        parser.add_argument('--grace', type=int, default=getattr(settings, 'BLOB_GC_GRACE', 3600),
+                            help='Leave blobs saved or released in the last this many seconds (a save may still be referencing them)')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        storage = blob_storage()
+        if options['adopt'] and not options['dry_run']:
+            self.adopt(storage)
+        if (options['recount'] or options['adopt']) and not options['dry_run']:
+            self.stdout.write(f"Corrected {recount_references()} reference counts")
+
+        # The grace period runs from the last save or release, not creation:
+        # an old orphan can be uploaded again and picked up any time
+        cutoff = timezone.now() - timedelta(seconds=options['grace'])
+        orphans = Blob.objects.filter(refcount__lte=0, used_at__lt=cutoff)
+        freed = removed = 0
+        for blob in orphans.iterator():
+            if not options['dry_run']:
+                # Claim the row first; a save that reused the blob since the query keeps it
+                claimed, _ = orphans.filter(pk=blob.pk).delete()
+                if not claimed:
+                    continue
+                storage.delete_blob(blob.name)
+            removed += 1
+            freed += blob.size
+
+        # Files a crashed save left behind without a Blob row (or a temp file)
+        known = set(Blob.objects.values_list('name', flat=True).iterator())
+        root = storage.path(blob_prefix())
+        for directory, _, files in os.walk(root):
+            for filename in files:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, storage.location).replace(os.sep, '/')
+                if name not in known and os.path.getmtime(path) < time.time() - options['grace']:
+                    removed += 1
+                    freed += os.path.getsize(path)
+                    if not options['dry_run']:
+                        os.unlink(path)
+
+        verb = 'Would remove' if options['dry_run'] else 'Removed'
+        self.stdout.write(self.style.SUCCESS(f"{verb} {removed} blobs ({freed / 1024 / 1024:.1f} MB)"))
+
+    def adopt(self, storage):
+        legacy = set()
+        for model in apps.get_models():
+            for field in blob_fields(model):
+                rows = model._default_manager.exclude(**{f"{field}__startswith": blob_prefix() + '/'}).exclude(**{field: ''}).exclude(**{f"{field}__isnull": True})
+                for pk, name in rows.values_list('pk', field).iterator():
+                    if not storage.exists(name):
+                        self.stderr.write(f"{model.__name__} {pk}: {name} is missing")
+                        continue
+                    with storage.open(name, 'rb') as f:
+                        blob = storage.save(name, f)
+                    # update(), not save(): counts are recomputed in one pass afterwards
+                    model._default_manager.filter(pk=pk).update(**{field: blob})
+                    legacy.add(name)
+        for name in legacy:
+            if not is_blob_name(name):
+                storage.delete(name)
+        self.stdout.write(f"Adopted {len(legacy)} files")
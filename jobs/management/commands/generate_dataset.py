@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from jobs.datagen import generate_dataset, flush_dataset
+
+
+class Command(BaseCommand):
+    help = 'Generates a reproducible synthetic dataset for load testing, sized by --scale'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0, help='Volume multiplier (1 = ~1k users, 20k messages; 50 = ~1M messages)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed, the same seed gives the same dataset')
+        parser.add_argument('--prefix', default='synth', help='Username prefix marking generated users')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per bulk insert')
+        parser.add_argument('--flush', action='store_true', help='Delete a previously generated dataset with the same prefix first')
+
+    def handle(self, *args, **options):
+        if options['scale'] <= 0:
+            raise CommandError('--scale must be positive')
+        prefix = options['prefix']
+
+        if options['flush']:
+            deleted, _ = flush_dataset(prefix)
+            self.stdout.write(f'Deleted {deleted} previously generated rows')
+
+        from jobs.models import User
+        if User.objects.filter(username__startswith=f'{prefix}_').exists():
+            raise CommandError(f"A dataset with prefix '{prefix}' already exists. Use --flush or another --prefix.")
+
+        self.stdout.write(f"Generating dataset (scale={options['scale']}, seed={options['seed']})...")
+        counts = generate_dataset(
+            scale=options['scale'],
+            seed=options['seed'],
+            prefix=prefix,
+            batch_size=options['batch_size'],
+            stdout=self.stdout,
+        )
+        self.stdout.write(self.style.SUCCESS(f'Successfully generated {sum(counts.values())} rows'))
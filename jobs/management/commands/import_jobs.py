@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from jobs.importers import import_jobs
+
+
+class Command(BaseCommand):
+    help = 'Bulk imports jobs from a CSV or JSON Lines feed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to the feed file')
+        parser.add_argument('--format', choices=['csv', 'jsonl', 'json'], help='Feed format (defaults to the file extension)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk insert')
+        parser.add_argument('--status', default='pending', help='Status for rows without one')
+        parser.add_argument('--no-create-categories', action='store_true', help='Leave unknown categories empty instead of creating them')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+
+        def progress(stats):
+            self.stdout.write(f'  {stats.rows} rows, {stats.rows_per_second:.0f} rows/sec')
+
+        try:
+            stats = import_jobs(
+                options['path'],
+                fmt=options['format'],
+                batch_size=options['batch_size'],
+                default_status=options['status'],
+                create_categories=not options['no_create_categories'],
+                progress=progress if options['verbosity'] > 1 else None,
+            )
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        for error in stats.errors[:20]:
+            self.stderr.write(error)
+        if len(stats.errors) > 20:
+            self.stderr.write(f'... and {len(stats.errors) - 20} more errors')
+        self.stdout.write(self.style.SUCCESS(f'Imported {stats}'))
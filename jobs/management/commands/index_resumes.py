@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from jobs.models import Application, ResumeDocument, User
+from jobs.resumes import index_resume
+from jobs.tasks import extract_resume_text
+
+
+class Command(BaseCommand):
+    help = 'Queues (or with --now, runs) text extraction for resumes and CVs not indexed yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--now', action='store_true', help='Extract in this process instead of queueing tasks')
+        parser.add_argument('--reindex', action='store_true', help='Include resumes that are already indexed')
+
+    def handle(self, *args, **options):
+        names = set(Application.objects.exclude(resume='').values_list('resume', flat=True).distinct().iterator())
+        names |= set(User.objects.exclude(cv='').exclude(cv__isnull=True).values_list('cv', flat=True).distinct().iterator())
+        if not options['reindex']:
+            names -= set(ResumeDocument.objects.values_list('source', flat=True).iterator())
+        for name in sorted(names):
+            if options['now']:
+                document = index_resume(name)
+                if document.error:
+                    self.stderr.write(f"{name}: {document.error}")
+            else:
+                extract_resume_text.delay(name)
+        verb = 'Indexed' if options['now'] else 'Queued'
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(names)} resumes"))
@@ -0,0 +1,85 @@
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from jobs.taskqueue import claim_tasks, run_pending_tasks, worker_id
+from jobs.taskworker import init_worker, run_claimed
+
+
+class Command(BaseCommand):
+    help = 'Runs queued background tasks in a pool of worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=getattr(settings, 'TASK_WORKER_PROCESSES', os.cpu_count() or 2),
+                            help='Worker processes; 0 runs tasks in this process')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds between polls when idle')
+        parser.add_argument('--visibility-timeout', type=int, help='Seconds a claimed task is hidden from other workers')
+        parser.add_argument('--burst', action='store_true', help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        if options['processes'] == 0:
+            self.run_inline(options)
+        else:
+            self.run_pool(options)
+
+    def stop(self, signum, frame):
+        # Finish what's running, claim nothing new
+        self.stopping = True
+
+    def run_inline(self, options):
+        while not self.stopping:
+            outcomes = run_pending_tasks(limit=10)
+            if outcomes:
+                self.stdout.write(', '.join(f"{n} {outcome}" for outcome, n in sorted(outcomes.items())))
+            elif options['burst']:
+                break
+            else:
+                time.sleep(options['poll_interval'])
+
+    def run_pool(self, options):
+        size = options['processes']
+        worker = worker_id()
+        # Spawned, not forked: each process sets Django up and opens its own connections
+        connections.close_all()
+        context = multiprocessing.get_context('spawn')
+        while True:
+            try:
+                self.run_batches(ProcessPoolExecutor(max_workers=size, mp_context=context, initializer=init_worker), worker, size, options)
+                return
+            except BrokenProcessPool:
+                # Its tasks stay leased and are picked up again after the visibility timeout
+                self.stderr.write('A worker process died; starting a new pool')
+
+    def run_batches(self, pool, worker, size, options):
+        running = {}
+        with pool:
+            while True:
+                if not self.stopping and len(running) < size:
+                    for task_id, token in claim_tasks(worker, size - len(running), options['visibility_timeout']):
+                        running[pool.submit(run_claimed, task_id, token)] = task_id
+                if not running:
+                    if self.stopping or options['burst']:
+                        return
+                    time.sleep(options['poll_interval'])
+                    continue
+                done, _ = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                broken = False
+                for future in done:
+                    task_id = running.pop(future)
+                    try:
+                        self.stdout.write(f"task {task_id}: {future.result()}")
+                    except Exception as exc:
+                        # The task stays leased and is retried once the lease expires
+                        self.stderr.write(f"task {task_id}: worker failed: {exc!r}")
+                        broken = broken or isinstance(exc, BrokenProcessPool)
+                if broken:
+                    raise BrokenProcessPool('A worker process died')
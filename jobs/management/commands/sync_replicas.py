@@ -0,0 +1,41 @@
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from jobs.routers import replica_aliases
+
+
+class Command(BaseCommand):
+    help = 'Copies the primary SQLite database into every SQLite read replica (local replica setups)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, help='Keep syncing every N seconds instead of once')
+
+    def handle(self, *args, **options):
+        primary = connections['default']
+        if primary.vendor != 'sqlite':
+            raise CommandError('sync_replicas only copies SQLite databases; use your database\'s replication.')
+        replicas = [alias for alias in replica_aliases() if connections[alias].vendor == 'sqlite']
+        if not replicas:
+            raise CommandError('No SQLite replicas configured (see DATABASE_REPLICAS / REPLICA_SQLITE).')
+
+        while True:
+            for alias in replicas:
+                started = time.perf_counter()
+                self.copy(primary.settings_dict['NAME'], connections[alias].settings_dict['NAME'])
+                self.stdout.write(f"{alias}: synced in {(time.perf_counter() - started) * 1000:.0f}ms")
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def copy(self, source, target):
+        # The online backup API gives a consistent snapshot even while the primary takes writes
+        src = sqlite3.connect(source)
+        dst = sqlite3.connect(target)
+        try:
+            with dst:
+                src.backup(dst)
+        finally:
+            dst.close()
+            src.close()
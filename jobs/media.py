@@ -0,0 +1,127 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import http_date
+
+from .cache import make_etag, conditional_response, set_validators
+
+
+_byte_range = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+CHUNK_SIZE = 64 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive for a single "bytes=" range, or None to send the
+    whole file (no header, or a multi-range request we don't split).
+    Raises RangeNotSatisfiable for ranges entirely past the end.
+    """
+    match = _byte_range.match(header.strip()) if header else None
+    if not match or match.group(1) == match.group(2) == '':
+        return None
+    first, last = match.groups()
+    if first == '':
+        # "bytes=-500" is the final 500 bytes
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable()
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+def read_range(file, start, length):
+    try:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def offload_response(file, content_type):
+    """
+    Hand the transfer to the front-end server, which then deals with Range
+    and conditional requests itself. MEDIA_OFFLOAD is 'x-accel-redirect'
+    (nginx, internal location at MEDIA_OFFLOAD_PREFIX) or 'x-sendfile'
+    (Apache mod_xsendfile, lighttpd; needs a filesystem path).
+    """
+    mode = getattr(settings, 'MEDIA_OFFLOAD', None)
+    response = HttpResponse(content_type=content_type)
+    if mode == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = getattr(settings, 'MEDIA_OFFLOAD_PREFIX', '/protected-media/') + quote(file.name)
+    elif mode == 'x-sendfile':
+        response['X-Sendfile'] = file.path
+    else:
+        return None
+    return response
+
+
+def serve_file(request, file, as_attachment=False, cache_control='private, max-age=3600'):
+    """
+    Serve a stored FileField file with Range (single range), If-Range and
+    conditional GET support, or through the front-end server when
+    MEDIA_OFFLOAD is set. Whole-file responses are FileResponses, so WSGI
+    servers with wsgi.file_wrapper send them with sendfile().
+    """
+    storage, name = file.storage, file.name
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    filename = os.path.basename(name)
+
+    response = offload_response(file, content_type)
+    if response is not None:
+        if as_attachment:
+            response['Content-Disposition'] = f"attachment; filename*=UTF-8''{quote(filename)}"
+        response['Cache-Control'] = cache_control
+        return response
+
+    size = storage.size(name)
+    last_modified = storage.get_modified_time(name)
+    etag = make_etag(name, size, last_modified.timestamp())
+
+    response = conditional_response(request, etag, last_modified)
+    if response is not None:
+        response['Cache-Control'] = cache_control
+        return response
+
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    if request.method == 'GET' and (not if_range or if_range in (etag, http_date(last_modified.timestamp()))):
+        try:
+            byte_range = parse_range(request.headers.get('Range'), size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f"bytes */{size}"
+            return response
+
+    if byte_range is None:
+        response = FileResponse(storage.open(name, 'rb'), content_type=content_type, as_attachment=as_attachment, filename=filename)
+        set_validators(response, etag, last_modified)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(read_range(storage.open(name, 'rb'), start, end - start + 1), status=206, content_type=content_type)
+        response['Content-Range'] = f"bytes {start}-{end}/{size}"
+        response['Content-Length'] = str(end - start + 1)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+        if as_attachment:
+            response['Content-Disposition'] = f"attachment; filename*=UTF-8''{quote(filename)}"
+    response['Accept-Ranges'] = 'bytes'
+    response['Cache-Control'] = cache_control
+    return response
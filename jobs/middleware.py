@@ -0,0 +1,316 @@
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import deque, Counter
+from contextlib import ExitStack
+from functools import lru_cache
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from .auth import LazyUser
+from .db import InstrumentedConnectionMixin
+from .routers import replica_aliases, choose_replica, use_database, set_read_database, reset_read_database
+
+
+logger = logging.getLogger('jobs.instrumentation')
+
+# Most recent instrumented requests, newest last
+recent_requests = deque(maxlen=getattr(settings, 'QUERY_INSTRUMENTATION_LOG_SIZE', 200))
+_recent_lock = threading.Lock()
+_slow_log_lock = threading.Lock()
+
+PROJECT_ROOT = str(settings.BASE_DIR)
+
+_in_list = re.compile(r'\bIN \((?:%s, )*%s\)', re.IGNORECASE)
+_string_literal = re.compile(r"'(?:[^']|'')*'")
+_number_literal = re.compile(r'\b\d+(?:\.\d+)?\b')
+_whitespace = re.compile(r'\s+')
+
+
+def normalize_sql(sql):
+    """Reduce a statement to its shape, so the same query with other values groups together."""
+    sql = _in_list.sub('IN (...)', sql)
+    sql = _string_literal.sub('?', sql)
+    sql = _number_literal.sub('?', sql)
+    return _whitespace.sub(' ', sql).strip()
+
+
+@lru_cache(maxsize=None)
+def project_app_paths():
+    return tuple(app.path for app in apps.get_app_configs() if app.path.startswith(PROJECT_ROOT))
+
+
+def is_test_module(filename):
+    name = os.path.basename(filename)
+    return name == 'tests.py' or name.startswith('test_') or f"{os.sep}tests{os.sep}" in filename
+
+
+def call_site(depth=2):
+    """
+    First frame in one of our apps (not Django, site-packages, manage.py or
+    the test suite driving the request) that led to the query.
+    """
+    app_paths = project_app_paths()
+    frame = sys._getframe(depth)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (filename.startswith(app_paths) and 'site-packages' not in filename
+                and not filename.endswith('middleware.py') and not is_test_module(filename)):
+            return f"{filename[len(PROJECT_ROOT) + 1:]}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+class RequestMetrics:
+    def __init__(self, path):
+        self.path = path
+        self.queries = 0
+        self.sql_time = 0.0
+        self.shapes = Counter()
+        self.template_time = None
+        self.template_started = None
+        self.template_name = None
+        self.listeners = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.queries += 1
+            self.sql_time += duration
+            # Queries issued while a TemplateResponse renders have no view frame left on the stack
+            site = call_site(3) or (f"template {self.template_name}" if self.template_name else 'framework code')
+            self.shapes[(normalize_sql(sql), site)] += 1
+            for listener in self.listeners:
+                listener(sql, params, duration, context)
+
+    def duplicates(self, threshold):
+        return [(shape, site, count) for (shape, site), count in self.shapes.most_common() if count >= threshold]
+
+    def start_render(self, response):
+        self.template_started = time.perf_counter()
+        names = response.template_name
+        self.template_name = names if isinstance(names, str) else (names or [None])[0]
+        response.add_post_render_callback(self.finish_render)
+
+    def finish_render(self, response):
+        self.template_time = time.perf_counter() - self.template_started
+
+
+def slow_query_log_path():
+    return getattr(settings, 'SLOW_QUERY_LOG_FILE', settings.BASE_DIR / 'slow_queries.jsonl')
+
+
+class SlowQueryRecorder:
+    """
+    execute_wrapper that appends queries slower than `threshold_ms` to the
+    slow query log, with the view that ran them and where in our code they
+    came from. Fast queries only pay for a perf_counter() pair.
+    """
+
+    def __init__(self, request, threshold_ms, alias, path=None):
+        self.request = request
+        self.threshold = threshold_ms / 1000
+        self.alias = alias
+        self.path = path or slow_query_log_path()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            if duration >= self.threshold and not many:
+                self.record(sql, params, duration)
+
+    def record(self, sql, params, duration):
+        match = getattr(self.request, 'resolver_match', None)
+        entry = {
+            'time': timezone.now(),
+            'alias': self.alias,
+            'vendor': connections[self.alias].vendor,
+            'duration_ms': round(duration * 1000, 2),
+            'view': match.view_name if match else None,
+            'path': self.request.path,
+            'call_site': call_site(3),
+            'sql': sql,
+            'params': list(params) if params else [],
+        }
+        line = json.dumps(entry, cls=DjangoJSONEncoder)
+        with _slow_log_lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Per-request SQL and template timing, with N+1 detection.
+
+    Off unless QUERY_INSTRUMENTATION_SAMPLE_RATE is above zero; at 1.0 every
+    request is instrumented. Results go to response headers (X-DB-* and
+    Server-Timing), the `recent_requests` rolling log and, when a query shape
+    repeats from the same call site, a warning on the jobs.instrumentation logger.
+
+    Independently of sampling, SLOW_QUERY_THRESHOLD_MS records every query
+    slower than the threshold to the slow query log.
+
+    Connections opened or reused by the request (and time spent opening
+    them) go in X-DB-Connections; process totals are in
+    jobs.db.get_connection_stats().
+    """
+
+    def __init__(self, get_response):
+        self.sample_rate = getattr(settings, 'QUERY_INSTRUMENTATION_SAMPLE_RATE', 0)
+        self.slow_threshold = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', None)
+        if not self.sample_rate and self.slow_threshold is None:
+            raise MiddlewareNotUsed()
+        self.duplicate_threshold = getattr(settings, 'QUERY_INSTRUMENTATION_DUPLICATE_THRESHOLD', 3)
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sampled = self.sample_rate >= 1 or (self.sample_rate and random.random() < self.sample_rate)
+        if not sampled and self.slow_threshold is None:
+            return self.get_response(request)
+
+        metrics = RequestMetrics(request.path)
+        if sampled:
+            request.query_metrics = metrics
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for conn in connections.all():
+                if sampled:
+                    stack.enter_context(conn.execute_wrapper(metrics))
+                if self.slow_threshold is not None:
+                    stack.enter_context(conn.execute_wrapper(SlowQueryRecorder(request, self.slow_threshold, conn.alias)))
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+
+        if not sampled:
+            return response
+
+        duplicates = metrics.duplicates(self.duplicate_threshold)
+        connection_stats = self.connection_stats()
+        self.add_headers(response, metrics, duplicates, total, connection_stats)
+        self.record(request, response, metrics, duplicates, total, connection_stats)
+        return response
+
+    def connection_stats(self):
+        # Opened/reused/connect time for this request, summed over aliases (jobs/db.py)
+        stats = {'opened': 0, 'reused': 0, 'connect_ms': 0.0}
+        for conn in connections.all(initialized_only=True):
+            if isinstance(conn, InstrumentedConnectionMixin):
+                for key in stats:
+                    stats[key] += conn.request_stats[key]
+        stats['connect_ms'] = round(stats['connect_ms'], 2)
+        return stats
+
+    def process_template_response(self, request, response):
+        metrics = getattr(request, 'query_metrics', None)
+        if metrics is not None:
+            metrics.start_render(response)
+        return response
+
+    def add_headers(self, response, metrics, duplicates, total, connection_stats):
+        response['X-DB-Queries'] = str(metrics.queries)
+        response['X-DB-Time'] = f"{metrics.sql_time * 1000:.1f}ms"
+        response['X-DB-Duplicates'] = str(sum(count for _, _, count in duplicates))
+        response['X-DB-Connections'] = f"opened={connection_stats['opened']} reused={connection_stats['reused']}"
+        timings = [f'db;dur={metrics.sql_time * 1000:.1f};desc="{metrics.queries} queries"']
+        if connection_stats['opened']:
+            timings.append(f"dbconnect;dur={connection_stats['connect_ms']:.1f}")
+        if metrics.template_time is not None:
+            timings.append(f'tpl;dur={metrics.template_time * 1000:.1f}')
+        timings.append(f'total;dur={total * 1000:.1f}')
+        response['Server-Timing'] = ', '.join(timings)
+
+    def record(self, request, response, metrics, duplicates, total, connection_stats):
+        entry = {
+            'path': request.path,
+            'method': request.method,
+            'status': response.status_code,
+            'view': getattr(request.resolver_match, 'view_name', None),
+            'queries': metrics.queries,
+            'sql_ms': round(metrics.sql_time * 1000, 2),
+            'template_ms': round(metrics.template_time * 1000, 2) if metrics.template_time is not None else None,
+            'total_ms': round(total * 1000, 2),
+            'duplicates': [{'sql': shape, 'call_site': site, 'count': count} for shape, site, count in duplicates],
+            'connections': connection_stats,
+        }
+        with _recent_lock:
+            recent_requests.append(entry)
+
+        for shape, site, count in duplicates:
+            logger.warning("Possible N+1 on %s: %d x %s (from %s)", request.path, count, shape[:200], site)
+
+
+def get_recent_requests():
+    with _recent_lock:
+        return list(recent_requests)
+
+
+class LeanAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware whose request.user is a jobs.auth.LazyUser."""
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = LazyUser(request)
+
+
+class ReadReplicaMiddleware:
+    """
+    Runs GET/HEAD requests for views marked read_replica against a read
+    replica (jobs/routers.py). A response to any other method sets a short
+    lived cookie that keeps the client on the primary, so people see their
+    own writes while replicas catch up.
+    """
+
+    cookie_name = 'primary_pin'
+
+    def __init__(self, get_response):
+        if not replica_aliases():
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.sticky_seconds = getattr(settings, 'REPLICA_STICKY_SECONDS', 10)
+
+    def __call__(self, request):
+        request.read_database = None
+        try:
+            response = self.get_response(request)
+        finally:
+            token = getattr(request, '_read_database_token', None)
+            if token is not None:
+                reset_read_database(token)
+        if (request.read_database and isinstance(response, StreamingHttpResponse)
+                and not isinstance(response, FileResponse)):
+            # Streamed content is generated after we return; keep it on the replica
+            response.streaming_content = self.stream_from(response.streaming_content, request.read_database)
+
+        if request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE'):
+            response.set_cookie(self.cookie_name, '1', max_age=self.sticky_seconds, httponly=True, samesite='Lax')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view = getattr(view_func, 'view_class', view_func)
+        if (request.method in ('GET', 'HEAD') and getattr(view, 'read_replica', False)
+                and self.cookie_name not in request.COOKIES):
+            request.read_database = choose_replica()
+            request._read_database_token = set_read_database(request.read_database)
+
+    @staticmethod
+    def stream_from(chunks, alias):
+        with use_database(alias):
+            yield from chunks
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-19 18:17
+
+import django.core.validators
+from django.db import migrations, models
+import jobs.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0019_upload_session'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('size', models.PositiveBigIntegerField()),
+                ('refcount', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='application',
+            name='resume',
+            field=models.FileField(storage=jobs.storage.blob_storage, upload_to='resumes/', validators=[django.core.validators.FileExtensionValidator(['pdf', 'doc', 'docx'])]),
+        ),
+        migrations.AlterField(
+            model_name='uploadsession',
+            name='file',
+            field=models.FileField(blank=True, storage=jobs.storage.blob_storage, upload_to='resumes/'),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='cv',
+            field=models.FileField(blank=True, null=True, storage=jobs.storage.blob_storage, upload_to='cvs/', validators=[django.core.validators.FileExtensionValidator(['pdf', 'doc', 'docx'])]),
+        ),
+    ]
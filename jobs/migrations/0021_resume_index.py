@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-19 18:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0020_blob_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumeDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(help_text='Storage name of the resume', max_length=255, unique=True)),
+                ('text', models.TextField(blank=True, help_text='Lowercased, whitespace-normalized')),
+                ('skills', models.JSONField(blank=True, default=list)),
+                ('error', models.CharField(blank=True, max_length=255)),
+                ('extracted_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ResumeTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='jobs.resumedocument')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='resumeterm',
+            constraint=models.UniqueConstraint(fields=('term', 'document'), name='resume_term_unique'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-19 18:40
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0021_resume_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blob',
+            name='used_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -1,11 +1,42 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import FileExtensionValidator
+from django.utils import timezone
 from django.utils.text import slugify
 import random
+import uuid
 
+from .storage import blob_storage
 
-class User(AbstractUser):
+
+class UserRoleMixin:
+    # Shared by User and the cached jobs.auth.UserSummary, so permission
+    # checks read the same either way. Expects the User.IS_* constants.
+
+    @property
+    def is_admin_user(self):
+        return self.user_type == self.IS_ADMIN or self.is_superuser
+
+    @property
+    def is_college_user(self):
+        return self.user_type == self.IS_COLLEGE
+
+    @property
+    def is_employer_user(self):
+        return self.user_type == self.IS_EMPLOYER
+
+    @property
+    def is_applicant_user(self):
+        return self.user_type == self.IS_APPLICANT
+
+    @property
+    def can_access_tools(self):
+        if self.user_type == self.IS_ADMIN:
+            return True
+        return self.verification_status == 'approved'
+
+
+class User(UserRoleMixin, AbstractUser):
     IS_APPLICANT = 'applicant'
     IS_EMPLOYER = 'employer'
     IS_COLLEGE = 'college'
@@ -34,7 +65,7 @@ class User(AbstractUser):
     age = models.PositiveIntegerField(blank=True, null=True)
     dob = models.DateField(blank=True, null=True, verbose_name="Date of Birth")
     address = models.TextField(blank=True, null=True)
-    cv = models.FileField(upload_to='cvs/', validators=[FileExtensionValidator(['pdf', 'doc', 'docx'])], blank=True, null=True)
+    cv = models.FileField(upload_to='cvs/', storage=blob_storage, validators=[FileExtensionValidator(['pdf', 'doc', 'docx'])], blank=True, null=True)
     is_verified = models.BooleanField(default=False)
     public_id = models.CharField(max_length=20, unique=True, blank=True, null=True)
 
@@ -53,27 +84,6 @@ class User(AbstractUser):
     def __str__(self):
         return self.username
 
-    @property
-    def is_admin_user(self):
-        return self.user_type == self.IS_ADMIN or self.is_superuser
-
-    @property
-    def is_college_user(self):
-        return self.user_type == self.IS_COLLEGE
-
-    @property
-    def is_employer_user(self):
-        return self.user_type == self.IS_EMPLOYER
-
-    @property
-    def is_applicant_user(self):
-        return self.user_type == self.IS_APPLICANT
-
-    @property
-    def can_access_tools(self):
-        if self.user_type == self.IS_ADMIN:
-            return True
-        return self.verification_status == 'approved'
 
 class Category(models.Model):
     name = models.CharField(max_length=100)
@@ -126,6 +136,16 @@ class Job(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     slug = models.SlugField(max_length=255, unique=True, blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # Public listings (home, job list, sitemap): only active jobs, newest first
+            models.Index(fields=['-created_at'], condition=models.Q(status='active', is_active=True), name='job_active_recent_idx'),
+            # Admin moderation lists filter by status
+            models.Index(fields=['status', '-created_at'], name='job_status_created_idx'),
+            # Employer dashboard
+            models.Index(fields=['employer', '-created_at'], name='job_employer_created_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.slug:
             base_slug = slugify(self.title)
@@ -165,7 +185,7 @@ class Subscription(models.Model):
 class Application(models.Model):
     job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='applications')
     applicant = models.ForeignKey(User, on_delete=models.CASCADE, related_name='applications')
-    resume = models.FileField(upload_to='resumes/', validators=[FileExtensionValidator(['pdf', 'doc', 'docx'])])
+    resume = models.FileField(upload_to='resumes/', storage=blob_storage, validators=[FileExtensionValidator(['pdf', 'doc', 'docx'])])
     cover_letter = models.TextField(blank=True, null=True)
     status = models.CharField(max_length=20, choices=(
         ('pending', 'Pending'),
@@ -176,6 +196,13 @@ class Application(models.Model):
     ), default='pending')
     applied_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Kanban/applicant lists group a job's applications by status
+            models.Index(fields=['job', 'status'], name='application_job_status_idx'),
+            models.Index(fields=['applicant', '-applied_at'], name='application_applicant_idx'),
+        ]
+
     def __str__(self):
         return f"{self.applicant.username} - {self.job.title}"
 
@@ -224,6 +251,13 @@ class Course(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Learn page: active courses by rating
+            models.Index(fields=['status', '-rating'], name='course_status_rating_idx'),
+            models.Index(fields=['college', '-created_at'], name='course_college_created_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.slug:
             base_slug = slugify(self.title)
@@ -257,6 +291,10 @@ class Enrollment(models.Model):
     
     class Meta:
         unique_together = ('student', 'course')
+        indexes = [
+            # College dashboards filter on course__college and show the newest enrollments
+            models.Index(fields=['course', '-enrolled_at'], name='enrollment_course_recent_idx'),
+        ]
 
     def __str__(self):
         return f"{self.student.username} -> {self.course.title}"
@@ -395,6 +433,11 @@ class Message(models.Model):
 
     class Meta:
         ordering = ['timestamp']
+        indexes = [
+            # Inbox: messages where the user is sender or recipient, newest first
+            models.Index(fields=['sender', '-timestamp'], name='message_sender_idx'),
+            models.Index(fields=['recipient', '-timestamp'], name='message_recipient_idx'),
+        ]
 
     def __str__(self):
         return f"{self.sender} -> {self.recipient}"
@@ -412,6 +455,11 @@ class Connection(models.Model):
 
     class Meta:
         unique_together = ('sender', 'recipient')
+        indexes = [
+            # Pending invitations / sent requests / accepted connections
+            models.Index(fields=['recipient', 'status'], name='connection_recipient_idx'),
+            models.Index(fields=['sender', 'status'], name='connection_sender_idx'),
+        ]
 
     def __str__(self):
         return f"{self.sender} -> {self.recipient} ({self.status})"
@@ -447,3 +495,111 @@ class UserProgress(models.Model):
 
     def __str__(self):
         return f"{self.user.username} - {self.lesson.title} - {self.is_completed}"
+
+class Task(models.Model):
+    """A unit of background work for `manage.py run_tasks` (see jobs/taskqueue.py)."""
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+    name = models.CharField(max_length=200, help_text="Dotted path of a @task function")
+    payload = models.JSONField(default=dict, blank=True)
+    priority = models.SmallIntegerField(default=0, help_text="Higher runs first")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    # Queued: not before this. Running: the worker's lease; past it, the task is visible to other workers again.
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', '-priority', 'run_after'], name='task_ready_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+class ImageDerivative(models.Model):
+    """
+    Resized copies of an uploaded image (see jobs/images.py). Derivatives are
+    named after the source's content hash, so identical uploads share files.
+    """
+    source = models.CharField(max_length=255, unique=True, help_text="Storage name of the original")
+    digest = models.CharField(max_length=64)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    # {"webp": [64, 128], "avif": [64, 128]}
+    variants = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.source
+
+class UploadSession(models.Model):
+    """A resumable chunked upload in progress (see jobs/uploads.py)."""
+    PURPOSE_CHOICES = (
+        ('lesson_video', 'Lesson video'),
+        ('resume', 'Resume'),
+    )
+    STATUS_CHOICES = (
+        ('open', 'Open'),
+        ('committed', 'Committed'),
+    )
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    purpose = models.CharField(max_length=20, choices=PURPOSE_CHOICES)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField(help_text="Total bytes the client will send")
+    offset = models.PositiveBigIntegerField(default=0, help_text="Bytes received so far")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='open')
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    # Set on commit for uploads that aren't attached straight to a target (resumes)
+    file = models.FileField(upload_to='resumes/', storage=blob_storage, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+
+class Blob(models.Model):
+    """
+    A file in jobs.storage.ContentAddressedStorage and how many model fields
+    point at it. Kept up to date by jobs/signals.py; `manage.py gc_blobs`
+    deletes blobs nothing references.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField()
+    refcount = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Bumped when a save reuses the blob or its count changes; gc_blobs's grace period runs from here
+    used_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount} refs)"
+
+class ResumeDocument(models.Model):
+    """Text extracted once from a stored resume/CV file (see jobs/resumes.py)."""
+    source = models.CharField(max_length=255, unique=True, help_text="Storage name of the resume")
+    text = models.TextField(blank=True, help_text="Lowercased, whitespace-normalized")
+    skills = models.JSONField(default=list, blank=True)
+    error = models.CharField(max_length=255, blank=True)
+    extracted_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.source
+
+class ResumeTerm(models.Model):
+    """Inverted index over ResumeDocument: one row per distinct word or skill in a resume."""
+    document = models.ForeignKey(ResumeDocument, on_delete=models.CASCADE, related_name='terms')
+    term = models.CharField(max_length=64)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['term', 'document'], name='resume_term_unique'),
+        ]
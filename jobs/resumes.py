@@ -0,0 +1,179 @@
+import html
+import io
+import os
+import re
+import unicodedata
+import zipfile
+import zlib
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from .models import ResumeDocument, ResumeTerm
+from .storage import blob_storage
+
+try:
+    import pypdf
+except ImportError:  # optional; the fallback below reads simple PDFs
+    pypdf = None
+
+
+# Skills recognised as phrases (single words are indexed anyway)
+SKILL_PHRASES = (
+    'machine learning', 'deep learning', 'data analysis', 'data science', 'data engineering',
+    'project management', 'product management', 'digital marketing', 'social media', 'content writing',
+    'graphic design', 'ui design', 'ux design', 'user research', 'customer service', 'business analysis',
+    'react native', 'spring boot', 'ruby on rails', 'computer vision', 'natural language processing',
+    'unit testing', 'continuous integration', 'cloud computing', 'financial analysis', 'technical writing',
+    'sales management', 'supply chain', 'quality assurance', 'power bi', 'google analytics',
+)
+SKILL_WORDS = {
+    'python', 'java', 'javascript', 'typescript', 'c', 'c++', 'c#', 'go', 'golang', 'rust', 'ruby', 'php',
+    'swift', 'kotlin', 'scala', 'r', 'sql', 'nosql', 'postgresql', 'mysql', 'sqlite', 'mongodb', 'redis',
+    'django', 'flask', 'fastapi', 'react', 'angular', 'vue', 'node.js', 'html', 'css', 'sass', 'docker',
+    'kubernetes', 'aws', 'azure', 'gcp', 'linux', 'git', 'terraform', 'ansible', 'jenkins', 'excel',
+    'tableau', 'figma', 'photoshop', 'illustrator', 'seo', 'sem', 'accounting', 'marketing', 'sales',
+    'pandas', 'numpy', 'tensorflow', 'pytorch', 'spark', 'hadoop', 'kafka', 'graphql', 'rest', 'agile',
+    'scrum', 'jira', 'android', 'ios', 'flutter', '.net', 'selenium', 'communication', 'leadership',
+}
+STOPWORDS = {
+    'the', 'and', 'for', 'with', 'from', 'that', 'this', 'have', 'has', 'was', 'were', 'are', 'you',
+    'your', 'our', 'their', 'they', 'them', 'his', 'her', 'its', 'into', 'onto', 'over', 'under', 'of',
+    'to', 'in', 'on', 'at', 'by', 'an', 'as', 'is', 'it', 'be', 'or', 'not', 'but', 'also', 'using',
+    'used', 'use', 'will', 'can', 'etc', 'per', 'via', 'all', 'any', 'some', 'such', 'than', 'then',
+}
+
+_word = re.compile(r'[a-z0-9.+#][a-z0-9+#.\-]*')
+_phrase = re.compile(r'(?<![a-z0-9])(%s)(?![a-z0-9])' % '|'.join(re.escape(p) for p in SKILL_PHRASES))
+_space = re.compile(r'\s+')
+MAX_TERMS = 2000
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKC', text).lower()
+    return _space.sub(' ', text).strip()
+
+
+def tokenize(text):
+    """Distinct index terms of normalized text: words (stopwords dropped) plus skill phrases."""
+    terms = set()
+    for word in _word.findall(text):
+        word = word.rstrip('.-')
+        if word in SKILL_WORDS or (2 <= len(word) <= 64 and word not in STOPWORDS and not word.isdigit()):
+            terms.add(word)
+    terms.update(_phrase.findall(text))
+    return terms
+
+
+def find_skills(terms):
+    return sorted(term for term in terms if term in SKILL_WORDS or term in SKILL_PHRASES)
+
+
+# Extraction
+
+_pdf_stream = re.compile(rb'stream\r?\n(.*?)\r?\nendstream', re.S)
+_pdf_text = re.compile(rb'\((?:[^()\\]|\\.)*\)\s*Tj|\[(?:[^\]\\]|\\.)*\]\s*TJ', re.S)
+_pdf_string = re.compile(rb'\(((?:[^()\\]|\\.)*)\)', re.S)
+_pdf_escape = re.compile(rb'\\([nrtbf()\\]|[0-7]{1,3})')
+_pdf_escapes = {b'n': b'\n', b'r': b'\r', b't': b'\t', b'b': b'', b'f': b'', b'(': b'(', b')': b')', b'\\': b'\\'}
+
+
+def _pdf_unescape(match):
+    code = match.group(1)
+    if code in _pdf_escapes:
+        return _pdf_escapes[code]
+    return bytes([int(code, 8) & 0xFF])
+
+
+def extract_pdf_fallback(data):
+    # Text-showing operators in (Flate-compressed) content streams. Enough for
+    # resumes exported from word processors; CID fonts need pypdf.
+    parts = []
+    for stream in _pdf_stream.findall(data):
+        try:
+            stream = zlib.decompress(stream)
+        except zlib.error:
+            pass
+        for operator in _pdf_text.findall(stream):
+            for string in _pdf_string.findall(operator):
+                parts.append(_pdf_escape.sub(_pdf_unescape, string).decode('latin-1'))
+            parts.append(' ')
+    return ''.join(parts)
+
+
+def extract_pdf(data):
+    if pypdf is None:
+        return extract_pdf_fallback(data)
+    reader = pypdf.PdfReader(io.BytesIO(data))
+    return '\n'.join(page.extract_text() or '' for page in reader.pages)
+
+
+def extract_docx(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        xml = archive.read('word/document.xml').decode('utf-8', 'replace')
+    xml = re.sub(r'</w:p>|<w:br/>|<w:tab/>', ' \n', xml)
+    return html.unescape(re.sub(r'<[^>]+>', '', xml))
+
+
+def extract_doc(data):
+    # Word 97 binary: pull out the runs of UTF-16 and 8-bit text
+    runs = [run.decode('utf-16-le') for run in re.findall(rb'(?:[\x20-\x7e]\x00){4,}', data)]
+    runs += [run.decode('latin-1') for run in re.findall(rb'[\x20-\x7e]{4,}', data)]
+    return '\n'.join(runs)
+
+
+EXTRACTORS = {'.pdf': extract_pdf, '.docx': extract_docx, '.doc': extract_doc}
+
+
+def extract_text(name, data):
+    extractor = EXTRACTORS.get(os.path.splitext(name)[1].lower())
+    if extractor is None:
+        raise ValueError(f"No text extractor for {name}")
+    return extractor(data)
+
+
+def index_resume(name, storage=None):
+    """
+    Extract, normalize and index the resume stored as `name`. Blobs are
+    content addressed, so a resume sent with fifty applications is
+    processed once. Returns the ResumeDocument.
+    """
+    storage = storage or blob_storage()
+    error = ''
+    try:
+        with storage.open(name, 'rb') as f:
+            text = normalize(extract_text(name, f.read()))[:getattr(settings, 'RESUME_MAX_TEXT', 200000)]
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile) as exc:
+        text, error = '', str(exc)[:255]
+    terms = tokenize(text)
+    skills = find_skills(terms)
+    # Skills always make the cut; other words fill what's left of MAX_TERMS
+    indexed = skills + sorted(terms.difference(skills))[:max(0, MAX_TERMS - len(skills))]
+
+    with transaction.atomic():
+        document, _ = ResumeDocument.objects.update_or_create(
+            source=name, defaults={'text': text, 'skills': skills, 'error': error},
+        )
+        document.terms.all().delete()
+        ResumeTerm.objects.bulk_create([ResumeTerm(document=document, term=term) for term in indexed], batch_size=500)
+    return document
+
+
+def query_terms(query):
+    """Index terms to look up for a keyword search: comma-separated skill phrases, otherwise words."""
+    terms = []
+    for part in normalize(query).split(','):
+        part = part.strip()
+        if part in SKILL_PHRASES:
+            terms.append(part)
+        else:
+            terms.extend(term for term in tokenize(part) if term not in SKILL_PHRASES)
+    return list(dict.fromkeys(terms))
+
+
+def filter_by_keywords(queryset, field, query):
+    """Rows of `queryset` whose resume in `field` contains every keyword of `query`."""
+    for term in query_terms(query):
+        queryset = queryset.filter(Exists(ResumeTerm.objects.filter(term=term, document__source=OuterRef(field))))
+    return queryset
@@ -0,0 +1,78 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+
+# Database alias reads go to for the current request, when it was routed to a replica
+_read_database = ContextVar('read_database', default=None)
+
+# Always read from the primary: a lagging replica here logs people out
+PRIMARY_ONLY_APPS = {'sessions'}
+
+
+def replica_aliases():
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+def choose_replica():
+    return random.choice(replica_aliases())
+
+
+def current_read_database():
+    return _read_database.get()
+
+
+def set_read_database(alias):
+    """Route reads to `alias` until reset_read_database() is called with the returned token."""
+    return _read_database.set(alias)
+
+
+def reset_read_database(token):
+    _read_database.reset(token)
+
+
+@contextmanager
+def use_database(alias):
+    token = set_read_database(alias)
+    try:
+        yield
+    finally:
+        reset_read_database(token)
+
+
+def replica_reads(view):
+    """Mark a function view as safe to serve from a read replica (class views set read_replica = True)."""
+    view.read_replica = True
+    return view
+
+
+class ReadReplicaRouter:
+    """
+    Writes always go to the primary. Reads go to a replica only inside
+    use_database(), which ReadReplicaMiddleware enters for views marked
+    read_replica; everything else reads from where Django would by default.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return DEFAULT_DB_ALIAS
+        return _read_database.get()
+
+    def db_for_write(self, model, **hints):
+        # Objects read from a replica would otherwise be saved back to it
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Replicas get their schema from the primary
+        if db in replica_aliases():
+            return False
+        return None
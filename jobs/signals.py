@@ -0,0 +1,116 @@
+from django.core.signals import request_started
+from django.db.backends.signals import connection_created
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .auth import invalidate_user_summary
+from .cache import JOBS, CATEGORIES, bump_version
+from .db import configure_sqlite, start_request_metrics
+from .images import image_fields
+from .models import User, Job, Category, ArticleCategory, Company, Course, CourseCategory, CourseModule, Lesson, Article, ImageDerivative, Application, UploadSession, ResumeDocument
+from .storage import blob_fields, change_refcount
+from .tasks import build_image_derivatives, extract_resume_text
+
+
+connection_created.connect(configure_sqlite, dispatch_uid='jobs.configure_sqlite')
+request_started.connect(start_request_metrics, dispatch_uid='jobs.start_request_metrics')
+
+@receiver([post_save, post_delete], sender=Job)
+def invalidate_jobs(sender, **kwargs):
+    bump_version(JOBS)
+
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=ArticleCategory)
+def invalidate_categories(sender, **kwargs):
+    bump_version(CATEGORIES)
+
+
+# Detail page fragments are keyed on updated_at, so edits to related rows that
+# those pages render have to move the parent's updated_at forward.
+
+@receiver(post_save, sender=Company)
+def touch_company_jobs(sender, instance, **kwargs):
+    Job.objects.filter(company=instance).update(updated_at=timezone.now())
+    bump_version(JOBS)
+
+
+@receiver([post_save, post_delete], sender=CourseModule)
+def touch_module_course(sender, instance, **kwargs):
+    Course.objects.filter(pk=instance.course_id).update(updated_at=timezone.now())
+
+
+@receiver([post_save, post_delete], sender=Lesson)
+def touch_lesson_course(sender, instance, **kwargs):
+    Course.objects.filter(modules=instance.module_id).update(updated_at=timezone.now())
+
+
+# Verification, profile edits, password changes and logins all save the user
+@receiver([post_save, post_delete], sender=User)
+def drop_user_summary(sender, instance, **kwargs):
+    invalidate_user_summary(instance.pk)
+
+
+# New uploads get resized derivatives built in the background (jobs/images.py)
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Company)
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=CourseCategory)
+@receiver(post_save, sender=Article)
+def queue_image_derivatives(sender, instance, update_fields=None, **kwargs):
+    for field_name, label in image_fields(sender):
+        if update_fields is not None and field_name not in update_fields:
+            continue
+        file = getattr(instance, field_name)
+        if file and not ImageDerivative.objects.filter(source=file.name).exists():
+            build_image_derivatives.delay(file.name, label)
+
+
+# Reference counts for content-addressed blobs (jobs/storage.py). Only the
+# models that store blobs are wired up, and the old value is only read when
+# the save can change a blob field.
+def remember_blob_references(sender, instance, update_fields=None, **kwargs):
+    fields = [f for f in blob_fields(sender) if update_fields is None or f in update_fields]
+    instance._blob_references = {}
+    if fields and not instance._state.adding:
+        instance._blob_references = sender._default_manager.filter(pk=instance.pk).values(*fields).first() or {}
+
+
+def count_blob_references(sender, instance, created=False, update_fields=None, **kwargs):
+    old = getattr(instance, '_blob_references', {})
+    for field in blob_fields(sender):
+        if update_fields is not None and field not in update_fields:
+            continue
+        new_name, old_name = getattr(instance, field).name, old.get(field)
+        if new_name != old_name:
+            change_refcount([new_name], 1)
+            change_refcount([old_name], -1)
+
+
+def release_blob_references(sender, instance, **kwargs):
+    change_refcount([getattr(instance, field).name for field in blob_fields(sender)], -1)
+
+
+for model in (User, Application, UploadSession):
+    pre_save.connect(remember_blob_references, sender=model, dispatch_uid=f'jobs.blob_refs_pre.{model.__name__}')
+    post_save.connect(count_blob_references, sender=model, dispatch_uid=f'jobs.blob_refs_post.{model.__name__}')
+    post_delete.connect(release_blob_references, sender=model, dispatch_uid=f'jobs.blob_refs_delete.{model.__name__}')
+
+
+# Resumes are indexed for keyword search (jobs/resumes.py) when a new file is
+# attached. The old names come from remember_blob_references above.
+RESUME_FIELDS = {Application: 'resume', User: 'cv'}
+
+
+def queue_resume_indexing(sender, instance, update_fields=None, **kwargs):
+    field = RESUME_FIELDS[sender]
+    if update_fields is not None and field not in update_fields:
+        return
+    name = getattr(instance, field).name
+    if name and name != getattr(instance, '_blob_references', {}).get(field) and not ResumeDocument.objects.filter(source=name).exists():
+        extract_resume_text.delay(name)
+
+
+for model in RESUME_FIELDS:
+    post_save.connect(queue_resume_indexing, sender=model, dispatch_uid=f'jobs.resume_index.{model.__name__}')
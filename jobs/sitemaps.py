@@ -1,5 +1,18 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from django.conf import settings
 from django.contrib.sitemaps import Sitemap
+from django.contrib.sites.shortcuts import get_current_site
+from django.db.models import F, Max, Count
+from django.http import Http404, FileResponse, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from .cache import make_etag, conditional_response, set_validators
 from .models import Job, Course
+from .routers import replica_reads
 
 class JobSitemap(Sitemap):
     changefreq = "daily"
@@ -17,7 +30,8 @@ class CourseSitemap(Sitemap):
     priority = 0.7
 
     def items(self):
-        return Course.objects.all().order_by('-created_at')
+        # Pending and rejected courses 404 for visitors, so keep them out
+        return Course.objects.filter(status='active').order_by('-created_at')
 
     def lastmod(self, obj):
         return obj.updated_at
@@ -30,5 +44,125 @@ class StaticViewSitemap(Sitemap):
         return ['jobs:home', 'jobs:job_list', 'jobs:learn', 'jobs:network']
 
     def location(self, item):
-        from django.urls import reverse
         return reverse(item)
+
+
+# Model sitemaps served in id-range segments: sitemap-<section>-<segment>.xml
+SEGMENTED_SITEMAPS = {
+    'jobs': JobSitemap,
+    'courses': CourseSitemap,
+}
+
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+STREAM_CHUNK_SIZE = 500
+
+
+def segment_size():
+    return getattr(settings, 'SITEMAP_SEGMENT_SIZE', 5000)
+
+
+def base_url(request):
+    # Same domain the contrib sitemap view would use
+    return f"{request.scheme}://{get_current_site(request).domain}"
+
+
+def segment_stats(site):
+    """[(segment, latest, total)] for every non-empty id range, in one grouped query."""
+    size = segment_size()
+    rows = (
+        site.items().order_by().annotate(segment=F('id') / size)
+        .values('segment').annotate(latest=Max('updated_at'), total=Count('id')).order_by('segment')
+    )
+    return [(row['segment'], row['latest'], row['total']) for row in rows]
+
+
+def segment_queryset(site, segment):
+    size = segment_size()
+    return site.items().filter(id__gte=segment * size, id__lt=(segment + 1) * size)
+
+
+@replica_reads
+def sitemap_index(request, sitemaps):
+    """sitemap.xml: the static section plus one entry per id-range segment, with its lastmod."""
+    base = base_url(request)
+    entries = [(base + reverse('sitemap_static'), None)]
+    parts = []
+    for section, site in sorted(sitemaps.items()):
+        for segment, latest, total in segment_stats(site()):
+            entries.append((base + reverse('sitemap_segment', kwargs={'section': section, 'segment': segment}), latest))
+            parts.append((section, segment, latest, total))
+
+    last_modified = max((latest for _, latest in entries if latest), default=None)
+    etag = make_etag(base, *parts)
+    response = conditional_response(request, etag, last_modified)
+    if response is not None:
+        return response
+
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', f'<sitemapindex xmlns="{SITEMAP_NS}">']
+    for loc, latest in entries:
+        lastmod = f"<lastmod>{latest.isoformat()}</lastmod>" if latest else ''
+        lines.append(f"<sitemap><loc>{escape(loc)}</loc>{lastmod}</sitemap>")
+    lines.append('</sitemapindex>')
+    return set_validators(HttpResponse("\n".join(lines), content_type='application/xml'), etag, last_modified)
+
+
+def render_segment(site, queryset, base):
+    """Yield the urlset XML in chunks, never holding more than STREAM_CHUNK_SIZE rows."""
+    yield f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{SITEMAP_NS}">\n'
+    rows = queryset.only('slug', 'updated_at').order_by('id').iterator(chunk_size=STREAM_CHUNK_SIZE)
+    chunk = []
+    for obj in rows:
+        chunk.append(
+            f"<url><loc>{escape(base + obj.get_absolute_url())}</loc>"
+            f"<lastmod>{obj.updated_at.isoformat()}</lastmod>"
+            f"<changefreq>{site.changefreq}</changefreq><priority>{site.priority}</priority></url>\n"
+        )
+        if len(chunk) >= STREAM_CHUNK_SIZE:
+            yield ''.join(chunk)
+            chunk = []
+    chunk.append('</urlset>\n')
+    yield ''.join(chunk)
+
+
+def stream_to_cache(chunks, path):
+    """Pass chunks through while writing them to `path`; a partial render is discarded."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=path.parent, suffix='.tmp', delete=False)
+    try:
+        with tmp:
+            for chunk in chunks:
+                tmp.write(chunk)
+                yield chunk
+        os.replace(tmp.name, path)
+    except BaseException:
+        os.unlink(tmp.name)
+        raise
+    # Older renders of the same segment are dead now
+    for stale in path.parent.glob(path.name.rsplit('-', 1)[0] + '-*.xml'):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+
+
+@replica_reads
+def sitemap_segment(request, section, segment):
+    if section not in SEGMENTED_SITEMAPS:
+        raise Http404("No such sitemap section")
+    site = SEGMENTED_SITEMAPS[section]()
+    queryset = segment_queryset(site, segment)
+    stats = queryset.order_by().aggregate(latest=Max('updated_at'), total=Count('id'))
+    if not stats['total']:
+        raise Http404("Empty sitemap segment")
+
+    base = base_url(request)
+    etag = make_etag(base, section, segment, stats['latest'], stats['total'])
+    response = conditional_response(request, etag, stats['latest'])
+    if response is not None:
+        return response
+
+    key = hashlib.md5(etag.encode()).hexdigest()
+    path = Path(settings.SITEMAP_CACHE_DIR) / f"{section}-{segment}-{key}.xml"
+    if path.exists():
+        response = FileResponse(open(path, 'rb'), content_type='application/xml')
+    else:
+        response = StreamingHttpResponse(stream_to_cache(render_segment(site, queryset, base), path), content_type='application/xml')
+    return set_validators(response, etag, stats['latest'])
@@ -0,0 +1,94 @@
+import json
+import re
+
+from django.db import connections
+
+from .middleware import normalize_sql, slow_query_log_path
+
+
+def read_slow_queries(path=None):
+    path = path or slow_query_log_path()
+    try:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+    except FileNotFoundError:
+        return
+
+
+def group_slow_queries(entries):
+    """Collapse entries by SQL shape, keeping the slowest sample of each and how often it was seen."""
+    groups = {}
+    for entry in entries:
+        key = (entry['alias'], normalize_sql(entry['sql']))
+        group = groups.setdefault(key, {'count': 0, 'views': set(), 'call_sites': set(), 'sample': entry})
+        group['count'] += 1
+        group['views'].add(entry.get('view') or entry.get('path'))
+        if entry.get('call_site'):
+            group['call_sites'].add(entry['call_site'])
+        if entry['duration_ms'] > group['sample']['duration_ms']:
+            group['sample'] = entry
+    return sorted(groups.values(), key=lambda g: -g['sample']['duration_ms'] * g['count'])
+
+
+def explain(sql, params, alias='default'):
+    """Return the query plan as a list of text lines, for SQLite or PostgreSQL."""
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return [row[-1] for row in cursor.fetchall()]
+        if connection.vendor == 'postgresql':
+            cursor.execute('EXPLAIN ' + sql, params)
+            return [row[0] for row in cursor.fetchall()]
+    raise NotImplementedError(f"EXPLAIN is not supported for {connection.vendor}")
+
+
+def full_scans(plan, vendor, tables):
+    """Tables from `tables` that the plan reads without an index."""
+    found = []
+    for line in plan:
+        if vendor == 'sqlite':
+            # "SCAN jobs_job" is a table scan; "SCAN jobs_job USING INDEX x" walks an index
+            match = re.search(r'\bSCAN (?:TABLE )?(\w+)(?: AS \w+)?(.*)', line)
+            if match and match.group(1) in tables and 'INDEX' not in match.group(2):
+                found.append(match.group(1))
+        else:
+            match = re.search(r'Seq Scan on (\w+)', line)
+            if match and match.group(1) in tables:
+                found.append(match.group(1))
+    return sorted(set(found))
+
+
+_clause_end = r'(?=\bGROUP BY\b|\bORDER BY\b|\bLIMIT\b|\bHAVING\b|$)'
+
+
+def suggest_index(sql, model):
+    """
+    Guess a composite index for `model` from the query: equality columns from
+    the WHERE clause first, then the ORDER BY column. A heuristic, not a planner.
+    """
+    column = r'"%s"\."(\w+)"' % re.escape(model._meta.db_table)
+    names = {field.column: field.name for field in model._meta.concrete_fields}
+    # Subqueries have their own WHERE clauses, so look at every one of them
+    where = ' '.join(re.findall(r'\bWHERE\b(.*?)' + _clause_end, sql, re.S))
+    order = re.search(r'\bORDER BY\b(.*?)(?=\bLIMIT\b|$)', sql, re.S)
+
+    fields = []
+    # Equality (and bare boolean) columns first, then range columns
+    for pattern in (r'\s*(?:=|IN\b|IS\b|AND\b|OR\b|\))', r'\s*(?:<|>|LIKE\b)'):
+        for name in re.findall(column + pattern, where):
+            # The primary key only shows up here as a correlation from a subquery
+            if name not in fields and name != model._meta.pk.column:
+                fields.append(name)
+    if order:
+        for name, direction in re.findall(column + r'\s*(ASC|DESC)?', order.group(1)):
+            if name not in fields:
+                fields.append(f"-{name}" if direction == 'DESC' else name)
+            break
+    fields = [('-' if f.startswith('-') else '') + names.get(f.lstrip('-'), f.lstrip('-')) for f in fields]
+    if not fields:
+        return None
+    return "models.Index(fields=[%s])" % ", ".join(f"'{f}'" for f in fields)
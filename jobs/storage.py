@@ -0,0 +1,114 @@
+import hashlib
+import os
+import tempfile
+from collections import Counter
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db.models import Count, F
+from django.utils import timezone
+
+
+def blob_prefix():
+    return getattr(settings, 'BLOB_STORAGE_PREFIX', 'blobs')
+
+
+def is_blob_name(name):
+    return bool(name) and name.startswith(blob_prefix() + '/')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores each distinct file once, under blobs/<aa>/<sha256><ext>, whatever
+    name it was uploaded with. Saving content that's already there writes
+    nothing and returns the existing name, so fifty applications with the
+    same PDF share one file.
+
+    Blobs are shared, so delete() leaves them alone: references are counted
+    in jobs.models.Blob (jobs/signals.py) and `manage.py gc_blobs` removes
+    the unreferenced ones.
+    """
+
+    def _save(self, name, content):
+        from .models import Blob  # models imports this module for its FileFields
+
+        digest = hashlib.sha256()
+        size = 0
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        # Spool to a temp file next to the blob while hashing, so the content is read once
+        directory = os.path.join(self.location, blob_prefix())
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=directory, delete=False) as tmp:
+            for chunk in content.chunks():
+                digest.update(chunk)
+                tmp.write(chunk)
+                size += len(chunk)
+        digest = digest.hexdigest()
+        blob = f"{blob_prefix()}/{digest[:2]}/{digest}{os.path.splitext(name)[1].lower()}"
+
+        path = self.path(blob)
+        _, created = Blob.objects.get_or_create(name=blob, defaults={'size': size})
+        if created or not os.path.exists(path):
+            # New, or gc_blobs removed the file after we looked: write ours
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Atomic, and two processes saving the same content write the same bytes
+            os.replace(tmp.name, path)
+            if self.file_permissions_mode is not None:
+                os.chmod(path, self.file_permissions_mode)
+        else:
+            os.unlink(tmp.name)
+            # Reused: keep gc_blobs off it until the new reference is counted
+            Blob.objects.filter(name=blob).update(used_at=timezone.now())
+        return blob
+
+    def delete(self, name):
+        if not is_blob_name(name):
+            super().delete(name)
+
+    def delete_blob(self, name):
+        super().delete(name)
+
+
+_blob_storage = ContentAddressedStorage()
+
+
+def blob_storage():
+    # Referenced by FileField(storage=...) so migrations don't serialize the instance
+    return _blob_storage
+
+
+def blob_fields(model):
+    """Names of `model`'s file fields stored as blobs."""
+    return [
+        field.name for field in model._meta.concrete_fields
+        if isinstance(getattr(field, 'storage', None), ContentAddressedStorage)
+    ]
+
+
+def change_refcount(names, delta):
+    from .models import Blob
+
+    names = [name for name in names if is_blob_name(name)]
+    if names:
+        Blob.objects.filter(name__in=names).update(refcount=F('refcount') + delta, used_at=timezone.now())
+
+
+def recount_references():
+    """Recompute every Blob.refcount from the rows that point at it. Returns the number of blobs changed."""
+    from .models import Blob
+
+    counts = Counter()
+    for model in apps.get_models():
+        for field in blob_fields(model):
+            rows = model._default_manager.filter(**{f"{field}__startswith": blob_prefix() + '/'}).values(field).order_by().annotate(n=Count('pk'))
+            for row in rows.iterator():
+                counts[row[field]] += row['n']
+    changed = []
+    for blob in Blob.objects.only('pk', 'name', 'refcount').iterator():
+        if blob.refcount != counts[blob.name]:
+            blob.refcount = counts[blob.name]
+            changed.append(blob)
+    Blob.objects.bulk_update(changed, ['refcount'], batch_size=500)
+    return len(changed)
@@ -0,0 +1,119 @@
+import os
+import socket
+import traceback
+import uuid
+from datetime import timedelta
+from functools import update_wrapper
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+
+def visibility_timeout():
+    return getattr(settings, 'TASK_VISIBILITY_TIMEOUT', 300)
+
+
+class TaskFunction:
+    """What @task returns: still callable directly, plus .delay() to run it in a worker."""
+
+    def __init__(self, func, priority=0, max_attempts=None):
+        update_wrapper(self, func)
+        self.func = func
+        self.name = f"{func.__module__}.{func.__name__}"
+        self.priority = priority
+        self.max_attempts = max_attempts
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        return enqueue(self.name, args, kwargs, priority=self.priority, max_attempts=self.max_attempts)
+
+
+def task(func=None, priority=0, max_attempts=None):
+    """
+    Register a background task. Arguments must be JSON serializable, so pass
+    ids rather than model instances.
+    """
+    def decorator(func):
+        return TaskFunction(func, priority=priority, max_attempts=max_attempts)
+    return decorator(func) if func else decorator
+
+
+def enqueue(name, args=(), kwargs=None, priority=0, max_attempts=None, delay=0):
+    # Created in the caller's transaction, so a task only exists if the request's writes commit
+    return Task.objects.create(
+        name=name,
+        payload={'args': list(args), 'kwargs': kwargs or {}},
+        priority=priority,
+        max_attempts=max_attempts or getattr(settings, 'TASK_MAX_ATTEMPTS', 3),
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_tasks(worker, limit, timeout=None):
+    """
+    Lease up to `limit` ready tasks, highest priority first. A task is ready
+    when it's queued and due, or running with an expired lease (its worker
+    died or hung). Each claim is a conditional UPDATE, so concurrent workers
+    never get the same task, without SELECT ... FOR UPDATE (SQLite has none).
+    Returns [(task_id, lease token)].
+    """
+    now = timezone.now()
+    lease_until = now + timedelta(seconds=timeout or visibility_timeout())
+    candidates = (
+        Task.objects.filter(status__in=('queued', 'running'), run_after__lte=now)
+        .order_by('-priority', 'run_after', 'pk')
+        .values_list('pk', 'status', 'run_after', 'attempts', 'max_attempts')[:limit * 2]
+    )
+    claimed = []
+    for pk, status, run_after, attempts, max_attempts in candidates:
+        if len(claimed) >= limit:
+            break
+        current = Task.objects.filter(pk=pk, status=status, run_after=run_after)
+        if status == 'running' and attempts >= max_attempts:
+            # Its last attempt never reported back
+            current.update(status='failed', finished_at=now, last_error='Visibility timeout expired on the last attempt')
+            continue
+        token = f"{worker}/{uuid.uuid4().hex[:12]}"
+        if current.update(status='running', run_after=lease_until, locked_by=token, attempts=F('attempts') + 1):
+            claimed.append((pk, token))
+    return claimed
+
+
+def execute_task(task_id, token):
+    """Run one claimed task and record the outcome. Called in worker processes."""
+    task = Task.objects.filter(pk=task_id, locked_by=token, status='running').first()
+    if task is None:
+        return 'lost'  # the lease expired and another worker took it
+    leased = Task.objects.filter(pk=task_id, locked_by=token, status='running')
+    try:
+        func = import_string(task.name)
+        func(*task.payload.get('args', []), **task.payload.get('kwargs', {}))
+    except Exception:
+        error = traceback.format_exc()
+        if task.attempts < task.max_attempts:
+            delay = getattr(settings, 'TASK_RETRY_DELAY', 10) * 2 ** (task.attempts - 1)
+            leased.update(status='queued', run_after=timezone.now() + timedelta(seconds=delay), locked_by='', last_error=error)
+            return 'retry'
+        leased.update(status='failed', finished_at=timezone.now(), locked_by='', last_error=error)
+        return 'failed'
+    leased.update(status='done', finished_at=timezone.now(), locked_by='')
+    return 'done'
+
+
+def run_pending_tasks(limit=100):
+    """Claim and run ready tasks in this process. Returns {outcome: count}."""
+    outcomes = {}
+    for task_id, token in claim_tasks(worker_id(), limit):
+        outcome = execute_task(task_id, token)
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    return outcomes
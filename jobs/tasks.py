@@ -0,0 +1,23 @@
+from .images import build_derivatives, derivative_widths
+from .models import Course, Enrollment
+from .resumes import index_resume
+from .taskqueue import task
+
+
+@task(priority=5)
+def refresh_enrollment_count(course_id):
+    count = Enrollment.objects.filter(course_id=course_id).count()
+    course = Course.objects.filter(pk=course_id).first()
+    if course is not None and course.students_enrolled != count:
+        course.students_enrolled = count
+        course.save(update_fields=['students_enrolled', 'updated_at'])
+
+
+@task(priority=-1)
+def build_image_derivatives(name, label):
+    build_derivatives(name, derivative_widths(label))
+
+
+@task(priority=-1)
+def extract_resume_text(name):
+    index_resume(name)
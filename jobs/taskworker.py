@@ -0,0 +1,13 @@
+# Entry points for `run_tasks` pool processes. They're spawned, not forked, and
+# import this module before Django is set up, so nothing here imports models
+# at module level.
+
+
+def init_worker():
+    import django
+    django.setup()
+
+
+def run_claimed(task_id, token):
+    from .taskqueue import execute_task
+    return execute_task(task_id, token)
@@ -0,0 +1,35 @@
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html, format_html_join
+
+from jobs import images
+
+
+register = template.Library()
+
+
+@register.filter
+def srcset(file, fmt='webp'):
+    """{{ course.image|srcset:"avif" }}: the srcset of an image's derivatives, '' until they're built."""
+    return images.srcset(file.name, fmt) if file else ''
+
+
+@register.simple_tag
+def picture(file, sizes='100vw', **attrs):
+    """
+    {% picture company.logo sizes="64px" alt=company.name class="rounded" %}
+
+    A <picture> offering the AVIF/WebP derivatives, with the original in the
+    <img> for browsers without either. Just the <img> until derivatives exist.
+    """
+    if not file:
+        return ''
+    img = format_html('<img src="{}"{}>', file.url, flatatt(attrs))
+    record = images.get_derivatives(file.name)
+    if record is None:
+        return img
+    sources = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}">',
+        ((images.MIME_TYPES[fmt], images.srcset(file.name, fmt), sizes) for fmt in record['variants'] if fmt in images.MIME_TYPES),
+    )
+    return format_html('<picture>{}{}</picture>', sources, img)
@@ -1,3 +1,1038 @@
-from django.test import TestCase
+import base64
+import csv
+import hashlib
+import io
+import json
+import os
+import tempfile
+import zipfile
+import zlib
+from concurrent.futures import Future
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import OperationalError, connection
+from django.db.models import Count
+from django.template import Context, Template
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from .benchmarks import BENCHMARK_SCALE, BenchmarkFixtures, capture_queries, run_benchmarks, load_budgets, record_budgets, check_budgets, format_results, benchmark_sqlite_writes
+from .cache import JOBS, get_versions
+from .datagen import generate_dataset
+from .db import retry_on_locked, get_connection_stats
+from .images import build_derivatives, derivative_name
+from .management.commands.run_tasks import Command as RunTasksCommand
+from .importers import import_jobs
+from .middleware import get_recent_requests, normalize_sql
+from .models import User, Job, Category, Course, Lesson, SavedJob, HiddenJob, Application, Message, Connection, Enrollment, Task, Company, ImageDerivative, Blob, UploadSession
+from .resumes import MAX_TERMS, extract_text, index_resume, normalize, tokenize
+from .routers import ReadReplicaRouter, use_database
+from .taskqueue import enqueue, claim_tasks, execute_task, run_pending_tasks
+from .storage import blob_storage, recount_references
+from .slowlog import read_slow_queries, group_slow_queries, explain, full_scans, suggest_index
+
+
+class TempDirsMixin:
+    """Points each setting in temp_dirs at a fresh temporary directory for every test."""
+    temp_dirs = ('MEDIA_ROOT',)
+
+    def setUp(self):
+        super().setUp()
+        for name in self.temp_dirs:
+            directory = tempfile.TemporaryDirectory()
+            self.addCleanup(directory.cleanup)
+            patcher = override_settings(**{name: directory.name})
+            patcher.enable()
+            self.addCleanup(patcher.disable)
+
+
+class DatasetMixin:
+    """Generates the shared synthetic dataset once per class; override `dataset` for a bigger one."""
+    dataset = {'scale': 0.01, 'seed': 1}
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        generate_dataset(**cls.dataset)
+
+
+class JobImporterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        employer = User.objects.create_user('feed-employer', password='x', user_type=User.IS_EMPLOYER)
+        cls.company = Company.objects.create(user=employer, name='Acme Corp', description='x', location='Remote')
+        cls.existing = Job.objects.create(employer=employer, company=cls.company, title='Data Engineer', description='old', location='Remote', job_type='full_time')
+        cls.category = Category.objects.create(name='Engineering')
+
+    def feed(self, rows, **kwargs):
+        stream = io.StringIO()
+        writer = csv.DictWriter(stream, fieldnames=['slug', 'title', 'company', 'category', 'location', 'job_type', 'status'])
+        writer.writeheader()
+        writer.writerows(rows)
+        stream.seek(0)
+        return import_jobs(stream, 'csv', **kwargs)
+
+    def test_slugs_avoid_existing_and_same_batch_rows(self):
+        row = {'title': 'Data Engineer', 'company': 'acme corp', 'location': 'Pune'}
+        stats = self.feed([dict(row, slug='Data Engineer 1!'), row, row], batch_size=2)
+        self.assertEqual((stats.created, stats.updated, stats.skipped), (3, 0, 0))
+        slugs = set(Job.objects.exclude(pk=self.existing.pk).values_list('slug', flat=True))
+        # The given slug is slugified and taken first; allocation moves past it
+        self.assertEqual(slugs, {'data-engineer-1', 'data-engineer-2', 'data-engineer-3'})
+
+    def test_given_slug_updates_through_bulk_update(self):
+        stats = self.feed([{'slug': self.existing.slug, 'title': 'Senior Data Engineer', 'company': 'Acme Corp', 'location': 'Berlin', 'status': 'active'}])
+        self.assertEqual((stats.created, stats.updated), (0, 1))
+        job = Job.objects.get(pk=self.existing.pk)
+        self.assertEqual((job.title, job.location, job.status, job.is_active), ('Senior Data Engineer', 'Berlin', 'active', True))
+
+    def test_bad_rows_skipped_and_categories_mapped(self):
+        stats = self.feed([
+            {'title': 'A', 'company': 'Nobody Ltd'},
+            {'title': 'B', 'company': 'Acme Corp', 'status': 'published'},
+            {'title': 'C', 'company': 'Acme Corp', 'category': ' engineering '},
+            {'title': 'D', 'company': 'Acme Corp', 'category': 'Design'},
+        ], create_categories=False)
+        self.assertEqual((stats.created, stats.skipped), (2, 2))
+        self.assertEqual(len(stats.errors), 2)
+        self.assertIn("unknown company 'Nobody Ltd'", stats.errors[0])
+        self.assertIn("invalid status 'published'", stats.errors[1])
+        self.assertEqual(Job.objects.get(title='C').category, self.category)
+        self.assertIsNone(Job.objects.get(title='D').category)
+
+        self.feed([{'title': 'E', 'company': 'Acme Corp', 'category': 'Design'}])
+        self.assertEqual(Job.objects.get(title='E').category.name, 'Design')
+
+
+class ViewBenchmarkTests(DatasetMixin, TestCase):
+    """
+    Drives the hot views against a generated dataset and fails when one goes
+    over its recorded budget. Query counts and allocations are enforced;
+    p95 latency only with BENCHMARK_LATENCY=1, on the machine the budgets
+    were recorded on. Re-record with BENCHMARK_RECORD=1 after an
+    intentional change.
+    """
+
+    dataset = {'scale': BENCHMARK_SCALE, 'seed': 42}
+
+    def test_views_within_budget(self):
+        results = run_benchmarks(iterations=10)
+
+        if os.environ.get('BENCHMARK_RECORD'):
+            record_budgets(results)
+            return
+
+        budgets = load_budgets()
+        self.assertEqual(budgets.get('scale'), BENCHMARK_SCALE)
+        self.assertEqual(set(results), set(budgets.get('views', {})), "Benchmarked views and recorded budgets differ")
+        failures = check_budgets(results, budgets, latency=bool(os.environ.get('BENCHMARK_LATENCY')))
+        self.assertFalse(failures, 'Views over budget:\n' + '\n'.join(failures) + '\n\n' + format_results(results))
+
+
+@override_settings(QUERY_INSTRUMENTATION_SAMPLE_RATE=1.0)
+class QueryInstrumentationTests(DatasetMixin, TestCase):
+    def test_headers_and_duplicate_detection(self):
+        employer = User.objects.filter(user_type=User.IS_EMPLOYER).annotate(n=Count('jobs_posted')).order_by('-n').first()
+        self.client.force_login(employer)
+        response = self.client.get(reverse('jobs:employer_dashboard'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(int(response['X-DB-Queries']), 0)
+        self.assertIn('tpl;dur=', response['Server-Timing'])
+        # The test database connection stays open across requests
+        self.assertEqual(response['X-DB-Connections'], 'opened=0 reused=1')
+        entry = get_recent_requests()[-1]
+        self.assertEqual(entry['view'], 'jobs:employer_dashboard')
+        # job.applications.count in the template runs once per job
+        duplicate = next(d for d in entry['duplicates'] if 'jobs_application' in d['sql'])
+        # Reported against the template, not the test method that made the request
+        self.assertEqual(duplicate['call_site'], 'template jobs/employer_dashboard.html')
+        self.assertGreater(duplicate['count'], 1)
+
+    def test_connection_metrics(self):
+        before = get_connection_stats()['default']
+        self.client.get(reverse('jobs:job_list'))
+        self.client.get(reverse('jobs:learn'))
+        after = get_connection_stats()['default']
+        self.assertEqual(after['reuses'] - before['reuses'], 2)
+        self.assertEqual(after['opens'], before['opens'])
+
+    def test_normalize_sql(self):
+        self.assertEqual(
+            normalize_sql("SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'x'  LIMIT 21"),
+            "SELECT * FROM t WHERE id IN (...) AND name = ? LIMIT ?",
+        )
+
+
+class SlowQueryLogTests(DatasetMixin, TestCase):
+    def test_slow_queries_are_recorded_and_explained(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            log = os.path.join(tmp, 'slow.jsonl')
+            with self.settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_LOG_FILE=log):
+                self.client.get(reverse('jobs:job_list'))
+            groups = group_slow_queries(read_slow_queries(log))
+
+        self.assertTrue(groups)
+        self.assertTrue(all(group['views'] == {'jobs:job_list'} for group in groups))
+        job_query = next(g['sample'] for g in groups if g['sample']['sql'].startswith('SELECT "jobs_job"."id"'))
+        plan = explain(job_query['sql'], job_query['params'])
+        self.assertTrue(plan)
+        self.assertEqual(full_scans(['SCAN jobs_job', 'SEARCH jobs_user USING INTEGER PRIMARY KEY (rowid=?)'], 'sqlite', {'jobs_job', 'jobs_user'}), ['jobs_job'])
+
+    def test_suggest_index(self):
+        sql = str(Job.objects.filter(status='active', is_active=True).order_by('-created_at').query)
+        self.assertEqual(suggest_index(sql, Job), "models.Index(fields=['is_active', 'status', '-created_at'])")
+
+
+class IndexUsageTests(DatasetMixin, TestCase):
+    """EXPLAIN every query the hot views run and fail on table scans of the large tables."""
+
+    dataset = {'scale': BENCHMARK_SCALE, 'seed': 42}
+
+    def test_hot_views_use_indexes(self):
+        watched = {model._meta.db_table for model in (Job, Application, Message, Connection, Enrollment)}
+        scans = []
+        for name, url, user in BenchmarkFixtures().cases():
+            client = Client()
+            if user is not None:
+                client.force_login(user)
+            for sql, params in capture_queries(client, url):
+                if not sql.lstrip().upper().startswith('SELECT'):
+                    continue
+                for table in full_scans(explain(sql, params), connection.vendor, watched):
+                    scans.append(f"{name}: {table} <- {sql[:200]}")
+        self.assertFalse(scans, 'Full table scans:\n' + '\n'.join(scans))
+
+
+class HomePageCacheTests(DatasetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_anonymous_home_is_served_from_cache(self):
+        self.client.get(reverse('jobs:home'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('jobs:home'))
+        self.assertContains(response, Category.objects.first().name)
+
+    def test_category_change_invalidates(self):
+        self.client.get(reverse('jobs:home'))
+        Category.objects.create(name='Underwater Basket Weaving')
+        self.assertContains(self.client.get(reverse('jobs:home')), 'Underwater Basket Weaving')
+
+    def test_approve_job_bumps_version(self):
+        admin = User.objects.get(user_type=User.IS_ADMIN)
+        job = Job.objects.filter(status='pending').first()
+        before = get_versions(JOBS)[JOBS]
+        self.client.force_login(admin)
+        self.client.get(reverse('jobs:approve_job', kwargs={'slug': job.slug}))
+        self.assertNotEqual(get_versions(JOBS)[JOBS], before)
+
+    def test_authenticated_home_uses_fragments(self):
+        self.client.force_login(User.objects.filter(user_type=User.IS_APPLICANT).first())
+        self.client.get(reverse('jobs:home'))
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('jobs:home'))
+        self.assertFalse([q for q in queries if 'jobs_category' in q['sql'] or 'jobs_articlecategory' in q['sql']])
+
+
+class DetailFragmentCacheTests(DatasetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.filter(user_type=User.IS_APPLICANT).first()
+        self.client.force_login(self.user)
+
+    def test_job_detail_fragments(self):
+        job = Job.objects.filter(status='active', is_active=True).exclude(saved_by_users__user=self.user).first()
+        self.client.get(job.get_absolute_url())
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(job.get_absolute_url())
+        self.assertContains(response, job.title)
+        self.assertFalse([q for q in queries if 'FROM "jobs_company"' in q['sql']])
+
+        SavedJob.objects.create(user=self.user, job=job)
+        self.assertContains(self.client.get(job.get_absolute_url()), 'Saved')
+
+        job.company.name = 'Renamed Company Ltd'
+        job.company.logo = 'company_logos/renamed.png'
+        job.company.save()
+        self.assertContains(self.client.get(job.get_absolute_url()), 'Renamed Company Ltd')
+        # The JSON-LD fragment's absolute URLs follow the scheme
+        self.assertContains(self.client.get(job.get_absolute_url(), secure=True), '"logo": "https://testserver/')
+        self.assertContains(self.client.get(job.get_absolute_url()), '"logo": "http://testserver/')
+
+    def test_course_detail_syllabus(self):
+        course = Course.objects.filter(status='active', modules__lessons__isnull=False).first()
+        self.client.get(course.get_absolute_url())
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(course.get_absolute_url())
+        # Only the (user-specific) first lesson lookup is left; modules and their lessons come from the cache
+        self.assertFalse([q for q in queries if 'FROM "jobs_coursemodule"' in q['sql'] or '"jobs_lesson"."module_id" IN' in q['sql']])
+
+        lesson = Lesson.objects.filter(module__course=course).first()
+        lesson.title = 'A Brand New Lesson Title'
+        lesson.save()
+        self.assertContains(self.client.get(course.get_absolute_url()), 'A Brand New Lesson Title')
+
+
+class ConditionalGetTests(DatasetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.filter(user_type=User.IS_APPLICANT).first()
+        self.job = Job.objects.filter(status='active', is_active=True).exclude(saved_by_users__user=self.user).first()
+
+    def assertRevalidates(self, url, client=None):
+        client = client or self.client
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.has_header('ETag'))
+        response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(response.templates)
+        return response['ETag']
+
+    def test_job_detail(self):
+        self.client.force_login(self.user)
+        url = self.job.get_absolute_url()
+        etag = self.assertRevalidates(url)
+
+        # Saving the job for this user changes what the page shows
+        SavedJob.objects.create(user=self.user, job=self.job)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        etag = self.assertRevalidates(url)
+        self.job.title = 'Retitled'
+        self.job.save()
+        self.assertContains(self.client.get(url, HTTP_IF_NONE_MATCH=etag), 'Retitled')
+
+        # Another user never gets this user's validators matched
+        other = User.objects.filter(user_type=User.IS_APPLICANT).exclude(pk=self.user.pk).first()
+        client = Client()
+        client.force_login(other)
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_listings(self):
+        for name in ('jobs:job_list', 'jobs:learn', 'jobs:article_list'):
+            self.assertRevalidates(reverse(name))
+
+        etag = self.client.get(reverse('jobs:job_list'))['ETag']
+        self.job.status = 'closed'
+        self.job.save()
+        self.assertEqual(self.client.get(reverse('jobs:job_list'), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_listing_pagination_reuses_count(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('jobs:job_list'))
+        self.assertFalse([q for q in queries if q['sql'].startswith('SELECT COUNT(*)')])
+
+    def test_sitemap_last_modified(self):
+        response = self.client.get('/sitemap.xml')
+        self.assertTrue(response.has_header('Last-Modified'))
+        response = self.client.get('/sitemap.xml', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+
+class SegmentedSitemapTests(DatasetMixin, TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        override = override_settings(SITEMAP_SEGMENT_SIZE=10, SITEMAP_CACHE_DIR=self.cache_dir.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_index_and_segments(self):
+        response = self.client.get('/sitemap.xml')
+        self.assertContains(response, '/sitemap-static.xml')
+        segments = {job.pk // 10 for job in Job.objects.filter(status='active')}
+        for segment in segments:
+            self.assertContains(response, f'/sitemap-jobs-{segment}.xml')
+
+        body = b''.join(
+            b''.join(self.client.get(f'/sitemap-courses-{segment}.xml').streaming_content)
+            for segment in {course.pk // 10 for course in Course.objects.filter(status='active')}
+        ).decode()
+        for course in Course.objects.all():
+            self.assertEqual(course.get_absolute_url() in body, course.status == 'active')
+
+    def test_segment_cached_on_disk(self):
+        job = Job.objects.filter(status='active').first()
+        url = f'/sitemap-jobs-{job.pk // 10}.xml'
+        first = b''.join(self.client.get(url).streaming_content)
+        self.assertEqual(len(os.listdir(self.cache_dir.name)), 1)
+        with CaptureQueriesContext(connection) as queries:
+            second = b''.join(self.client.get(url).streaming_content)
+        self.assertEqual(first, second)
+        self.assertEqual(len(queries), 1)
+
+        job.title = 'Sitemap Retitled'
+        job.save()
+        b''.join(self.client.get(url).streaming_content)
+        self.assertEqual(len(os.listdir(self.cache_dir.name)), 1)
+        self.assertEqual(self.client.get('/sitemap-jobs-999999.xml').status_code, 404)
+
+
+class LeanUserTests(DatasetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.filter(user_type=User.IS_ADMIN).first()
+        self.college = User.objects.filter(user_type=User.IS_COLLEGE).first()
+        self.college.verification_status = 'pending'
+        self.college.save()
+        self.client.force_login(self.college)
+
+    def test_permission_checks_skip_user_row(self):
+        url = reverse('jobs:course_create')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertRedirects(response, reverse('jobs:college_dashboard'), fetch_redirect_response=False)
+        self.assertFalse([q for q in queries if 'FROM "jobs_user"' in q['sql'] or 'django_session' in q['sql']])
+
+    def test_verification_invalidates_summary(self):
+        url = reverse('jobs:course_create')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        admin = Client()
+        admin.force_login(self.admin)
+        admin.get(reverse('jobs:verify_user', args=[self.college.public_id, 'approve']))
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_password_change_ends_session(self):
+        url = reverse('jobs:course_create')
+        self.client.get(url)
+        self.college.set_password('a-new-password')
+        self.college.save()
+        response = self.client.get(url)
+        self.assertTrue(response['Location'].startswith(reverse('login')))
+
+
+class SQLiteProfileTests(TestCase):
+    def test_pragmas_applied_on_connect(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_PRAGMAS['busy_timeout'])
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+
+    def test_retry_on_locked(self):
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise OperationalError('database is locked')
+            return 'done'
+        self.assertEqual(retry_on_locked(flaky, base_delay=0), 'done')
+        self.assertEqual(len(calls), 3)
+
+        def broken():
+            calls.append(1)
+            raise OperationalError('no such table: jobs_nothing')
+        calls.clear()
+        with self.assertRaises(OperationalError):
+            retry_on_locked(broken, base_delay=0)
+        self.assertEqual(len(calls), 1)
+
+    def test_concurrent_writes_with_production_profile(self):
+        result = benchmark_sqlite_writes(settings.SQLITE_PRAGMAS, retry=True, threads=4, writes=25)
+        self.assertEqual(result['failed'], 0)
+        self.assertEqual(result['writes'], 100)
+
+
+class ReadReplicaRoutingTests(DatasetMixin, TestCase):
+    def test_router(self):
+        router = ReadReplicaRouter()
+        with override_settings(DATABASE_REPLICAS=['replica']):
+            self.assertIsNone(router.db_for_read(Job))
+            with use_database('replica'):
+                self.assertEqual(router.db_for_read(Job), 'replica')
+                self.assertEqual(router.db_for_read(Session), 'default')
+                self.assertEqual(router.db_for_write(Job), 'default')
+            self.assertFalse(router.allow_migrate('replica', 'jobs'))
+
+    @override_settings(DATABASE_REPLICAS=['default'])
+    def test_marked_views_use_replica_until_a_post(self):
+        # The test database has no second alias, so "replica" resolves to default
+        # here; what's checked is when the middleware picks one.
+        chosen = []
+        with mock.patch('jobs.middleware.choose_replica', side_effect=lambda: chosen.append(1) or 'default'):
+            self.client.get(reverse('jobs:job_list'))
+            self.client.get('/sitemap.xml')
+            self.assertEqual(len(chosen), 2)
+
+            user = User.objects.filter(user_type=User.IS_APPLICANT).first()
+            self.client.force_login(user)
+            job = Job.objects.filter(status='active').first()
+            self.client.get(job.get_absolute_url())
+            self.assertEqual(len(chosen), 2)
+
+            response = self.client.post(reverse('jobs:toggle_save_job', args=[job.slug]))
+            self.assertIn('primary_pin', response.cookies)
+            self.client.get(reverse('jobs:job_list'))
+            self.assertEqual(len(chosen), 2)
+
+
+class TaskQueueTests(DatasetMixin, TestCase):
+    def test_claims_by_priority_once(self):
+        low = enqueue('jobs.tasks.refresh_enrollment_count', [0])
+        high = enqueue('jobs.tasks.refresh_enrollment_count', [0], priority=9)
+        first = claim_tasks('a', 1)
+        self.assertEqual([pk for pk, _ in first], [high.pk])
+        second = claim_tasks('b', 5)
+        self.assertEqual([pk for pk, _ in second], [low.pk])
+        self.assertEqual(claim_tasks('c', 5), [])
+
+    @override_settings(TASK_RETRY_DELAY=0)
+    def test_retries_then_fails(self):
+        queued = enqueue('jobs.tasks.no_such_task', max_attempts=2)
+        self.assertEqual(run_pending_tasks(), {'retry': 1})
+        self.assertEqual(run_pending_tasks(), {'failed': 1})
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, 'failed')
+        self.assertIn('no_such_task', queued.last_error)
+
+    def test_expired_lease_is_reclaimed(self):
+        queued = enqueue('jobs.tasks.refresh_enrollment_count', [0])
+        [(pk, token)] = claim_tasks('dead-worker', 1, timeout=60)
+        Task.objects.filter(pk=pk).update(run_after=timezone.now() - timedelta(seconds=1))
+        [(_, new_token)] = claim_tasks('live-worker', 1)
+        self.assertEqual(execute_task(pk, token), 'lost')
+        self.assertEqual(execute_task(pk, new_token), 'done')
+        queued.refresh_from_db()
+        self.assertEqual(queued.attempts, 2)
+
+    def test_enrollment_count_updated_by_task(self):
+        course = Course.objects.first()
+        student = User.objects.create_user('new-student', password='x', user_type=User.IS_APPLICANT)
+        self.client.force_login(student)
+        self.client.post(reverse('jobs:course_enroll', args=[course.slug]))
+        self.assertEqual(Task.objects.filter(status='queued').count(), 1)
+        self.assertEqual(run_pending_tasks(), {'done': 1})
+        self.assertEqual(Course.objects.get(pk=course.pk).students_enrolled, Enrollment.objects.filter(course=course).count())
+
+    def test_worker_survives_a_failed_future(self):
+        class FailingPool:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def submit(self, fn, task_id, token):
+                future = Future()
+                future.set_exception(RuntimeError('boom'))
+                return future
+
+        queued = enqueue('jobs.tasks.refresh_enrollment_count', [0])
+        errors = io.StringIO()
+        command = RunTasksCommand(stdout=io.StringIO(), stderr=errors)
+        command.stopping = False
+        command.run_batches(FailingPool(), 'test-worker', 2, {'visibility_timeout': 60, 'burst': True, 'poll_interval': 0})
+        self.assertIn(f"task {queued.pk}: worker failed: RuntimeError('boom')", errors.getvalue())
+        # Still leased to the dead attempt; claimable again once the lease runs out
+        self.assertEqual(claim_tasks('other', 1), [])
+        Task.objects.filter(pk=queued.pk).update(run_after=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(len(claim_tasks('other', 1)), 1)
+
+
+class ImageDerivativeTests(TempDirsMixin, DatasetMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def png(self, width=300, height=200):
+        buffer = io.BytesIO()
+        Image.new('RGB', (width, height), 'navy').save(buffer, 'PNG')
+        return ContentFile(buffer.getvalue())
+
+    def test_upload_queues_content_addressed_derivatives(self):
+        first = Company.objects.first()
+        first.logo.save('logo.png', self.png())
+        course = Course.objects.first()
+        course.image.save('same-picture.png', self.png())
+        self.assertEqual(Task.objects.filter(name='jobs.tasks.build_image_derivatives').count(), 2)
+        self.assertEqual(run_pending_tasks(), {'done': 2})
+
+        a = ImageDerivative.objects.get(source=first.logo.name)
+        b = ImageDerivative.objects.get(source=course.image.name)
+        self.assertEqual(a.digest, b.digest)
+        self.assertEqual(a.variants['webp'], [64, 128, 256])
+        self.assertEqual(b.variants['webp'], [300])
+        path = derivative_name(a.digest, 128, 'webp')
+        self.assertTrue(default_storage.exists(path))
+        with Image.open(default_storage.path(path)) as img:
+            self.assertEqual(img.size, (128, 85))
+
+        # Saving other fields doesn't queue the image again
+        first.save()
+        self.assertFalse(Task.objects.filter(status='queued').exists())
+
+    def test_small_images_are_not_upscaled(self):
+        course = Course.objects.first()
+        course.image.save('tiny.png', self.png(100, 50), save=False)
+        record = build_derivatives(course.image.name, [320, 640])
+        self.assertEqual(record.variants['webp'], [100])
+
+    def test_picture_tag(self):
+        company = Company.objects.first()
+        company.logo.save('logo.png', self.png())
+        render = lambda: Template('{% load images %}{% picture company.logo sizes="64px" alt=company.name %}').render(Context({'company': company}))
+        self.assertTrue(render().startswith('<img src="'))
+        run_pending_tasks()
+        cache.clear()
+        html = render()
+        self.assertIn('<source type="image/webp" srcset="', html)
+        self.assertIn(' 64w, ', html)
+        self.assertIn(f'src="{company.logo.url}"', html)
+
+    def test_job_list_prefetch_reads_no_rows_per_job(self):
+        Company.objects.update(logo='company_logos/logo.png')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('jobs:job_list'))
+        self.assertEqual(len(response.context['jobs']), 10)
+        self.assertFalse([q for q in queries if q['sql'].startswith('SELECT "jobs_company"')])
+        self.assertEqual(len([q for q in queries if 'jobs_imagederivative' in q['sql']]), 1)
+
+
+class LessonMediaTests(TempDirsMixin, DatasetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.lesson = Lesson.objects.select_related('module').first()
+        cls.student = User.objects.create_user('media-student', password='x', user_type=User.IS_APPLICANT)
+        Enrollment.objects.create(student=cls.student, course_id=cls.lesson.module.course_id)
+        cls.data = bytes(range(256)) * 4
+
+    def setUp(self):
+        super().setUp()
+        self.lesson.video_file.save('clip.mp4', ContentFile(self.data))
+        self.url = reverse('jobs:lesson_media', args=[self.lesson.slug, 'video'])
+        self.client.force_login(self.student)
+
+    def test_whole_file_and_conditional_get(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(b''.join(response.streaming_content), self.data)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_ranges(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.data)}')
+        self.assertEqual(b''.join(response.streaming_content), self.data[100:200])
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-24')
+        self.assertEqual(b''.join(response.streaming_content), self.data[-24:])
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=5000-')
+        self.assertEqual(response.status_code, 416)
+
+        # A stale If-Range gets the whole current file instead of a piece of it
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_requires_enrollment(self):
+        other = User.objects.create_user('not-enrolled', password='x', user_type=User.IS_APPLICANT)
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    @override_settings(MEDIA_OFFLOAD='x-accel-redirect')
+    def test_offload_to_nginx(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + self.lesson.video_file.name)
+        self.assertEqual(response.content, b'')
+
+
+class ResumableUploadTests(TempDirsMixin, DatasetMixin, TestCase):
+    temp_dirs = ('MEDIA_ROOT', 'UPLOAD_PARTIAL_DIR')
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.applicant = User.objects.create_user('uploader', password='x', user_type=User.IS_APPLICANT)
+
+    def checksum(self, data):
+        return 'sha256 ' + base64.b64encode(hashlib.sha256(data).digest()).decode()
+
+    def send(self, url, offset, data, checksum=None):
+        return self.client.generic(
+            'PATCH', url, data, content_type='application/offset+octet-stream',
+            HTTP_UPLOAD_OFFSET=str(offset), HTTP_UPLOAD_CHECKSUM=checksum or self.checksum(data),
+        )
+
+    def test_resume_upload_then_apply(self):
+        data = b'%PDF-1.4 ' + bytes(range(256)) * 40
+        self.client.force_login(self.applicant)
+        state = self.client.post(reverse('jobs:upload_init'), {'purpose': 'resume', 'filename': 'cv.pdf', 'size': len(data)}).json()
+        url = state['url']
+
+        self.assertEqual(self.send(url, 0, data[:4000]).json()['offset'], 4000)
+        # A corrupted chunk is rejected and doesn't move the offset
+        response = self.send(url, 4000, data[4000:8000], checksum=self.checksum(b'something else'))
+        self.assertEqual(response.status_code, 460)
+        self.assertEqual(self.client.get(url).json()['offset'], 4000)
+        self.assertEqual(self.send(url, 0, data[:4000]).status_code, 409)
+        self.send(url, 4000, data[4000:])
+
+        response = self.client.post(reverse('jobs:upload_commit', args=[state['id']]), HTTP_UPLOAD_CHECKSUM=self.checksum(data))
+        self.assertEqual(response.json()['status'], 'committed')
+
+        job = Job.objects.filter(status='active').exclude(applications__applicant=self.applicant).first()
+        self.client.post(reverse('jobs:apply', args=[job.slug]), {'application_type': 'upload', 'upload': state['id'], 'cover_letter': 'Hi'})
+        application = Application.objects.get(job=job, applicant=self.applicant)
+        with application.resume.open('rb') as f:
+            self.assertEqual(f.read(), data)
+        # The session is gone once applied, so the application holds the only reference
+        self.assertFalse(UploadSession.objects.filter(pk=state['id']).exists())
+        application.delete()
+        self.assertEqual(Blob.objects.get(name=application.resume.name).refcount, 0)
+
+    def test_unused_committed_resume_expires(self):
+        data = b'%PDF-1.4 never applied'
+        self.client.force_login(self.applicant)
+        state = self.client.post(reverse('jobs:upload_init'), {'purpose': 'resume', 'filename': 'cv.pdf', 'size': len(data)}).json()
+        self.send(state['url'], 0, data)
+        self.client.post(reverse('jobs:upload_commit', args=[state['id']]))
+        name = UploadSession.objects.get(pk=state['id']).file.name
+        self.assertEqual(Blob.objects.get(name=name).refcount, 1)
+        UploadSession.objects.filter(pk=state['id']).update(updated_at=timezone.now() - timedelta(days=2))
+        call_command('clear_stale_uploads', stdout=io.StringIO())
+        self.assertEqual(Blob.objects.get(name=name).refcount, 0)
+
+    def test_lesson_video_needs_course_owner(self):
+        lesson = Lesson.objects.select_related('module__course__college').first()
+        data = b'\x00\x00\x00\x18ftypmp42' * 100
+        fields = {'purpose': 'lesson_video', 'lesson': lesson.slug, 'filename': 'intro.mp4', 'size': len(data)}
+        self.client.force_login(self.applicant)
+        self.assertEqual(self.client.post(reverse('jobs:upload_init'), fields).status_code, 403)
+
+        self.client.force_login(lesson.module.course.college)
+        state = self.client.post(reverse('jobs:upload_init'), fields).json()
+        self.send(state['url'], 0, data)
+        self.client.post(reverse('jobs:upload_commit', args=[state['id']]))
+        lesson.refresh_from_db()
+        self.assertTrue(lesson.video_file.name.startswith('lesson_videos/intro'))
+        self.assertEqual(lesson.video_file.size, len(data))
+
+
+class BlobStorageTests(TempDirsMixin, DatasetMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.applicant = User.objects.filter(user_type=User.IS_APPLICANT).first()
+        self.jobs = list(Job.objects.exclude(applications__applicant=self.applicant)[:2])
+
+    def apply(self, job, name, content):
+        application = Application(job=job, applicant=self.applicant)
+        application.resume.save(name, ContentFile(content))
+        return application
+
+    def test_duplicate_uploads_share_one_counted_blob(self):
+        first = self.apply(self.jobs[0], 'cv.pdf', b'%PDF same resume')
+        second = self.apply(self.jobs[1], 'cv (1).pdf', b'%PDF same resume')
+        self.assertEqual(first.resume.name, second.resume.name)
+        self.assertTrue(first.resume.name.startswith('blobs/'))
+        blob = Blob.objects.get(name=first.resume.name)
+        self.assertEqual(blob.refcount, 2)
+
+        self.applicant.cv = first.resume.name
+        self.applicant.save()
+        second.delete()
+        self.assertEqual(Blob.objects.get(pk=blob.pk).refcount, 2)
+
+        self.applicant.cv.save('new.pdf', ContentFile(b'%PDF updated resume'))
+        first.delete()
+        self.assertEqual(Blob.objects.get(pk=blob.pk).refcount, 0)
+        self.assertEqual(recount_references(), 0)
+
+        call_command('gc_blobs', grace=0, stdout=io.StringIO())
+        self.assertFalse(Blob.objects.filter(pk=blob.pk).exists())
+        self.assertFalse(default_storage.exists(blob.name))
+        self.assertTrue(default_storage.exists(self.applicant.cv.name))
+
+    def test_adopt_existing_files(self):
+        for job in self.jobs:
+            legacy = default_storage.save('resumes/old.pdf', ContentFile(b'%PDF legacy'))
+            Application.objects.filter(pk=self.apply(job, 'x.pdf', b'%PDF x').pk).update(resume=legacy)
+        stderr = io.StringIO()
+        call_command('gc_blobs', adopt=True, grace=0, stdout=io.StringIO(), stderr=stderr)
+        names = set(Application.objects.filter(job__in=self.jobs, applicant=self.applicant).values_list('resume', flat=True))
+        self.assertEqual(len(names), 1)
+        # The generated applications name resume files that were never written
+        missing = stderr.getvalue().splitlines()
+        self.assertEqual(len(missing), Application.objects.exclude(resume__in=names).exclude(resume='').count())
+        self.assertTrue(missing)
+        self.assertTrue(all(line.endswith(' is missing') for line in missing))
+        self.assertEqual(Blob.objects.get(name=names.pop()).refcount, 2)
+        self.assertFalse(default_storage.exists('resumes/old.pdf'))
+
+    def test_reused_old_orphan_is_kept(self):
+        first = self.apply(self.jobs[0], 'cv.pdf', b'%PDF old resume')
+        first.delete()
+        Blob.objects.filter(name=first.resume.name).update(created_at=timezone.now() - timedelta(days=30), used_at=timezone.now() - timedelta(days=30))
+        # Uploaded again; gc runs before the new Application row is saved
+        name = blob_storage().save('cv.pdf', ContentFile(b'%PDF old resume'))
+        self.assertEqual(name, first.resume.name)
+        call_command('gc_blobs', stdout=io.StringIO())
+        self.assertTrue(default_storage.exists(name))
+        Application.objects.create(job=self.jobs[1], applicant=self.applicant, resume=name)
+        self.assertEqual(Blob.objects.get(name=name).refcount, 1)
+
+        # A file gc removed under a claimed row is written again by the next save
+        Blob.objects.filter(name=name).delete()
+        os.unlink(default_storage.path(name))
+        Application(job=self.jobs[0], applicant=self.applicant).resume.save('again.pdf', ContentFile(b'%PDF old resume'))
+        self.assertTrue(default_storage.exists(name))
+
+
+class ResumeIndexTests(TempDirsMixin, DatasetMixin, TestCase):
+    def pdf(self, text):
+        stream = zlib.compress(f"BT /F1 12 Tf ({text}) Tj ET".encode())
+        return b'%PDF-1.4\n1 0 obj <</Filter /FlateDecode>> stream\n' + stream + b'\nendstream endobj\n%%EOF'
+
+    def docx(self, text):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            archive.writestr('word/document.xml', f'<w:document><w:body><w:p><w:r><w:t>{text}</w:t></w:r></w:p></w:body></w:document>')
+        return buffer.getvalue()
+
+    def test_extraction(self):
+        self.assertIn('python developer', normalize(extract_text('a.pdf', self.pdf('Senior Python Developer'))))
+        self.assertIn('react native', normalize(extract_text('a.docx', self.docx('React  Native &amp; C++'))))
+        self.assertIn('c++', tokenize(normalize('Knows C++, Go and SQL.')))
+
+    def test_employer_filters_applicants_by_resume_keywords(self):
+        job = Job.objects.select_related('employer').first()
+        applicants = User.objects.filter(user_type=User.IS_APPLICANT).exclude(applications__job=job)[:2]
+        resumes = [('ml.pdf', self.pdf('Machine Learning engineer, Python and Django')), ('design.docx', self.docx('Graphic design, Figma'))]
+        for applicant, (name, content) in zip(applicants, resumes):
+            application = Application(job=job, applicant=applicant)
+            application.resume.save(name, ContentFile(content))
+        self.assertEqual(run_pending_tasks(), {'done': 2})
+
+        self.client.force_login(job.employer)
+        url = reverse('jobs:employer_applicant_list')
+        found = lambda q: {a.applicant for a in self.client.get(url, {'q': q}).context['applications']}
+        self.assertEqual(found('django'), {applicants[0]})
+        self.assertEqual(found('machine learning, python'), {applicants[0]})
+        self.assertEqual(found('figma'), {applicants[1]})
+        self.assertEqual(found('figma django'), set())
+        response = self.client.get(url, {'q': 'figma'})
+        self.assertContains(response, 'graphic design')
+
+    def test_skills_survive_the_term_cap(self):
+        words = ' '.join(f"aa{n:04d}" for n in range(MAX_TERMS + 100))
+        name = blob_storage().save('long.pdf', ContentFile(self.pdf(f"{words} python sql typescript")))
+        document = index_resume(name)
+        terms = set(document.terms.values_list('term', flat=True))
+        self.assertEqual(len(terms), MAX_TERMS)
+        self.assertTrue({'python', 'sql', 'typescript'} <= terms)
+
+
+class StreamingExportTests(DatasetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.admin = User.objects.create_user('export-admin', password='x', user_type=User.IS_ADMIN)
+
+    def test_admin_user_csv_follows_filters(self):
+        User.objects.filter(pk=User.objects.filter(user_type=User.IS_APPLICANT).first().pk).update(first_name='=HYPERLINK("x")')
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('jobs:admin_user_list'), {'type': 'applicant', 'format': 'csv', 'page': 3})
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment; filename="users-', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(len(rows), User.objects.filter(user_type=User.IS_APPLICANT).count())
+        self.assertEqual({row['user_type'] for row in rows}, {'applicant'})
+        self.assertIn('\'=HYPERLINK("x")', {row['first_name'] for row in rows})
+
+    def test_job_jsonl_runs_one_query(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('jobs:admin_job_list'), {'format': 'jsonl'})
+        with CaptureQueriesContext(connection) as queries:
+            lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(len(lines), Job.objects.count())
+        self.assertEqual(set(json.loads(lines[0])), {'id', 'title', 'slug', 'company', 'employer', 'category', 'location', 'job_type', 'salary_range', 'status', 'is_active', 'created_at'})
+
+    def test_only_own_rows_and_role_checked(self):
+        employer = Application.objects.select_related('job__employer').first().job.employer
+        self.client.force_login(employer)
+        response = self.client.get(reverse('jobs:employer_applicant_list'), {'format': 'csv'})
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(len(rows), Application.objects.filter(job__employer=employer).count())
+        self.assertNotEqual(self.client.get(reverse('jobs:admin_user_list'), {'format': 'csv'}).status_code, 200)
+
+        page = self.client.get(reverse('jobs:employer_applicant_list'), {'q': 'django'})
+        self.assertEqual(page.context['export_urls']['csv'], '?q=django&format=csv')
+
+
+class ResumeArchiveTests(TempDirsMixin, DatasetMixin, TestCase):
+    def test_streams_resumes_and_manifest(self):
+        job = Job.objects.annotate(n=Count('applications')).filter(n__gte=2).first()
+        applications = list(job.applications.select_related('applicant').order_by('applied_at'))
+        job.applications.update(resume='')
+        applications[0].resume.save('cv.pdf', ContentFile(b'%PDF first' * 20000))
+        Application.objects.filter(pk=applications[1].pk).update(resume='blobs/00/gone.pdf')
+
+        self.client.force_login(job.employer)
+        response = self.client.get(reverse('jobs:job_resumes_zip', args=[job.slug]))
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        pieces = list(response.streaming_content)
+        self.assertGreater(len(pieces), 2)
+
+        with zipfile.ZipFile(io.BytesIO(b''.join(pieces))) as archive:
+            self.assertIsNone(archive.testzip())
+            resumes = [name for name in archive.namelist() if name.startswith('resumes/')]
+            self.assertEqual(len(resumes), 1)
+            self.assertEqual(archive.read(resumes[0]), b'%PDF first' * 20000)
+            manifest = list(csv.DictReader(io.StringIO(archive.read('manifest.csv').decode())))
+        self.assertEqual([row['file'] for row in manifest], [resumes[0][len('resumes/'):], 'missing'])
+        self.assertEqual(manifest[0]['username'], applications[0].applicant.username)
+        self.assertEqual(manifest[0]['status'], applications[0].status)
+
+    def test_other_employers_get_404(self):
+        job = Job.objects.first()
+        other = User.objects.create_user('zip-employer', password='x', user_type=User.IS_EMPLOYER)
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(reverse('jobs:job_resumes_zip', args=[job.slug])).status_code, 404)
+
+
+class ReadApiTests(DatasetMixin, TestCase):
+    def test_cursor_walks_every_job_once(self):
+        active = Job.objects.filter(status='active', is_active=True)
+        # Ties on created_at fall back to id, so a page boundary inside them still works
+        active.filter(pk__in=list(active.values_list('pk', flat=True)[:6])).update(created_at=timezone.now())
+        seen, url = [], reverse('jobs:api_list', args=['jobs']) + '?limit=4'
+        while url:
+            data = self.client.get(url).json()
+            seen += [row['id'] for row in data['results']]
+            url = data['next']
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(set(seen), set(active.values_list('pk', flat=True)))
+
+    def test_fields_limit_columns_read(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('jobs:api_list', args=['jobs']), {'fields': 'id,title,company'})
+        self.assertEqual(set(response.json()['results'][0]), {'id', 'title', 'company'})
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"description"', queries[0]['sql'])
+        self.assertIn('"jobs_company"."name"', queries[0]['sql'])
+
+        bad = self.client.get(reverse('jobs:api_list', args=['courses']), {'fields': 'title,password'})
+        self.assertEqual(bad.status_code, 400)
+        self.assertEqual(self.client.get(reverse('jobs:api_list', args=['courses']), {'cursor': 'bm9wZQ'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('jobs:api_list', args=['users'])).status_code, 404)
+
+    def test_bad_category_is_a_client_error(self):
+        url = reverse('jobs:api_list', args=['jobs'])
+        response = self.client.get(url, {'category': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'category must be a number'})
+        category = Job.objects.filter(status='active', is_active=True).values_list('category_id', flat=True).first()
+        self.assertEqual(self.client.get(url, {'category': category}).status_code, 200)
+
+    def test_etag_and_gzip(self):
+        # Big enough that gzip's random padding can't make it come out larger
+        url = reverse('jobs:api_list', args=['jobs']) + '?fields=id,title,description&limit=50'
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(zlib.decompress(response.content, 16 + zlib.MAX_WBITS))['results'][0].keys(), {'id', 'title', 'description'})
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+
+class BatchJobMarkTests(DatasetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.user = User.objects.create_user('batch-user', password='x', user_type=User.IS_APPLICANT)
+        cls.jobs = list(Job.objects.order_by('pk')[:4])
+
+    def post(self, name, data):
+        return self.client.post(reverse(f'jobs:{name}'), json.dumps(data), content_type='application/json')
+
+    def test_save_and_unsave_in_one_insert_and_delete(self):
+        self.client.force_login(self.user)
+        SavedJob.objects.create(user=self.user, job=self.jobs[0])
+        refs = [self.jobs[0].slug, self.jobs[1].pk, self.jobs[2].slug, 'no-such-job']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post('batch_save_jobs', {'jobs': refs, 'action': 'save'})
+        self.assertEqual(response.json(), {'saved': {job.slug: True for job in self.jobs[:3]}, 'missing': ['no-such-job']})
+        self.assertEqual(len([q for q in queries if q['sql'].startswith('INSERT')]), 1)
+        self.assertEqual(SavedJob.objects.filter(user=self.user).count(), 3)
+
+        response = self.post('batch_save_jobs', {'jobs': [self.jobs[0].pk, self.jobs[1].slug], 'action': 'unsave'})
+        self.assertEqual(response.json()['saved'], {self.jobs[0].slug: False, self.jobs[1].slug: False})
+        self.assertEqual(list(SavedJob.objects.filter(user=self.user).values_list('job', flat=True)), [self.jobs[2].pk])
+
+    def test_hide_and_bad_requests(self):
+        self.client.force_login(self.user)
+        response = self.post('batch_hide_jobs', {'jobs': [job.slug for job in self.jobs], 'action': 'hide'})
+        self.assertEqual(set(response.json()['hidden']), {job.slug for job in self.jobs})
+        self.assertEqual(HiddenJob.objects.filter(user=self.user).count(), 4)
+        self.assertEqual(self.post('batch_hide_jobs', {'jobs': [{'id': 1}], 'action': 'hide'}).status_code, 400)
+        self.assertEqual(self.post('batch_hide_jobs', {'jobs': ['x'] * 101, 'action': 'hide'}).status_code, 400)
+        self.assertEqual(self.post('batch_save_jobs', {'jobs': [self.jobs[0].pk], 'action': 'hide'}).status_code, 400)
+
+
+class JobMarkCacheTests(DatasetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.user = User.objects.create_user('marks-user', password='x', user_type=User.IS_APPLICANT)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def page_ids(self, page=1):
+        response = self.client.get(reverse('jobs:job_list'), {'page': page})
+        return [job.pk for job in response.context['jobs']], response
+
+    def test_hidden_jobs_leave_the_list_and_pages_stay_exact(self):
+        active = list(Job.objects.filter(status='active', is_active=True).order_by('-created_at', '-id').values_list('pk', flat=True))
+        hidden = active[3:6]
+        HiddenJob.objects.bulk_create([HiddenJob(user=self.user, job_id=pk) for pk in hidden])
+        visible = [pk for pk in active if pk not in hidden]
+
+        first, response = self.page_ids()
+        second, _ = self.page_ids(2)
+        self.assertEqual(first + second, visible[:len(first) + len(second)])
+        self.assertEqual(len(first), 10)
+        self.assertEqual(response.context['paginator'].count, len(visible))
+
+        # Warm caches: no anti-join, and no saved-job subquery
+        with CaptureQueriesContext(connection) as queries:
+            self.page_ids()
+        self.assertFalse([q for q in queries if 'jobs_hiddenjob' in q['sql'] or 'jobs_savedjob' in q['sql']])
+        # The page's jobs come with their companies in the same query
+        self.assertFalse([q for q in queries if q['sql'].startswith('SELECT "jobs_company"')])
+
+        # Listings too long to cache as ids fall back to excluding in the query
+        cache.clear()
+        with override_settings(JOB_LISTING_MAX_IDS=5):
+            self.assertEqual(self.page_ids()[0] + self.page_ids(2)[0], first + second)
+            self.assertEqual(self.page_ids()[1].context['paginator'].count, len(visible))
+
+    def test_toggles_keep_the_cached_ids_in_sync(self):
+        first, _ = self.page_ids()
+        self.client.post(reverse('jobs:toggle_save_job', args=[Job.objects.get(pk=first[0]).slug]))
+        ids, response = self.page_ids()
+        self.assertEqual([job.pk for job in response.context['jobs'] if job.is_saved], [first[0]])
+        self.assertContains(response, 'fas fa-bookmark')
+
+        self.client.post(reverse('jobs:batch_hide_jobs'), json.dumps({'jobs': first[:2], 'action': 'hide'}), content_type='application/json')
+        ids, _ = self.page_ids()
+        self.assertEqual(ids[:8], first[2:])
+        self.client.post(reverse('jobs:batch_hide_jobs'), json.dumps({'jobs': first[:2], 'action': 'unhide'}), content_type='application/json')
+        self.assertEqual(self.page_ids()[0], first)
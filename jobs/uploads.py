@@ -0,0 +1,167 @@
+import base64
+import binascii
+import hashlib
+import os
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.utils import timezone
+
+from .models import UploadSession
+
+
+COPY_BUFFER = 64 * 1024
+
+# Per purpose: allowed extensions and the largest file accepted
+UPLOAD_RULES = {
+    'lesson_video': {'extensions': ('mp4', 'webm', 'mov', 'm4v'), 'max_size': 4 * 1024 ** 3},
+    'resume': {'extensions': ('pdf', 'doc', 'docx'), 'max_size': 20 * 1024 ** 2},
+}
+
+CHECKSUM_ALGORITHMS = ('sha256', 'sha1', 'md5')
+
+
+class UploadError(Exception):
+    status = 400
+
+
+class OffsetMismatch(UploadError):
+    status = 409
+
+
+class ChecksumMismatch(UploadError):
+    status = 460  # what tus uses for "checksum mismatch"
+
+
+def partial_dir():
+    path = Path(getattr(settings, 'UPLOAD_PARTIAL_DIR', settings.BASE_DIR / 'upload_chunks'))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def partial_path(session):
+    return partial_dir() / f"{session.pk}.part"
+
+
+def validate_upload(purpose, filename, size):
+    rules = UPLOAD_RULES.get(purpose)
+    if rules is None:
+        raise UploadError(f"Unknown upload purpose '{purpose}'")
+    extension = os.path.splitext(filename)[1].lstrip('.').lower()
+    if extension not in rules['extensions']:
+        raise UploadError(f"'.{extension}' files are not allowed; use {', '.join(rules['extensions'])}")
+    if size <= 0 or size > rules['max_size']:
+        raise UploadError(f"Size must be between 1 and {rules['max_size']} bytes")
+
+
+def start_upload(user, purpose, filename, size, lesson=None):
+    filename = os.path.basename(filename or '')
+    validate_upload(purpose, filename, size)
+    session = UploadSession.objects.create(user=user, purpose=purpose, filename=filename, size=size, lesson=lesson)
+    partial_path(session).touch()
+    return session
+
+
+def parse_checksum(header):
+    """'sha256 <base64 digest>' (the tus Upload-Checksum format) -> (algorithm, digest bytes)."""
+    try:
+        algorithm, encoded = header.split(None, 1)
+        digest = base64.b64decode(encoded.strip(), validate=True)
+    except (AttributeError, ValueError, binascii.Error):
+        raise UploadError("Checksum must look like 'sha256 <base64 digest>'")
+    algorithm = algorithm.lower()
+    if algorithm not in CHECKSUM_ALGORITHMS:
+        raise UploadError(f"Unsupported checksum algorithm '{algorithm}'")
+    return algorithm, digest
+
+
+def append_chunk(session, stream, offset, length, checksum):
+    """
+    Write `length` bytes from `stream` (the request body) at `offset` of the
+    partial file, copying through a small buffer so a chunk is never held in
+    memory whole. The chunk only counts once its checksum matches; otherwise
+    the partial file is cut back to `offset` and the client resends it.
+    Returns the new offset.
+    """
+    if session.status != 'open':
+        raise UploadError("Upload is already committed")
+    if offset != session.offset:
+        raise OffsetMismatch(f"Expected offset {session.offset}")
+    if length <= 0 or offset + length > session.size:
+        raise UploadError("Chunk runs past the declared size")
+    algorithm, expected = parse_checksum(checksum)
+
+    digest = hashlib.new(algorithm)
+    written = 0
+    with open(partial_path(session), 'r+b') as f:
+        f.seek(offset)
+        while written < length:
+            block = stream.read(min(COPY_BUFFER, length - written))
+            if not block:
+                break
+            digest.update(block)
+            f.write(block)
+            written += len(block)
+        if written != length or digest.digest() != expected:
+            f.truncate(offset)
+            raise ChecksumMismatch("Chunk was truncated" if written != length else "Chunk checksum does not match")
+        f.truncate(offset + length)
+
+    # Two requests racing on the same offset: only one of them advances it
+    if not UploadSession.objects.filter(pk=session.pk, offset=offset, status='open').update(offset=offset + length, updated_at=timezone.now()):
+        raise OffsetMismatch("Upload moved on concurrently")
+    session.offset = offset + length
+    return session.offset
+
+
+def commit_upload(session, checksum=None):
+    """
+    Move a fully received upload into its model field: the lesson's
+    video_file, or the session's own file for resumes (picked up later by
+    ApplicationForm). `checksum` optionally verifies the whole file.
+    """
+    if session.status == 'committed':
+        return session
+    if session.offset != session.size:
+        raise UploadError(f"Upload is incomplete: {session.offset} of {session.size} bytes received")
+    path = partial_path(session)
+    if checksum:
+        algorithm, expected = parse_checksum(checksum)
+        digest = hashlib.new(algorithm)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(COPY_BUFFER), b''):
+                digest.update(block)
+        if digest.digest() != expected:
+            raise ChecksumMismatch("File checksum does not match")
+
+    with open(path, 'rb') as f:
+        content = File(f, name=session.filename)
+        if session.purpose == 'lesson_video':
+            session.lesson.video_file.save(session.filename, content)
+            session.file = session.lesson.video_file.name
+        else:
+            session.file.save(session.filename, content, save=False)
+    session.status = 'committed'
+    session.save(update_fields=['file', 'status', 'updated_at'])
+    path.unlink(missing_ok=True)
+    return session
+
+
+def clear_stale_uploads(max_age=None):
+    """
+    Drop sessions not touched for `max_age` seconds: open ones with their
+    partial files, and committed resumes never used in an application,
+    whose reference would otherwise keep the blob from gc_blobs forever.
+    """
+    max_age = max_age or getattr(settings, 'UPLOAD_SESSION_TTL', 86400)
+    stale = UploadSession.objects.filter(updated_at__lt=timezone.now() - timedelta(seconds=max_age))
+    count = 0
+    for session in stale.iterator():
+        if session.status == 'open':
+            partial_path(session).unlink(missing_ok=True)
+        count += 1
+    # Deleting through the queryset still sends post_delete, which releases blob references
+    stale.delete()
+    return count
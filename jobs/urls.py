@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 app_name = 'jobs'
 
@@ -29,6 +29,7 @@ urlpatterns = [
     path('learn/<slug:slug>/enroll/', views.enroll_course, name='course_enroll'),
     path('learn/lesson/<slug:slug>/', views.LessonDetailView.as_view(), name='lesson_detail'),
     path('learn/lesson/<slug:slug>/complete/', views.mark_lesson_complete, name='mark_lesson_complete'),
+    path('learn/lesson/<slug:slug>/media/<str:kind>/', views.lesson_media, name='lesson_media'),
 
     # Articles
     path('articles/', views.ArticleListView.as_view(), name='article_list'),
@@ -43,9 +44,13 @@ urlpatterns = [
     path('job/<slug:slug>/delete/', views.JobDeleteView.as_view(), name='job_delete'),
     path('job/<slug:slug>/applicants/', views.EmployerJobApplicantsView.as_view(), name='job_applicants'),
     path('job/<slug:slug>/applicants/', views.EmployerJobApplicantsView.as_view(), name='job_applicants'),
+    path('job/<slug:slug>/applicants/resumes.zip', views.job_resumes_zip, name='job_resumes_zip'),
     path('job/<slug:slug>/kanban/', views.EmployerKanbanView.as_view(), name='job_kanban'),
     path('job/application/<int:pk>/update-status/', views.update_application_status, name='update_application_status'),
     
+    # Read-only JSON API (jobs/api.py)
+    path('api/<str:resource>/', api.api_list, name='api_list'),
+
     # Legal
     path('privacy/', views.PrivacyPolicyView.as_view(), name='privacy'),
     path('terms/', views.TermsOfServiceView.as_view(), name='terms'),
@@ -70,6 +75,11 @@ urlpatterns = [
     # Action URLs
     path('job/<slug:slug>/toggle-save/', views.toggle_save_job, name='toggle_save_job'),
     path('job/<slug:slug>/toggle-hide/', views.toggle_hide_job, name='toggle_hide_job'),
+    path('jobs/batch-save/', views.batch_save_jobs, name='batch_save_jobs'),
+    path('jobs/batch-hide/', views.batch_hide_jobs, name='batch_hide_jobs'),
+    path('uploads/', views.upload_init, name='upload_init'),
+    path('uploads/<uuid:pk>/', views.upload_chunk, name='upload_chunk'),
+    path('uploads/<uuid:pk>/commit/', views.upload_commit, name='upload_commit'),
 
     # New Pages
     path('network/', views.NetworkView.as_view(), name='network'),
@@ -1,14 +1,27 @@
+import zlib
+
 from django.shortcuts import render, get_object_or_404, redirect
 from django.views.generic import ListView, DetailView, CreateView, TemplateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.auth.decorators import user_passes_test, login_required
 from django.contrib import messages
-from django.db.models import Q, Exists, OuterRef
-from django.http import JsonResponse
-from .models import Job, Application, Category, Company, User, Subscription, SavedJob, HiddenJob, Course, CourseCategory, Enrollment, CourseModule, Lesson, Article, ArticleCategory, Message, Connection, UserProgress, Assignment, Submission
+from django.db.models import Q, Exists, OuterRef, Subquery, Max, Count, JSONField
+from django.http import JsonResponse, HttpResponse, Http404, StreamingHttpResponse
+from django.conf import settings
+from django.core.cache import cache
+from .models import Job, Application, Category, Company, User, Subscription, SavedJob, HiddenJob, Course, CourseCategory, Enrollment, CourseModule, Lesson, Article, ArticleCategory, Message, Connection, UserProgress, Assignment, Submission, UploadSession, ResumeDocument
 from .forms import ApplicantSignUpForm, EmployerSignUpForm, CollegeSignUpForm, ProfileEditForm, EducationFormSet, ExperienceFormSet, ApplicationForm, JobForm, CompanyForm
-from django.urls import reverse_lazy
-from django.core.exceptions import ObjectDoesNotExist
+from django.urls import reverse, reverse_lazy
+from django.core.exceptions import ObjectDoesNotExist, PermissionDenied
+from .cache import JOBS, CATEGORIES, get_versions, page_cache_key, request_variant, make_etag, conditional_response, set_validators
+from .db import write_transaction
+from .images import prefetch_derivatives
+from .media import serve_file
+from .uploads import UploadError, start_upload, append_chunk, commit_upload
+from .resumes import filter_by_keywords
+from .exports import EXPORT_FORMATS, export_response, stream_zip, resume_archive_entries
+from .tasks import refresh_enrollment_count
+from .jobmarks import get_job_marks, forget_job_marks, contains, visible_job_ids, VisibleJobs
 
 # ... existing views ...
 
@@ -17,6 +30,9 @@ class VerifiedInstitutionalUserMixin(UserPassesTestMixin):
         return self.request.user.is_admin_user or self.request.user.verification_status == 'approved'
     
     def handle_no_permission(self):
+        # LoginRequiredMixin ends up here too for anonymous visitors
+        if not self.request.user.is_authenticated:
+            return super().handle_no_permission()
         messages.warning(self.request, "Account pending verification. Access restricted.")
         if self.request.user.is_employer_user:
             return redirect('jobs:employer_dashboard')
@@ -24,6 +40,85 @@ class VerifiedInstitutionalUserMixin(UserPassesTestMixin):
             return redirect('jobs:college_dashboard')
         return redirect('jobs:home')
 
+class ConditionalGetMixin:
+    """
+    Answers If-None-Match / If-Modified-Since with a 304 before anything is
+    rendered. Subclasses return the page's Last-Modified from
+    get_last_modified(); get_variant() adds anything else the page shows
+    that doesn't move updated_at (per-user state, counts).
+    """
+
+    def get_last_modified(self):
+        raise NotImplementedError
+
+    def get_variant(self):
+        return ()
+
+    def get(self, request, *args, **kwargs):
+        # Flash messages are shown once, so a page with some queued is always rendered
+        if len(messages.get_messages(request)):
+            return super().get(request, *args, **kwargs)
+        last_modified = self.get_last_modified()
+        etag = make_etag(last_modified, request_variant(request), *self.get_variant())
+        response = conditional_response(request, etag, last_modified)
+        if response is None:
+            response = set_validators(super().get(request, *args, **kwargs), etag, last_modified)
+        return response
+
+class ConditionalDetailMixin(ConditionalGetMixin):
+    def get_object(self, queryset=None):
+        # Already fetched by get_last_modified()
+        if queryset is None and getattr(self, 'object', None) is not None:
+            return self.object
+        return super().get_object(queryset)
+
+    def get_last_modified(self):
+        self.object = self.get_object()
+        return self.object.updated_at
+
+class ConditionalListMixin(ConditionalGetMixin):
+    total = None
+
+    def get_last_modified(self):
+        # One aggregate over the whole (unpaginated) list; the paginator reuses its count
+        stats = self.get_queryset().order_by().aggregate(latest=Max('updated_at'), total=Count('pk'))
+        self.total = stats['total']
+        return stats['latest']
+
+    def get_variant(self):
+        return (self.total,)
+
+    def get_paginator(self, *args, **kwargs):
+        paginator = super().get_paginator(*args, **kwargs)
+        if self.total is not None:
+            paginator.count = self.total
+        return paginator
+
+class ExportMixin:
+    """
+    ?format=csv or ?format=jsonl streams every row of the list's (filtered)
+    queryset instead of rendering a page (jobs/exports.py). Views name the
+    columns in export_columns as (header, lookup) pairs.
+    """
+    export_columns = ()
+    export_name = 'export'
+
+    def get(self, request, *args, **kwargs):
+        fmt = request.GET.get('format')
+        if fmt in EXPORT_FORMATS:
+            return export_response(self.get_queryset(), self.export_columns, fmt, self.export_name)
+        return super().get(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        params = self.request.GET.copy()
+        params.pop('page', None)
+        context['export_urls'] = {}
+        for fmt in EXPORT_FORMATS:
+            params['format'] = fmt
+            context['export_urls'][fmt] = '?' + params.urlencode()
+        return context
+
 class CompanyCreateView(LoginRequiredMixin, CreateView):
     model = Company
     form_class = CompanyForm
@@ -124,6 +219,20 @@ class EmployerJobApplicantsView(LoginRequiredMixin, DetailView):
         context['applications'] = self.object.applications.all()
         return context
 
+@login_required
+def job_resumes_zip(request, slug):
+    # All resumes for a job in one download, zipped while it streams (jobs/exports.py)
+    job = get_object_or_404(Job, slug=slug, employer=request.user)
+    applications = (
+        job.applications.exclude(resume='').order_by('applied_at')
+        .values('resume', 'status', 'applied_at', 'applicant__username', 'applicant__first_name', 'applicant__last_name', 'applicant__email')
+        .iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+    )
+    storage = Application._meta.get_field('resume').storage
+    response = StreamingHttpResponse(stream_zip(resume_archive_entries(applications, storage)), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="{slug}-resumes.zip"'
+    return response
+
 class EmployerKanbanView(LoginRequiredMixin, DetailView):
     model = Job
     template_name = 'jobs/kanban_board.html'
@@ -144,6 +253,7 @@ class EmployerKanbanView(LoginRequiredMixin, DetailView):
         context['hired'] = apps.filter(status='hired')
         return context
 
+@write_transaction
 def update_application_status(request, pk):
     if request.method == 'POST' and request.user.user_type == 'employer':
         import json
@@ -245,11 +355,17 @@ def delete_user(request, public_id):
     messages.success(request, "User deleted.")
     return redirect('jobs:admin_dashboard')
 
-class AdminUserListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
+class AdminUserListView(LoginRequiredMixin, UserPassesTestMixin, ExportMixin, ListView):
     model = User
     template_name = 'jobs/admin/user_list.html'
     context_object_name = 'users'
     paginate_by = 20
+    export_name = 'users'
+    export_columns = (
+        ('id', 'id'), ('username', 'username'), ('email', 'email'), ('first_name', 'first_name'),
+        ('last_name', 'last_name'), ('user_type', 'user_type'), ('verification_status', 'verification_status'),
+        ('phone_number', 'phone_number'), ('is_active', 'is_active'), ('date_joined', 'date_joined'), ('last_login', 'last_login'),
+    )
 
     def test_func(self):
         return self.request.user.is_admin_user
@@ -266,11 +382,17 @@ class AdminUserListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
         context['user_types'] = User.USER_TYPES
         return context
 
-class AdminJobListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
+class AdminJobListView(LoginRequiredMixin, UserPassesTestMixin, ExportMixin, ListView):
     model = Job
     template_name = 'jobs/admin/job_list.html'
     context_object_name = 'jobs'
     paginate_by = 20
+    export_name = 'jobs'
+    export_columns = (
+        ('id', 'id'), ('title', 'title'), ('slug', 'slug'), ('company', 'company__name'), ('employer', 'employer__username'),
+        ('category', 'category__name'), ('location', 'location'), ('job_type', 'job_type'), ('salary_range', 'salary_range'),
+        ('status', 'status'), ('is_active', 'is_active'), ('created_at', 'created_at'),
+    )
 
     def test_func(self):
         return self.request.user.is_admin_user
@@ -298,11 +420,16 @@ class AdminCourseListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
             queryset = queryset.filter(status=status)
         return queryset
 
-class CollegeStudentListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
+class CollegeStudentListView(LoginRequiredMixin, UserPassesTestMixin, ExportMixin, ListView):
     model = Enrollment
     template_name = 'jobs/college/student_list.html'
     context_object_name = 'enrollments'
     paginate_by = 20
+    export_name = 'students'
+    export_columns = (
+        ('username', 'student__username'), ('first_name', 'student__first_name'), ('last_name', 'student__last_name'),
+        ('email', 'student__email'), ('course', 'course__title'), ('status', 'status'), ('enrolled_at', 'enrolled_at'),
+    )
 
     def test_func(self):
         return self.request.user.is_college_user
@@ -310,24 +437,59 @@ class CollegeStudentListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
     def get_queryset(self):
         return Enrollment.objects.filter(course__college=self.request.user).select_related('student', 'course').order_by('-enrolled_at')
 
-class EmployerApplicantListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
+class EmployerApplicantListView(LoginRequiredMixin, UserPassesTestMixin, ExportMixin, ListView):
     model = Application
     template_name = 'jobs/employer/applicant_list.html'
     context_object_name = 'applications'
     paginate_by = 20
+    export_name = 'applicants'
+    export_columns = (
+        ('application_id', 'id'), ('username', 'applicant__username'), ('first_name', 'applicant__first_name'),
+        ('last_name', 'applicant__last_name'), ('email', 'applicant__email'), ('phone_number', 'applicant__phone_number'),
+        ('job', 'job__title'), ('status', 'status'), ('applied_at', 'applied_at'), ('skills', 'resume_skills'),
+    )
 
     def test_func(self):
         return self.request.user.is_employer_user
 
     def get_queryset(self):
-        return Application.objects.filter(job__employer=self.request.user).select_related('applicant', 'job').order_by('-created_at')
+        queryset = Application.objects.filter(job__employer=self.request.user).select_related('applicant', 'job').annotate(
+            resume_skills=Subquery(ResumeDocument.objects.filter(source=OuterRef('resume')).values('skills')[:1], output_field=JSONField()),
+        ).order_by('-applied_at')
+        # Keyword search over the extracted resume text (jobs/resumes.py), e.g. "django, machine learning"
+        query = self.request.GET.get('q', '').strip()
+        if query:
+            queryset = filter_by_keywords(queryset, 'resume', query)
+        return queryset
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '').strip()
+        return context
 
 
 class HomeView(TemplateView):
     template_name = 'jobs/home.html'
 
+    def get(self, request, *args, **kwargs):
+        # Anonymous visitors all see the same page, so serve it whole from the cache.
+        # The key carries the job/category versions, which writes to those models bump.
+        if request.user.is_authenticated:
+            return super().get(request, *args, **kwargs)
+        key = page_cache_key('home', request, get_versions(JOBS, CATEGORIES))
+        content = cache.get(key)
+        if content is not None:
+            return HttpResponse(content)
+        response = super().get(request, *args, **kwargs)
+        response.add_post_render_callback(lambda r: cache.set(key, r.content, settings.HOME_PAGE_CACHE_TIMEOUT))
+        return response
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        # Versions for the {% cache %} fragments in home.html; the querysets below
+        # are lazy and only run when a fragment has to be re-rendered.
+        context['cache_versions'] = get_versions(JOBS, CATEGORIES)
+        context['fragment_timeout'] = settings.HOME_FRAGMENT_CACHE_TIMEOUT
         context['recent_jobs'] = Job.objects.filter(status='active', is_active=True).order_by('-created_at')[:6]
         context['job_categories'] = Category.objects.all()
         context['article_categories'] = ArticleCategory.objects.all()[:8]
@@ -346,14 +508,16 @@ class HomeView(TemplateView):
                 exclude_ids.add(sender_id)
                 exclude_ids.add(recipient_id)
                 
-            context['suggested_connections'] = User.objects.filter(user_type='applicant').exclude(id__in=list(exclude_ids)).order_by('?')[:5]
+            context['suggested_connections'] = list(User.objects.filter(user_type='applicant').exclude(id__in=list(exclude_ids)).order_by('?')[:5])
+            prefetch_derivatives(student.profile_picture.name for student in context['suggested_connections'])
         return context
 
-class JobListView(ListView):
+class JobListView(ConditionalListMixin, ListView):
     model = Job
     template_name = 'jobs/job_list.html'
     context_object_name = 'jobs'
     paginate_by = 10
+    read_replica = True
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -361,18 +525,37 @@ class JobListView(ListView):
         page = context['page_obj']
         if paginator:
             context['elided_page_range'] = paginator.get_elided_page_range(page.number, on_each_side=2, on_ends=1)
+        # Companies come with the page (select_related in get_queryset)
+        prefetch_derivatives(job.company.logo.name for job in context['jobs'])
+        if self.request.user.is_authenticated:
+            # Saved state from the cached id array rather than a subquery per row
+            saved = self.job_marks()['saved']
+            for job in context['jobs']:
+                job.is_saved = contains(saved, job.pk)
         return context
 
+    def job_marks(self):
+        if not hasattr(self, '_job_marks'):
+            self._job_marks = get_job_marks(self.request.user.pk)
+        return self._job_marks
+
+    def paginate_queryset(self, queryset, page_size):
+        # Hidden jobs are dropped from the user's cached list of matching ids
+        # instead of with an anti-join, which gets slow for users who hide thousands
+        hidden = self.job_marks()['hidden'] if self.request.user.is_authenticated else None
+        if hidden:
+            ids = visible_job_ids(self.request.user.pk, queryset, hidden)
+            if ids is None:
+                # Too many matches to cache their ids; the query leaves them out
+                queryset = queryset.exclude(hidden_by_users__user=self.request.user)
+                self.total = None
+            else:
+                queryset = VisibleJobs(queryset, ids)
+                self.total = len(ids)
+        return super().paginate_queryset(queryset, page_size)
+
     def get_queryset(self):
-        queryset = Job.objects.filter(status='active', is_active=True).order_by('-created_at')
-        
-        # Exclude hidden jobs if user is authenticated
-        if self.request.user.is_authenticated:
-            queryset = queryset.exclude(hidden_by_users__user=self.request.user)
-            # Annotate saved status
-            queryset = queryset.annotate(
-                is_saved=Exists(SavedJob.objects.filter(job=OuterRef('pk'), user=self.request.user))
-            )
+        queryset = Job.objects.filter(status='active', is_active=True).select_related('company').order_by('-created_at', '-id')
 
         query = self.request.GET.get('q')
         location = self.request.GET.get('l')
@@ -387,7 +570,16 @@ class JobListView(ListView):
             
         return queryset
 
+    def get_variant(self):
+        variant = super().get_variant()
+        if self.request.user.is_authenticated:
+            # Saved and hidden jobs change the page but not Job.updated_at
+            marks = self.job_marks()
+            variant += (zlib.crc32(marks['saved']), zlib.crc32(marks['hidden']))
+        return variant
+
 @login_required
+@write_transaction
 def toggle_save_job(request, slug):
     if request.method == 'POST':
         job = get_object_or_404(Job, slug=slug)
@@ -397,26 +589,136 @@ def toggle_save_job(request, slug):
             saved = False
         else:
             saved = True
+        forget_job_marks(request.user.pk, 'saved')
         return JsonResponse({'saved': saved})
     return JsonResponse({'error': 'Invalid request'}, status=400)
 
 @login_required
+@write_transaction
 def toggle_hide_job(request, slug):
     if request.method == 'POST':
         job = get_object_or_404(Job, slug=slug)
         HiddenJob.objects.get_or_create(user=request.user, job=job)
+        forget_job_marks(request.user.pk, 'hidden')
         return JsonResponse({'hidden': True})
     return JsonResponse({'error': 'Invalid request'}, status=400)
 
+# Batch versions of the toggles: POST {"jobs": [slugs or ids], "action": ...}
+# marks a whole page of jobs with one lookup and one insert or delete.
+BATCH_JOB_LIMIT = 100
 
-class JobDetailView(LoginRequiredMixin, DetailView):
+def apply_job_marks(request, model, actions):
+    import json
+    if request.method != 'POST':
+        return None
+    try:
+        data = json.loads(request.body)
+        refs, action = data['jobs'], data['action']
+    except (ValueError, KeyError, TypeError):
+        return None
+    if action not in actions or not isinstance(refs, list) or not 0 < len(refs) <= BATCH_JOB_LIMIT:
+        return None
+    if not all(isinstance(ref, (int, str)) and not isinstance(ref, bool) for ref in refs):
+        return None
+    ids = {ref for ref in refs if isinstance(ref, int)}
+    slugs = {ref for ref in refs if isinstance(ref, str)}
+    jobs = dict(Job.objects.filter(Q(id__in=ids) | Q(slug__in=slugs)).values_list('id', 'slug'))
+    if actions[action]:
+        model.objects.bulk_create([model(user=request.user, job_id=pk) for pk in jobs], ignore_conflicts=True)
+    else:
+        model.objects.filter(user=request.user, job_id__in=jobs).delete()
+    forget_job_marks(request.user.pk, 'saved' if model is SavedJob else 'hidden')
+    found = set(jobs) | set(jobs.values())
+    return {
+        'jobs': {slug: actions[action] for slug in jobs.values()},
+        'missing': [ref for ref in refs if ref not in found],
+    }
+
+@login_required
+@write_transaction
+def batch_save_jobs(request):
+    result = apply_job_marks(request, SavedJob, {'save': True, 'unsave': False})
+    if result is None:
+        return JsonResponse({'error': 'Invalid request'}, status=400)
+    return JsonResponse({'saved': result['jobs'], 'missing': result['missing']})
+
+@login_required
+@write_transaction
+def batch_hide_jobs(request):
+    result = apply_job_marks(request, HiddenJob, {'hide': True, 'unhide': False})
+    if result is None:
+        return JsonResponse({'error': 'Invalid request'}, status=400)
+    return JsonResponse({'hidden': result['jobs'], 'missing': result['missing']})
+
+
+# Resumable uploads (jobs/uploads.py): POST uploads/ starts one, PATCH
+# uploads/<id>/ sends each chunk with Upload-Offset and Upload-Checksum
+# headers, GET uploads/<id>/ says where to resume, POST .../commit/ finishes.
+
+def upload_state(session):
+    return {
+        'id': str(session.pk),
+        'offset': session.offset,
+        'size': session.size,
+        'status': session.status,
+        'url': reverse('jobs:upload_chunk', args=[session.pk]),
+        'chunk_size': settings.UPLOAD_CHUNK_SIZE,
+    }
+
+@login_required
+def upload_init(request):
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Invalid request'}, status=400)
+    purpose = request.POST.get('purpose')
+    lesson = None
+    if purpose == 'lesson_video':
+        lesson = get_object_or_404(Lesson.objects.select_related('module__course'), slug=request.POST.get('lesson'))
+        if not (request.user.is_admin_user or lesson.module.course.college_id == request.user.pk):
+            raise PermissionDenied
+    try:
+        session = start_upload(request.user, purpose, request.POST.get('filename'), int(request.POST.get('size') or 0), lesson=lesson)
+    except (UploadError, ValueError) as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    return JsonResponse(upload_state(session), status=201)
+
+@login_required
+def upload_chunk(request, pk):
+    session = get_object_or_404(UploadSession, pk=pk, user=request.user)
+    if request.method == 'GET':
+        return JsonResponse(upload_state(session))
+    if request.method not in ('PATCH', 'PUT'):
+        return JsonResponse({'error': 'Invalid request'}, status=400)
+    try:
+        offset = int(request.headers.get('Upload-Offset', ''))
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+        append_chunk(session, request, offset, length, request.headers.get('Upload-Checksum'))
+    except ValueError:
+        return JsonResponse({'error': 'Upload-Offset header is required'}, status=400)
+    except UploadError as exc:
+        session.refresh_from_db()
+        return JsonResponse({'error': str(exc), **upload_state(session)}, status=exc.status)
+    return JsonResponse(upload_state(session))
+
+@login_required
+def upload_commit(request, pk):
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Invalid request'}, status=400)
+    session = get_object_or_404(UploadSession.objects.select_related('lesson'), pk=pk, user=request.user)
+    try:
+        commit_upload(session, request.headers.get('Upload-Checksum'))
+    except UploadError as exc:
+        return JsonResponse({'error': str(exc), **upload_state(session)}, status=exc.status)
+    return JsonResponse(upload_state(session))
+
+
+class JobDetailView(LoginRequiredMixin, ConditionalDetailMixin, DetailView):
     model = Job
     template_name = 'jobs/job_detail.html'
     context_object_name = 'job'
     slug_url_kwarg = 'slug'
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().select_related('company')
         if self.request.user.is_authenticated:
             if self.request.user.is_admin_user:
                 return queryset
@@ -425,6 +727,22 @@ class JobDetailView(LoginRequiredMixin, DetailView):
                 return queryset.filter(Q(status='active') | Q(employer=self.request.user))
         return queryset.filter(status='active', is_active=True)
 
+    def is_saved(self):
+        if not hasattr(self, '_is_saved'):
+            self._is_saved = SavedJob.objects.filter(user=self.request.user, job=self.object).exists()
+        return self._is_saved
+
+    def get_variant(self):
+        return (self.is_saved(),)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # The job/company parts of the page are {% cache %} fragments keyed on
+        # job.updated_at; only the per-user bits are computed on every request.
+        context['fragment_timeout'] = settings.DETAIL_FRAGMENT_CACHE_TIMEOUT
+        context['is_saved'] = self.is_saved()
+        return context
+
 
 class ApplicationCreateView(LoginRequiredMixin, CreateView):
     model = Application
@@ -465,8 +783,13 @@ class ApplicationCreateView(LoginRequiredMixin, CreateView):
                 return self.form_invalid(form)
             form.instance.resume = self.request.user.cv
             form.instance.cover_letter = form.cleaned_data.get('cover_letter') or f"Applied with profile for {job.title}"
-            
-        return super().form_valid(form)
+
+        response = super().form_valid(form)
+        if form.upload_session is not None:
+            # The Application has its own reference to the blob now; the
+            # session's would keep it alive after the application is gone
+            form.upload_session.delete()
+        return response
 
     def get_success_url(self):
         return reverse_lazy('jobs:job_list')
@@ -527,7 +850,9 @@ def onboard_student(request):
         try:
             student = User.objects.get(email=email, user_type='applicant')
             course = Course.objects.get(id=course_id, college=request.user)
-            Enrollment.objects.get_or_create(student=student, course=course)
+            enrollment, created = Enrollment.objects.get_or_create(student=student, course=course)
+            if created:
+                refresh_enrollment_count.delay(course.pk)
             messages.success(request, f"Student {student.get_full_name()} onboarded successfully.")
         except User.DoesNotExist:
             messages.error(request, "No student found with this email.")
@@ -688,6 +1013,7 @@ class MessagingView(LoginRequiredMixin, TemplateView):
         return context
 
 @login_required
+@write_transaction
 def send_message(request):
     if request.method == 'POST':
         recipient_id = request.POST.get('recipient_id')
@@ -856,11 +1182,12 @@ def update_connection_status(request, pk, action):
 class NotificationsView(LoginRequiredMixin, TemplateView):
     template_name = 'jobs/notifications.html'
 
-class LearnView(ListView):
+class LearnView(ConditionalListMixin, ListView):
     model = Course
     template_name = 'jobs/learn.html'
     context_object_name = 'courses'
     paginate_by = 9
+    read_replica = True
     
     def get_queryset(self):
         queryset = Course.objects.filter(status='active').order_by('-rating')
@@ -870,16 +1197,24 @@ class LearnView(ListView):
             queryset = queryset.filter(Q(category__slug=category_slug) | Q(category__parent__slug=category_slug))
         return queryset
 
+    def certificates_count(self):
+        if not self.request.user.is_authenticated:
+            return 0
+        if not hasattr(self, '_certificates_count'):
+            self._certificates_count = Enrollment.objects.filter(student=self.request.user, status='completed').count()
+        return self._certificates_count
+
+    def get_variant(self):
+        return super().get_variant() + (self.certificates_count(),)
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         # Get only parent categories for the filter sidebar
         context['parent_categories'] = CourseCategory.objects.filter(parent__isnull=True).prefetch_related('subcategories')
         context['current_category'] = self.request.GET.get('category')
         # Dynamic stats
-        if self.request.user.is_authenticated:
-            context['certificates_count'] = Enrollment.objects.filter(student=self.request.user, status='completed').count()
-        else:
-            context['certificates_count'] = 0
+        context['certificates_count'] = self.certificates_count()
+        prefetch_derivatives(course.image.name for course in context['courses'])
             
         paginator = context['paginator']
         page = context['page_obj']
@@ -896,7 +1231,7 @@ class StudentDashboardView(LoginRequiredMixin, ListView):
     def get_queryset(self):
         return Enrollment.objects.filter(student=self.request.user).select_related('course').prefetch_related('course__modules__lessons')
 
-class CourseDetailView(LoginRequiredMixin, DetailView):
+class CourseDetailView(LoginRequiredMixin, ConditionalDetailMixin, DetailView):
     model = Course
     template_name = 'jobs/course_detail.html'
     context_object_name = 'course'
@@ -911,12 +1246,24 @@ class CourseDetailView(LoginRequiredMixin, DetailView):
                 return queryset.filter(Q(status='active') | Q(college=self.request.user))
         return queryset.filter(status='active')
 
+    def is_enrolled(self):
+        if not hasattr(self, '_is_enrolled'):
+            self._is_enrolled = Enrollment.objects.filter(student=self.request.user, course=self.object).exists()
+        return self._is_enrolled
+
+    def get_variant(self):
+        return (self.is_enrolled(),)
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         # Check if user is enrolled
-        context['is_enrolled'] = Enrollment.objects.filter(student=self.request.user, course=self.object).exists()
-        # Get syllabus (modules and lessons)
+        context['is_enrolled'] = self.is_enrolled()
+        # Get syllabus (modules and lessons). Lazy: only runs when the cached
+        # syllabus fragment (keyed on course.updated_at) has to be rebuilt.
         context['modules'] = self.object.modules.all().prefetch_related('lessons')
+        if context['is_enrolled']:
+            context['first_lesson'] = Lesson.objects.filter(module__course=self.object).order_by('module__order', 'order').first()
+        context['fragment_timeout'] = settings.DETAIL_FRAGMENT_CACHE_TIMEOUT
         return context
 
 class LessonDetailView(LoginRequiredMixin, DetailView):
@@ -948,13 +1295,27 @@ class LessonDetailView(LoginRequiredMixin, DetailView):
         context['is_completed'] = UserProgress.objects.filter(user=self.request.user, lesson=self.object, is_completed=True).exists()
         return context
 
+LESSON_MEDIA_FIELDS = {'video': 'video_file', 'notes': 'pdf_notes'}
+
+@login_required
+def lesson_media(request, slug, kind):
+    # Same rule as LessonDetailView: only enrolled students get the lesson's files
+    if kind not in LESSON_MEDIA_FIELDS:
+        raise Http404
+    lesson = get_object_or_404(Lesson.objects.select_related('module'), slug=slug)
+    file = getattr(lesson, LESSON_MEDIA_FIELDS[kind])
+    if not file:
+        raise Http404
+    if not Enrollment.objects.filter(student=request.user, course_id=lesson.module.course_id).exists():
+        raise PermissionDenied
+    return serve_file(request, file, as_attachment=kind == 'notes')
+
 @login_required
 def enroll_course(request, slug):
     course = get_object_or_404(Course, slug=slug)
     enrollment, created = Enrollment.objects.get_or_create(student=request.user, course=course)
     if created:
-        course.students_enrolled += 1
-        course.save()
+        refresh_enrollment_count.delay(course.pk)
         messages.success(request, f"Successfully enrolled in {course.title}!")
     else:
         messages.info(request, "You are already enrolled in this course.")
@@ -970,11 +1331,12 @@ class CourseCreateView(LoginRequiredMixin, VerifiedInstitutionalUserMixin, Creat
         form.instance.college = self.request.user
         return super().form_valid(form)
 
-class ArticleListView(ListView):
+class ArticleListView(ConditionalListMixin, ListView):
     model = Article
     template_name = 'jobs/article_list.html'
     context_object_name = 'articles'
     paginate_by = 12
+    read_replica = True
 
     def get_queryset(self):
         queryset = Article.objects.select_related('category', 'author').order_by('-created_at')
@@ -987,6 +1349,7 @@ class ArticleListView(ListView):
         context = super().get_context_data(**kwargs)
         context['categories'] = ArticleCategory.objects.filter(parent__isnull=True).prefetch_related('subcategories')
         context['current_category'] = self.request.GET.get('category')
+        prefetch_derivatives(article.image.name for article in context['articles'])
         
         paginator = context['paginator']
         page = context['page_obj']
@@ -995,7 +1358,7 @@ class ArticleListView(ListView):
             
         return context
 
-class ArticleDetailView(DetailView):
+class ArticleDetailView(ConditionalDetailMixin, DetailView):
     model = Article
     template_name = 'jobs/article_detail.html'
     context_object_name = 'article'